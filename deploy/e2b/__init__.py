@@ -11,6 +11,7 @@ with MCP servers and browser automation support.
 from sandbox_deploy import (
     E2BSandboxManager,
     SandboxConfig,
+    SandboxPool,
     CommandExitException,
 )
 
@@ -18,5 +19,6 @@ __version__ = "0.1.0"
 __all__ = [
     "E2BSandboxManager",
     "SandboxConfig", 
+    "SandboxPool",
     "CommandExitException",
 ]
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Offline lifecycle benchmark for E2BSandboxManager
+
+Creates, probes and stops N sandboxes on the local fake backend (fake_sandbox.py)
+at a configurable concurrency and reports throughput plus latency percentiles per
+phase. No E2B account or network access is needed; latency is injected instead.
+"""
+
+import sys
+import json
+import time
+import asyncio
+import argparse
+import logging
+from typing import Any, Dict, List, Optional
+
+from fake_sandbox import FakeBackend, FakeLatency
+from sandbox_deploy import E2BSandboxManager, SandboxConfig, percentile
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the sandbox lifecycle against a local fake backend")
+    parser.add_argument("--count", type=int, default=10, help="Sandboxes to create, probe and stop (default: 10)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Sandboxes handled at once (default: 4)")
+    parser.add_argument("--probes", type=int, default=3, help="Health probes per sandbox (default: 3)")
+    parser.add_argument("--create-latency", type=float, default=0.5, help="Injected SDK create delay in seconds (default: 0.5)")
+    parser.add_argument("--command-latency", type=float, default=0.05, help="Injected delay per commands.run call (default: 0.05)")
+    parser.add_argument("--write-latency", type=float, default=0.05, help="Injected delay per files.write call (default: 0.05)")
+    parser.add_argument("--kill-latency", type=float, default=0.2, help="Injected SDK kill delay in seconds (default: 0.2)")
+    parser.add_argument("--startup-latency", type=float, default=1.0, help="Time the stand-in startup.sh takes to become ready (default: 1.0)")
+    parser.add_argument("--jitter", type=float, default=0.1, help="+/- fraction applied to every injected delay (default: 0.1)")
+    parser.add_argument("--no-bundle", action="store_true", help="Bootstrap with one call per step instead of the bundle")
+    parser.add_argument("--no-ready-signal", action="store_true", help="Poll /health instead of waiting on readiness markers")
+    parser.add_argument("--fast-kill", action="store_true", help="Skip the in-sandbox service stop on teardown")
+    parser.add_argument("--json", dest="json_path", default=None, help="Also write the report as JSON to this path")
+    parser.add_argument("--verbose", action="store_true", help="Show manager logs (default: warnings only)")
+    return parser.parse_args(argv)
+
+
+def summarize(name: str, latencies_ms: List[float], ok: int, total: int, wall_s: float) -> Dict[str, Any]:
+    return {
+        "phase": name,
+        "ok": ok,
+        "total": total,
+        "wall_s": round(wall_s, 3),
+        "throughput_per_s": round(ok / wall_s, 2) if wall_s > 0 else None,
+        "p50_ms": percentile(latencies_ms, 50),
+        "p90_ms": percentile(latencies_ms, 90),
+        "p99_ms": percentile(latencies_ms, 99),
+        "max_ms": round(max(latencies_ms), 1) if latencies_ms else None,
+    }
+
+
+async def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    latency = FakeLatency(
+        create=args.create_latency,
+        command=args.command_latency,
+        write=args.write_latency,
+        kill=args.kill_latency,
+        startup=args.startup_latency,
+        jitter=args.jitter,
+    )
+    config = SandboxConfig(
+        template_id="fake-benchmark",
+        headless=True,
+        # The fake serves plain HTTP only; scheduled keepalives are disabled, probes are driven below
+        probe_http=True,
+        keepalive_interval=0,
+        platform_keepalive_interval=0,
+        bundle_bootstrap=not args.no_bundle,
+        ready_signal=not args.no_ready_signal,
+        ready_timeout=max(10, int(args.startup_latency * 4) + 5),
+        fleet_concurrency=args.concurrency,
+        stop_fast_kill=args.fast_kill,
+    )
+    records: List[Dict[str, Any]] = []
+    manager = E2BSandboxManager(config, on_timing=records.append, sandbox_factory=FakeBackend(latency).create)
+    report: Dict[str, Any] = {"config": {k: v for k, v in vars(args).items() if k != "json_path"}, "phases": []}
+
+    try:
+        # Create
+        t0 = time.monotonic()
+        fleet = await manager.create_many(args.count, concurrency=args.concurrency, sandbox_id_prefix="bench")
+        create_wall = time.monotonic() - t0
+        creates = [r for r in records if r["event"] == "create"]
+        report["phases"].append(summarize(
+            "create",
+            [r["timings_ms"]["total"] for r in creates if r["success"]],
+            fleet["created_count"], args.count, create_wall,
+        ))
+        breakdown: Dict[str, Dict[str, Optional[float]]] = {}
+        for key in ("sdk_create", "bootstrap", "ready_signal", "health_probe"):
+            values = [r["timings_ms"][key] for r in creates if r["success"] and key in r["timings_ms"]]
+            if values:
+                breakdown[key] = {"p50_ms": percentile(values, 50), "p99_ms": percentile(values, 99)}
+        report["create_breakdown"] = breakdown
+        report["errors"] = fleet["errors"]
+
+        # Probe
+        semaphore = asyncio.Semaphore(max(1, args.concurrency))
+        probe_latencies: List[float] = []
+        probe_ok = 0
+
+        async def _probe(sandbox_id: str) -> None:
+            nonlocal probe_ok
+            for _ in range(args.probes):
+                async with semaphore:
+                    t = time.monotonic()
+                    record = await manager.prober.probe_now(sandbox_id)
+                    if record and record.get("healthy"):
+                        probe_ok += 1
+                        probe_latencies.append((time.monotonic() - t) * 1000)
+
+        sandbox_ids = list(manager.active_sandboxes)
+        t0 = time.monotonic()
+        await asyncio.gather(*(_probe(sid) for sid in sandbox_ids))
+        report["phases"].append(summarize(
+            "probe", probe_latencies, probe_ok, len(sandbox_ids) * args.probes, time.monotonic() - t0,
+        ))
+
+        # Stop
+        t0 = time.monotonic()
+        stopped = await manager.stop_all_sandboxes(concurrency=args.concurrency)
+        stop_wall = time.monotonic() - t0
+        stops = [r for r in records if r["event"] == "stop"]
+        report["phases"].append(summarize(
+            "stop",
+            [r["timings_ms"]["total"] for r in stops if r["success"]],
+            stopped["stopped_count"], len(sandbox_ids), stop_wall,
+        ))
+    finally:
+        if manager.active_sandboxes:
+            await manager.stop_all_sandboxes(fast_kill=True)
+        await manager.shutdown()
+    return report
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    columns = ("phase", "ok", "total", "wall_s", "throughput_per_s", "p50_ms", "p90_ms", "p99_ms", "max_ms")
+    rows = [[str(row.get(c) if row.get(c) is not None else "-") for c in columns] for row in report["phases"]]
+    widths = [max(len(c), *(len(r[i]) for r in rows)) for i, c in enumerate(columns)]
+    print("  ".join(c.ljust(w) for c, w in zip(columns, widths)))
+    for r in rows:
+        print("  ".join(v.ljust(w) for v, w in zip(r, widths)))
+    if report.get("create_breakdown"):
+        print("\ncreate breakdown (ms): " + ", ".join(
+            f"{k} p50={v['p50_ms']} p99={v['p99_ms']}" for k, v in report["create_breakdown"].items()
+        ))
+    for err in report.get("errors") or []:
+        print(f"❌ {err['sandbox_id']}: {err['error']}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    for name in ("sandbox_deploy", "httpx"):
+        logging.getLogger(name).setLevel(logging.INFO if args.verbose else logging.WARNING)
+    report = asyncio.run(run_benchmark(args))
+    print_report(report)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+    failed = any(p["ok"] < p["total"] for p in report["phases"])
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
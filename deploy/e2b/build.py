@@ -1,9 +1,44 @@
+import os
+import json
+import time
+import shlex
+import hashlib
 import asyncio
 import argparse
-from typing import Any, Optional
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
 
 from e2b import AsyncTemplate
-from template import make_template
+from template import TEMPLATE_DIR, make_template
+
+VARIANT_DOCKERFILES = {
+    "full": "e2b.Dockerfile",
+    "simple": "e2b.Dockerfile.simple",
+    "minimal": "e2b.Dockerfile.minimal",
+}
+# Bump when the fingerprint inputs change so old state entries no longer match
+FINGERPRINT_VERSION = 1
+# Build-log marker printed by scripts/prewarm-mcp-servers.sh, one JSON record per pre-warmed server
+PREWARM_MARKER = "MCP_PREWARM "
+DEFAULT_STATE_FILE = os.path.join(
+    os.getenv("E2B_STATE_DIR", os.path.join("~", ".e2b-mcp-sandbox")), "template-builds.json"
+)
+
+
+def parse_variants(value: str) -> List[str]:
+    """Parse --variant: one variant, a comma-separated list, or 'all'."""
+    if value.strip() == "all":
+        return list(VARIANT_DOCKERFILES)
+    variants: List[str] = []
+    for name in (v.strip() for v in value.split(",")):
+        if name not in VARIANT_DOCKERFILES:
+            raise argparse.ArgumentTypeError(
+                f"invalid variant {name!r} (choose from {', '.join(VARIANT_DOCKERFILES)} or 'all')"
+            )
+        if name not in variants:
+            variants.append(name)
+    return variants
 
 
 def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
@@ -16,12 +51,13 @@ def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
     )
     parser.add_argument(
         "--variant",
-        choices=["full", "simple", "minimal"],
-        default="full",
+        type=parse_variants,
+        default=["full"],
         help=(
             "Convenience selector for template Dockerfile: "
             "full=e2b.Dockerfile (GUI + noVNC), simple=e2b.Dockerfile.simple (headless Chrome), "
-            "minimal=e2b.Dockerfile.minimal (no X/noVNC, fastest)"
+            "minimal=e2b.Dockerfile.minimal (no X/noVNC, fastest). "
+            "Use a comma-separated list (e.g. full,minimal) or 'all' to build several variants concurrently"
         ),
     )
     parser.add_argument(
@@ -34,70 +70,309 @@ def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
         default=None,
         help="Template alias to register (default varies by --mode and --variant)",
     )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=3,
+        help="Max variants built at the same time when several are selected (default: 3)",
+    )
     parser.add_argument("--cpu", type=int, default=2, help="CPU count to allocate during build (default: 2)")
     parser.add_argument("--memory-mb", type=int, default=2048, help="Memory in MB to allocate during build (default: 2048)")
-    parser.add_argument("--skip-cache", action="store_true", help="Skip build cache (default: off)")
+    parser.add_argument("--skip-cache", action="store_true", help="Skip build cache (default: off; always rebuilds)")
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Build even when the inputs match the last successful build of the alias",
+    )
+    parser.add_argument(
+        "--state-file",
+        default=DEFAULT_STATE_FILE,
+        help="JSON file recording the input fingerprint each alias was built from "
+             "(default: ~/.e2b-mcp-sandbox/template-builds.json, env: E2B_STATE_DIR)",
+    )
     parser.add_argument("--verbose", action="store_true", help="Show verbose build logs (default: normal)")
     parser.add_argument("--quiet", action="store_true", help="Only show errors (default: normal)")
-    return parser.parse_args(argv)
+    args = parser.parse_args(argv)
+    if len(args.variant) > 1 and (args.dockerfile or args.alias):
+        parser.error("--dockerfile and --alias apply to a single variant; drop them when building several")
+    return args
 
 
-async def main(args: Optional[argparse.Namespace] = None) -> None:
-    args = args or parse_args()
-
-    variant_to_df = {
-        "full": "e2b.Dockerfile",
-        "simple": "e2b.Dockerfile.simple",
-        "minimal": "e2b.Dockerfile.minimal",
+def default_alias(mode: str, variant: str) -> str:
+    prefix = "mcp-dev-" if mode == "dev" else "mcp-prod-"
+    variant_to_alias = {
+        "full": f"{prefix}gui",
+        "simple": f"{prefix}simple",
+        "minimal": f"{prefix}minimal",
     }
-    chosen_df = args.dockerfile or variant_to_df[args.variant]
-    tmpl = make_template(chosen_df)
-
-    if not args.alias:
-        prefix = "mcp-dev-" if args.mode == "dev" else "mcp-prod-"
-        variant_to_alias = {
-            "full": f"{prefix}gui",
-            "simple": f"{prefix}simple",
-            "minimal": f"{prefix}minimal",
-        }
-        args.alias = variant_to_alias[args.variant]
+    return variant_to_alias[variant]
+
+
+def _resolve_dockerfile(dockerfile: str) -> Path:
+    path = Path(dockerfile)
+    return path if path.is_absolute() else (TEMPLATE_DIR / path).resolve()
+
+
+def dockerfile_inputs(dockerfile: Path) -> List[Path]:
+    """Local files the Dockerfile COPYs/ADDs (directories expanded, sorted); remote and stage sources are skipped."""
+    context = dockerfile.parent
+    text = dockerfile.read_text(encoding="utf-8").replace("\\\n", " ")
+    inputs: List[Path] = []
+    for line in text.splitlines():
+        parts = line.strip().split(None, 1)
+        if len(parts) != 2 or parts[0].upper() not in ("COPY", "ADD"):
+            continue
+        rest = parts[1].strip()
+        if rest.startswith("["):
+            try:
+                tokens = json.loads(rest)
+            except ValueError:
+                continue
+        else:
+            tokens = shlex.split(rest)
+        flags = [t for t in tokens if t.startswith("--")]
+        if any(f.startswith("--from") for f in flags):
+            continue
+        sources = [t for t in tokens if not t.startswith("--")][:-1]
+        for source in sources:
+            if "://" in source:
+                continue
+            for match in sorted(context.glob(source)) or [context / source]:
+                if match.is_dir():
+                    inputs.extend(p for p in sorted(match.rglob("*")) if p.is_file())
+                else:
+                    inputs.append(match)
+    return sorted(set(inputs))
+
+
+def compute_fingerprint(dockerfile: Path, args: argparse.Namespace) -> str:
+    """sha256 over the Dockerfile, every file it copies and the build args."""
+    digest = hashlib.sha256()
+    build_args = {"version": FINGERPRINT_VERSION, "cpu": args.cpu, "memory_mb": args.memory_mb}
+    digest.update(json.dumps(build_args, sort_keys=True).encode("utf-8"))
+    for path in [dockerfile, *dockerfile_inputs(dockerfile)]:
+        try:
+            rel = str(path.relative_to(dockerfile.parent))
+        except ValueError:
+            rel = str(path)
+        digest.update(rel.encode("utf-8") + b"\0")
+        digest.update(path.read_bytes() if path.exists() else b"<missing>")
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def load_state(path: str) -> Dict[str, Any]:
+    try:
+        with open(os.path.expanduser(path), "r", encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(path: str, state: Dict[str, Any]) -> None:
+    path = os.path.expanduser(path)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(state, fh, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def server_packages(servers_json: Path) -> List[str]:
+    """'<command> <package spec>' for every npx/uvx server in servers.json (what the templates pre-warm)."""
+    try:
+        cfg = json.loads(servers_json.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return []
+    servers = cfg.get("mcpServers") or cfg.get("servers") or cfg
+    packages = []
+    for server in servers.values():
+        if not isinstance(server, dict) or server.get("command") not in ("npx", "uvx"):
+            continue
+        spec = next((a for a in server.get("args") or [] if not a.startswith("-")), None)
+        if spec:
+            packages.append(f"{server['command']} {spec}")
+    return packages
+
+
+def print_prewarm(records: List[Dict[str, Any]], prefix: str = "", cached: bool = False) -> None:
+    """Report pinned MCP server packages and the cold first-call install time moved into the build."""
+    if not records:
+        return
+    saved_ms = sum(r.get("warm_ms") or 0 for r in records if r.get("status") == "ok")
+    note = " (cached layer, times from the last build)" if cached else ""
+    print(f"{prefix}🔥 Pre-warmed MCP server packages{note}:")
+    for r in records:
+        target = r.get("pinned") or r.get("spec")
+        print(f"{prefix}   {r.get('server')}: {r.get('command')} {target} [{r.get('status')}] {(r.get('warm_ms') or 0) / 1000:.1f}s")
+    print(f"{prefix}   Cold first-call latency saved: ~{saved_ms / 1000:.1f}s across {len(records)} server(s)")
+
+
+def make_log_handler(
+    args: argparse.Namespace,
+    prefix: str = "",
+    prewarm: Optional[List[Dict[str, Any]]] = None,
+) -> Callable[[Any], None]:
+    """Build log printer honoring --quiet/--verbose; prefix tags lines when variants build concurrently.
+
+    MCP_PREWARM records found in the log are appended to ``prewarm``.
+    """
 
     def log_handler(entry: Any) -> None:
         msg = (entry.message or "").strip()
+        if prewarm is not None and PREWARM_MARKER in msg:
+            try:
+                prewarm.append(json.loads(msg.split(PREWARM_MARKER, 1)[1]))
+            except ValueError:
+                pass
         # Filter noisy Dockerfile COMMENT warnings
         if msg.startswith("Unsupported instruction: COMMENT"):
             return
         # Logging behavior: quiet -> only errors; verbose -> all; normal -> info+warn+error
         level = (entry.level or "").lower()
+        line = f"{prefix}[{entry.timestamp.isoformat()}] {entry.level.upper()}: {msg}"
         if args.quiet:
             if level in ("error", "fatal"):
-                print(f"[{entry.timestamp.isoformat()}] {entry.level.upper()}: {msg}")
+                print(line)
             return
         if args.verbose:
-            print(f"[{entry.timestamp.isoformat()}] {entry.level.upper()}: {msg}")
+            print(line)
             return
         if level in ("info", "warn", "error", "fatal"):
-            print(f"[{entry.timestamp.isoformat()}] {entry.level.upper()}: {msg}")
-
-    await AsyncTemplate.build(
-        tmpl,
-        alias=args.alias,
-        on_build_logs=log_handler,
-        cpu_count=args.cpu,
-        memory_mb=args.memory_mb,
-        skip_cache=args.skip_cache,
-    )
+            print(line)
+
+    return log_handler
+
+
+async def build_variant(
+    variant: str,
+    args: argparse.Namespace,
+    semaphore: asyncio.Semaphore,
+    state: Dict[str, Any],
+    prefix: str = "",
+) -> Dict[str, Any]:
+    """Build one variant; returns a summary record instead of raising so sibling builds keep going.
+
+    A variant whose input fingerprint matches the last successful build of its alias is skipped
+    (unless --force or --skip-cache).
+    """
+    dockerfile = args.dockerfile or VARIANT_DOCKERFILES[variant]
+    alias = args.alias or default_alias(args.mode, variant)
+    record: Dict[str, Any] = {
+        "variant": variant, "alias": alias, "dockerfile": dockerfile, "success": False, "skipped": False,
+    }
+    t0 = time.monotonic()
+    try:
+        fingerprint: Optional[str] = compute_fingerprint(_resolve_dockerfile(dockerfile), args)
+    except OSError as e:
+        print(f"{prefix}⚠️  Could not fingerprint build inputs ({e}); building")
+        fingerprint = None
+    previous = state.get(alias) or {}
+    if fingerprint and not (args.force or args.skip_cache) and previous.get("fingerprint") == fingerprint:
+        record.update(success=True, skipped=True, template_id=previous.get("template_id"),
+                      wall_s=round(time.monotonic() - t0, 3))
+        print(
+            f"{prefix}⏭️  Inputs unchanged since {previous.get('built_at', 'last build')} "
+            f"(fingerprint {fingerprint[:12]}); skipped build of {alias} in {record['wall_s'] * 1000:.0f}ms "
+            "(use --force to rebuild)"
+        )
+        return record
+
+    prewarm: List[Dict[str, Any]] = []
+    async with semaphore:
+        t0 = time.monotonic()
+        try:
+            tmpl = make_template(dockerfile)
+            info = await AsyncTemplate.build(
+                tmpl,
+                alias=alias,
+                on_build_logs=make_log_handler(args, prefix, prewarm),
+                cpu_count=args.cpu,
+                memory_mb=args.memory_mb,
+                skip_cache=args.skip_cache,
+            )
+            record["success"] = True
+            record["template_id"] = getattr(info, "template_id", None)
+            # No markers means the pre-warm layer came from the build cache; keep the last known report
+            cached = not prewarm and bool(previous.get("prewarm"))
+            record["prewarm"] = prewarm or previous.get("prewarm") or []
+            print_prewarm(record["prewarm"], prefix, cached=cached)
+            if fingerprint:
+                state[alias] = {
+                    "fingerprint": fingerprint,
+                    "dockerfile": dockerfile,
+                    "template_id": record["template_id"],
+                    "build_id": getattr(info, "build_id", None),
+                    "built_at": datetime.now().isoformat(timespec="seconds"),
+                    "prewarm": record["prewarm"],
+                }
+                save_state(args.state_file, state)
+        except Exception as e:
+            record["error"] = str(e)
+            print(f"{prefix}❌ Build failed: {e}")
+        record["wall_s"] = round(time.monotonic() - t0, 1)
+    return record
+
 
-    print("✅ Template built successfully!")
-    print(f"🏷️  Template Alias: {args.alias}")
-    print(f"📄  Dockerfile: {chosen_df}")
-    print("\nTo list templates:")
-    print("  e2b template list")
-    print("To show a specific template:")
-    print(f"  e2b template show {args.alias}")
-    print("\nUse the resulting template ID with sandbox_deploy.py --template-id <id>")
+def print_summary(records: List[Dict[str, Any]], total_s: float) -> None:
+    columns = ("variant", "alias", "status", "wall_s")
+    rows = [
+        [r["variant"], r["alias"], "skipped" if r["skipped"] else ("ok" if r["success"] else "failed"),
+         f"{r['wall_s']:.1f}"]
+        for r in records
+    ]
+    widths = [max(len(c), *(len(row[i]) for row in rows)) for i, c in enumerate(columns)]
+    print("\n" + "  ".join(c.ljust(w) for c, w in zip(columns, widths)))
+    for row in rows:
+        print("  ".join(v.ljust(w) for v, w in zip(row, widths)))
+    sequential_s = sum(r["wall_s"] for r in records if not r["skipped"])
+    if not sequential_s:
+        print(f"\n⏱️  Total wall time: {total_s:.1f}s (nothing to build)")
+        return
+    speedup = sequential_s / total_s if total_s > 0 else 1.0
+    print(f"\n⏱️  Total wall time: {total_s:.1f}s (sum of builds: {sequential_s:.1f}s, speedup: {speedup:.2f}x)")
+
+
+async def main(args: Optional[argparse.Namespace] = None) -> None:
+    args = args or parse_args()
+    variants: List[str] = args.variant
+
+    semaphore = asyncio.Semaphore(max(1, args.concurrency))
+    state = load_state(args.state_file)
+    packages = server_packages(TEMPLATE_DIR / "servers.json")
+    if packages:
+        print(f"📦 Pre-warming MCP server packages from servers.json at build time: {', '.join(packages)}")
+    concurrent = len(variants) > 1
+    t0 = time.monotonic()
+    records = await asyncio.gather(*(
+        build_variant(variant, args, semaphore, state, prefix=f"[{variant}] " if concurrent else "")
+        for variant in variants
+    ))
+    total_s = time.monotonic() - t0
+
+    for record in records:
+        if not record["success"] or record["skipped"]:
+            continue
+        tag = f" [{record['variant']}]" if concurrent else ""
+        print(f"✅{tag} Template built successfully!")
+        print(f"🏷️  Template Alias: {record['alias']}")
+        if record.get("template_id"):
+            print(f"🆔  Template ID: {record['template_id']}")
+        print(f"📄  Dockerfile: {record['dockerfile']}")
+    if concurrent:
+        print_summary(records, total_s)
+
+    built = [r for r in records if r["success"]]
+    if built:
+        print("\nTo list templates:")
+        print("  e2b template list")
+        print("To show a specific template:")
+        for record in built:
+            print(f"  e2b template show {record['alias']}")
+        print("\nUse the resulting template ID with sandbox_deploy.py --template-id <id>")
+    if len(built) < len(records):
+        raise SystemExit(1)
 
 
 if __name__ == "__main__":
     asyncio.run(main())
-
@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+"""
+Offline fake E2B Sandbox backend
+
+Implements the subset of the E2B Sandbox interface used by E2BSandboxManager
+(create, commands.run, files.write, get_host, kill, connection_config) on local
+subprocesses and a per-sandbox temp dir, with injectable latency. Plug it in via
+``E2BSandboxManager(config, sandbox_factory=FakeBackend().create)``.
+
+Sandbox paths (/home/user, /etc/nginx) are mapped into the temp dir, ``sudo`` and
+``nginx`` are shimmed, and startup.sh is replaced by a stand-in that publishes the
+same readiness markers and process group, so bootstrap, readiness, probing and
+teardown run the real manager code paths end to end.
+"""
+
+import os
+import re
+import base64
+import random
+import shutil
+import signal
+import tempfile
+import threading
+import subprocess
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Dict, Any, List, Union
+
+try:
+    from sandbox_deploy import CommandExitException, NotFoundException, SESSION_FRAME_MARKER  # type: ignore
+except Exception:  # pragma: no cover - allow use without the manager module
+    class CommandExitException(Exception):  # type: ignore
+        pass
+    class NotFoundException(Exception):  # type: ignore
+        pass
+    SESSION_FRAME_MARKER = "__E2B_SESSION_FRAME__"
+
+# Absolute sandbox paths that are relocated under each fake sandbox root
+REMOTE_ROOTS = ("/home/user", "/etc/nginx", "/var/log/nginx")
+# Inline scripts (E2BSandboxManager._inline_script_cmd) are decoded, relocated and re-encoded
+_INLINE_SCRIPT = re.compile(r"echo ([A-Za-z0-9+/=]+) \| base64 -d")
+
+
+@dataclass
+class FakeLatency:
+    """Injected delays in seconds; jitter is a +/- fraction applied to every delay."""
+    create: float = 0.0
+    command: float = 0.0
+    write: float = 0.0
+    kill: float = 0.0
+    pause: float = 0.0
+    resume: float = 0.0
+    # Time the stand-in startup.sh takes to publish mcp_connect
+    startup: float = 0.0
+    jitter: float = 0.0
+
+    def delay(self, base: float) -> float:
+        if base <= 0:
+            return 0.0
+        return max(0.0, base * (1 + random.uniform(-self.jitter, self.jitter)))
+
+    def sleep(self, base: float) -> None:
+        seconds = self.delay(base)
+        if seconds:
+            time.sleep(seconds)
+
+
+class FakeCommandExitException(CommandExitException):
+    """Raised like the SDK's CommandExitException when a command exits non-zero."""
+
+    def __init__(self, stdout: str, stderr: str, exit_code: int):
+        Exception.__init__(self, f"exit code {exit_code}: {stderr.strip()[-200:]}")
+        self.stdout = stdout
+        self.stderr = stderr
+        self.exit_code = exit_code
+
+
+class FakeCommandResult:
+    def __init__(self, stdout: str = "", stderr: str = "", exit_code: int = 0, pid: Optional[int] = None):
+        self.stdout = stdout
+        self.stderr = stderr
+        self.exit_code = exit_code
+        self.pid = pid
+
+
+class FakeConnectionConfig:
+    def __init__(self) -> None:
+        self.sandbox_headers: Dict[str, str] = {}
+
+
+class FakeSandboxMetrics:
+    def __init__(self, mem_used: int):
+        self.mem_used = mem_used
+        self.timestamp = time.time()
+
+
+class FakeCommandHandle:
+    """Background command started with stdin=True (the manager's command session)."""
+
+    def __init__(self, sandbox: "FakeSandbox", proc: subprocess.Popen):
+        self._sandbox = sandbox
+        self._proc = proc
+        self.pid = proc.pid
+
+    def send_stdin(self, data: Union[str, bytes], **kwargs: Any) -> None:
+        sb = self._sandbox
+        sb.latency.sleep(sb.latency.command)
+        if sb.paused:
+            raise RuntimeError(f"Sandbox {sb.sandbox_id} is paused")
+        text = data.decode("utf-8") if isinstance(data, bytes) else data
+        self._proc.stdin.write(sb.localize(text).encode("utf-8"))
+        self._proc.stdin.flush()
+
+    def wait(self, on_stdout: Optional[Any] = None, on_stderr: Optional[Any] = None) -> FakeCommandResult:
+        # Like the sync SDK handle: output reaches callbacks only while wait() runs
+        for raw in iter(self._proc.stdout.readline, b""):
+            if on_stdout:
+                on_stdout(self._delocalize_frame(raw.decode("utf-8", errors="replace")))
+        code = self._proc.wait()
+        if code != 0:
+            raise FakeCommandExitException("", "", code)
+        return FakeCommandResult(exit_code=code, pid=self.pid)
+
+    def _delocalize_frame(self, line: str) -> str:
+        """Session frames carry base64 output; map temp-dir paths back inside the payloads."""
+        parts = line.rstrip("\n").split(" ")
+        if len(parts) != 5 or parts[0] != SESSION_FRAME_MARKER:
+            return self._sandbox.delocalize(line)
+        for i in (3, 4):
+            text = self._sandbox.delocalize(base64.b64decode(parts[i][1:]).decode("utf-8", errors="replace"))
+            parts[i] = ":" + base64.b64encode(text.encode("utf-8")).decode("ascii")
+        return " ".join(parts) + "\n"
+
+    def kill(self) -> bool:
+        self._sandbox.latency.sleep(self._sandbox.latency.command)
+        try:
+            os.killpg(self._proc.pid, signal.SIGKILL)
+        except OSError:
+            return False
+        return True
+
+
+class _FakeCommands:
+    def __init__(self, sandbox: "FakeSandbox"):
+        self._sandbox = sandbox
+
+    def run(
+        self,
+        cmd: str,
+        background: bool = False,
+        envs: Optional[Dict[str, str]] = None,
+        cwd: Optional[str] = None,
+        timeout: Optional[float] = None,
+        **kwargs: Any
+    ) -> Union[FakeCommandResult, FakeCommandHandle]:
+        sb = self._sandbox
+        sb.latency.sleep(sb.latency.command)
+        if sb.paused:
+            raise RuntimeError(f"Sandbox {sb.sandbox_id} is paused")
+        env = {**os.environ, **(envs or {})}
+        env["PATH"] = f"{sb.bin_dir}{os.pathsep}{os.environ.get('PATH', '')}"
+        env["HOME"] = sb.localize("/home/user")
+        local_cwd = sb.localize(cwd) if cwd else env["HOME"]
+        args = ["bash", "-c", sb.localize(cmd)]
+        if background and kwargs.get("stdin"):
+            proc = subprocess.Popen(
+                args, env=env, cwd=local_cwd, stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, start_new_session=True,
+            )
+            sb.background.append(proc)
+            return FakeCommandHandle(sb, proc)
+        if background:
+            proc = subprocess.Popen(
+                args, env=env, cwd=local_cwd, stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True,
+            )
+            sb.background.append(proc)
+            return FakeCommandResult(pid=proc.pid)
+        proc = subprocess.run(
+            args, env=env, cwd=local_cwd, stdin=subprocess.DEVNULL,
+            capture_output=True, text=True, timeout=timeout or None,
+        )
+        stdout = sb.delocalize(proc.stdout)
+        stderr = sb.delocalize(proc.stderr)
+        if proc.returncode != 0:
+            raise FakeCommandExitException(stdout, stderr, proc.returncode)
+        return FakeCommandResult(stdout, stderr, proc.returncode)
+
+
+class _FakeFiles:
+    def __init__(self, sandbox: "FakeSandbox"):
+        self._sandbox = sandbox
+
+    def write(self, path: str, data: Union[str, bytes], **kwargs: Any) -> None:
+        sb = self._sandbox
+        sb.latency.sleep(sb.latency.write)
+        local = sb.localize(path)
+        os.makedirs(os.path.dirname(local), exist_ok=True)
+        mode = "wb" if isinstance(data, (bytes, bytearray)) else "w"
+        with open(local, mode) as fh:
+            fh.write(data)
+
+    def read(self, path: str, format: str = "text", **kwargs: Any) -> Union[str, bytes]:
+        sb = self._sandbox
+        sb.latency.sleep(sb.latency.write)
+        with open(sb.localize(path), "rb") as fh:
+            data = fh.read()
+        return data if format == "bytes" else data.decode("utf-8", errors="replace")
+
+
+class _HealthHandler(BaseHTTPRequestHandler):
+    """Answers /health with 200 once the stand-in startup.sh published mcp_connect."""
+
+    ready_marker = ""
+    sandbox: Optional["FakeSandbox"] = None
+
+    def do_GET(self) -> None:  # noqa: N802 - http.server naming
+        if self.sandbox is not None and self.sandbox.paused:
+            self.send_error(502, "Sandbox is paused")
+            return
+        path = self.path.split("?", 1)[0]
+        ok = path == "/health" and os.path.exists(self.ready_marker)
+        if path != "/health" and self.sandbox is not None:
+            # Gateway activity (mirrors nginx access.log, which skips /health)
+            with open(self.sandbox.localize("/var/log/nginx/access.log"), "a") as fh:
+                fh.write(f"GET {self.path}\n")
+        body = b'{"status":"ok"}' if ok else b'{"status":"starting"}'
+        self.send_response(200 if ok else 503)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+class FakeSandbox:
+    """One fake sandbox: a temp dir root, shim binaries and a local /health server."""
+
+    def __init__(self, backend: "FakeBackend", template: Optional[str], metadata: Optional[Dict[str, Any]]):
+        self._backend = backend
+        self.latency = backend.latency
+        self.template = template
+        self.metadata = metadata or {}
+        self.sandbox_id = f"fake-{backend.next_id()}"
+        self.root = tempfile.mkdtemp(prefix=f"{self.sandbox_id}-", dir=backend.base_dir)
+        self.bin_dir = os.path.join(self.root, ".bin")
+        self.background: List[subprocess.Popen] = []
+        self.connection_config = FakeConnectionConfig()
+        self.commands = _FakeCommands(self)
+        self.files = _FakeFiles(self)
+        self._keep_dirs = backend.keep_dirs
+        self.paused = False
+        for remote in ("/home/user/mcp-connect", "/etc/nginx/sites-available", "/var/log/nginx"):
+            os.makedirs(self.localize(remote), exist_ok=True)
+        self._install_shims()
+
+        handler = type("_Handler", (_HealthHandler,), {
+            "ready_marker": self.localize("/home/user/.ready/mcp_connect"),
+            "sandbox": self,
+        })
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,), name=f"{self.sandbox_id}-health", daemon=True)
+        self._thread.start()
+
+    def localize(self, text: str) -> str:
+        """Map sandbox paths into this sandbox's root (inline scripts included)."""
+        # Login shells re-source /etc/profile, which would drop the shim directory from PATH
+        text = text.replace("bash -lc", "bash -c")
+        text = _INLINE_SCRIPT.sub(
+            lambda m: "echo "
+            + base64.b64encode(self.localize(base64.b64decode(m.group(1)).decode("utf-8")).encode("utf-8")).decode("ascii")
+            + " | base64 -d",
+            text,
+        )
+        for remote in REMOTE_ROOTS:
+            text = text.replace(remote, f"{self.root}{remote}")
+        return text
+
+    def delocalize(self, text: str) -> str:
+        return (text or "").replace(self.root, "")
+
+    def _install_shims(self) -> None:
+        os.makedirs(self.bin_dir, exist_ok=True)
+        startup_delay = self.latency.delay(self.latency.startup)
+        home = self.localize("/home/user")
+        real_nohup = shutil.which("nohup") or "/usr/bin/nohup"
+        shims = {
+            # No privilege boundary in the fake: drop sudo's own flags and run the command
+            "sudo": '#!/bin/sh\nwhile [ "${1#-}" != "$1" ]; do shift; done\nexec "$@"\n',
+            "nginx": "#!/bin/sh\nexit 0\n",
+            # startup.sh is always launched through nohup; swap in the stand-in
+            "nohup": (
+                "#!/bin/sh\n"
+                f'case "$1" in {home}/startup.sh) shift; exec {self.bin_dir}/fake-startup.sh "$@";; esac\n'
+                f'exec {real_nohup} "$@"\n'
+            ),
+            "fake-startup.sh": f"""#!/bin/bash
+# Stand-in for startup.sh: same readiness markers and process group, no real services
+READY={home}/.ready
+mkdir -p "$READY"; rm -f "$READY"/*
+ps -o pgid= -p $$ | tr -d ' ' > {home}/services.pgid
+START=$(date +%s%3N)
+mark() {{
+  local now; now=$(date +%s%3N)
+  echo "{{\\"phase\\":\\"$1\\",\\"ts_ms\\":$now,\\"elapsed_ms\\":$((now-START))}}" >> "$READY/phases.jsonl"
+  touch "$READY/$1"
+}}
+sleep {startup_delay * 0.25:.3f}; mark xvfb; mark chrome_cdp
+sleep {startup_delay * 0.75:.3f}; mark mcp_connect; mark mcp_servers
+# Stands in for the long-running services until the group is signalled
+exec sleep 86400
+""",
+        }
+        for name, content in shims.items():
+            path = os.path.join(self.bin_dir, name)
+            with open(path, "w") as fh:
+                fh.write(content)
+            os.chmod(path, 0o755)
+
+    def get_host(self, port: int) -> str:
+        return f"127.0.0.1:{self._server.server_address[1]}"
+
+    def _services_pgid(self) -> Optional[int]:
+        try:
+            with open(self.localize("/home/user/services.pgid")) as fh:
+                return int(fh.read().strip())
+        except (OSError, ValueError):
+            return None
+
+    def pause(self) -> bool:
+        """Freeze the services (SIGSTOP to the startup.sh process group) like a memory snapshot."""
+        self.latency.sleep(self.latency.pause)
+        pgid = self._services_pgid()
+        if pgid is not None:
+            try:
+                os.killpg(pgid, signal.SIGSTOP)
+            except OSError:
+                pass
+        self.paused = True
+        return True
+
+    def connect(self, timeout: Optional[int] = None, **kwargs: Any) -> "FakeSandbox":
+        """Resume a paused sandbox (mirrors the SDK's instance-level connect)."""
+        if self.paused:
+            self.latency.sleep(self.latency.resume)
+            pgid = self._services_pgid()
+            if pgid is not None:
+                try:
+                    os.killpg(pgid, signal.SIGCONT)
+                except OSError:
+                    pass
+            self.paused = False
+        return self
+
+    def get_metrics(self, **kwargs: Any) -> List[FakeSandboxMetrics]:
+        """Resident memory of the services process group (what a pause would release)."""
+        pgid = self._services_pgid()
+        rss_kb = 0
+        if pgid is not None:
+            out = subprocess.run(["ps", "-e", "-o", "pgid=,rss="], capture_output=True, text=True).stdout
+            for line in out.splitlines():
+                parts = line.split()
+                if len(parts) == 2 and parts[0] == str(pgid):
+                    rss_kb += int(parts[1])
+        return [FakeSandboxMetrics(rss_kb * 1024)]
+
+    def kill(self) -> None:
+        self.latency.sleep(self.latency.kill)
+        self._backend.sandboxes.pop(self.sandbox_id, None)
+        self._server.shutdown()
+        self._server.server_close()
+        pgid = self._services_pgid()
+        if pgid is not None:
+            try:
+                os.killpg(pgid, signal.SIGKILL)
+            except OSError:
+                pass
+        for proc in self.background:
+            try:
+                os.killpg(proc.pid, signal.SIGKILL)
+            except OSError:
+                pass
+        if not self._keep_dirs:
+            shutil.rmtree(self.root, ignore_errors=True)
+
+
+class FakeBackend:
+    """Factory for fake sandboxes sharing one latency profile; pass ``backend.create`` as sandbox_factory."""
+
+    def __init__(self, latency: Optional[FakeLatency] = None, base_dir: Optional[str] = None, keep_dirs: bool = False):
+        self.latency = latency or FakeLatency()
+        self.base_dir = base_dir
+        self.keep_dirs = keep_dirs
+        self._lock = threading.Lock()
+        self._counter = 0
+        # Live sandboxes by id, so connect() can hand them to another manager (registry restore)
+        self.sandboxes: Dict[str, FakeSandbox] = {}
+
+    def next_id(self) -> int:
+        with self._lock:
+            self._counter += 1
+            return self._counter
+
+    def create(
+        self,
+        template: Optional[str] = None,
+        timeout: Optional[int] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        secure: bool = True,
+        allow_internet_access: bool = True,
+        **kwargs: Any
+    ) -> FakeSandbox:
+        self.latency.sleep(self.latency.create)
+        sandbox = FakeSandbox(self, template, metadata)
+        self.sandboxes[sandbox.sandbox_id] = sandbox
+        return sandbox
+
+    def connect(self, sandbox_id: str) -> FakeSandbox:
+        """Mirror ``Sandbox.connect``; pass ``backend.connect`` as sandbox_connector."""
+        self.latency.sleep(self.latency.command)
+        sandbox = self.sandboxes.get(sandbox_id)
+        if sandbox is None:
+            raise NotFoundException(f"Sandbox {sandbox_id} not found")
+        return sandbox.connect()
+
@@ -0,0 +1,432 @@
+#!/usr/bin/env python3
+"""
+Long-running E2B sandbox manager daemon
+
+Hosts one E2BSandboxManager (and optionally a warm SandboxPool) in a single
+process and exposes it over a small local HTTP/1.1 JSON API, so the SDK import,
+health prober, pooled HTTP clients and warm sandboxes are reused across requests
+instead of being rebuilt by every CLI invocation.
+
+Endpoints:
+    GET    /health                  daemon liveness
+    GET    /sandboxes               list active sandboxes (with prober health)
+    POST   /sandboxes               create (or lease from the pool) a sandbox
+    GET    /sandboxes/{id}          one sandbox plus its health record
+    DELETE /sandboxes/{id}          stop (or return to the pool) a sandbox
+    POST   /sandboxes/{id}/hibernate pause a sandbox (memory snapshot included)
+    POST   /sandboxes/{id}/resume   resume a hibernated sandbox (no-op when running)
+    GET    /sandboxes/{id}/stats    per-service CPU/RSS/fd usage inside the sandbox (?samples=1 for raw samples)
+    GET    /stats                   daemon, lifecycle timing, health and pool statistics
+    GET    /stats/fleet             per-service resource usage aggregated over running sandboxes
+"""
+
+import os
+import sys
+import hmac
+import json
+import time
+import signal
+import asyncio
+import argparse
+import logging
+from collections import deque
+from typing import Optional, Dict, Any, Deque, Set, Tuple
+from urllib.parse import urlsplit, parse_qs
+
+from sandbox_deploy import ERROR_NOT_FOUND, E2BSandboxManager, SandboxConfig, SandboxPool, percentile
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8787
+MAX_BODY_BYTES = 1024 * 1024
+HTTP_REASONS = {
+    200: "OK", 201: "Created", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found",
+    405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error", 501: "Not Implemented",
+    503: "Service Unavailable",
+}
+# Options a pooled sandbox is created with; create requests asking for anything else bypass the pool
+POOL_CREATE_OPTIONS = {"sandbox_id": None, "enable_internet": True, "wait_for_ready": True}
+
+
+class DaemonHTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _flag(query: Dict[str, str], name: str, default: Optional[bool] = None) -> Optional[bool]:
+    value = query.get(name)
+    if value is None:
+        return default
+    return value.lower() in ("1", "true", "yes", "on")
+
+
+class ManagerDaemon:
+    """Local HTTP control API around a single long-lived E2BSandboxManager."""
+
+    def __init__(
+        self,
+        manager: E2BSandboxManager,
+        pool: Optional[SandboxPool] = None,
+        host: str = "127.0.0.1",
+        port: int = DEFAULT_PORT,
+        token: Optional[str] = None,
+        stop_on_exit: bool = True,
+        stats_window: int = 1000,
+    ):
+        """
+        Initialize the daemon
+
+        Args:
+            manager: Manager shared by every request
+            pool: Optional warm pool; creates lease from it and deletes release to it
+            host: Bind address (keep it on loopback unless a token is set)
+            port: Bind port
+            token: Optional bearer token required on every request except /health
+            stop_on_exit: Stop every sandbox when the daemon shuts down
+            stats_window: Lifecycle timing records kept for the /stats percentiles
+        """
+        self.manager = manager
+        self.pool = pool
+        self.host = host
+        self.port = port
+        self.token = token
+        self.stop_on_exit = stop_on_exit
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: Set[asyncio.StreamWriter] = set()
+        self._started = time.monotonic()
+        self.requests_served = 0
+        self._timings: Dict[str, Deque[float]] = {
+            event: deque(maxlen=stats_window) for event in ("create", "stop", "hibernate", "resume")
+        }
+        self._failures: Dict[str, int] = {event: 0 for event in self._timings}
+        # Chain onto any timing sink the manager already has
+        self._upstream_on_timing = manager.on_timing
+        manager.on_timing = self._on_timing
+
+    def _on_timing(self, record: Dict[str, Any]) -> None:
+        event = record.get("event")
+        if event in self._timings:
+            if record.get("success"):
+                self._timings[event].append(record["timings_ms"]["total"])
+            else:
+                self._failures[event] += 1
+        if self._upstream_on_timing is not None:
+            self._upstream_on_timing(record)
+
+    # ---------------- lifecycle ----------------
+    async def start(self) -> None:
+        if self.manager.registry is not None:
+            restored = await self.manager.restore_sandboxes()
+            logger.info(
+                "Restored %d sandboxes from the registry (%d lost, %d unreachable and kept)",
+                len(restored["restored"]), len(restored["lost"]), len(restored["failed"]),
+            )
+        if self.pool is not None:
+            await self.pool.start(wait=False)
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        sockets = self._server.sockets or []
+        if sockets:
+            self.port = sockets[0].getsockname()[1]
+        logger.info("Sandbox daemon listening on http://%s:%d (template=%s)", self.host, self.port, self.manager.config.template_id)
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            # Idle keep-alive connections would otherwise hold their handlers open
+            for writer in list(self._connections):
+                writer.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self.pool is not None:
+            await self.pool.close(stop_leased=self.stop_on_exit)
+        if self.stop_on_exit and self.manager.active_sandboxes:
+            await self.manager.stop_all_sandboxes()
+        await self.manager.shutdown()
+
+    # ---------------- HTTP plumbing ----------------
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._connections.add(writer)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").strip().split(" ", 2)
+                except ValueError:
+                    await self._respond(writer, 400, {"success": False, "error": "Malformed request line"}, False)
+                    break
+                headers: Dict[str, str] = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                keep_alive = version.upper() == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                # Bodies are only read by Content-Length; a chunked body would be left on the wire
+                if "transfer-encoding" in headers:
+                    await self._respond(writer, 501, {"success": False, "error": "Transfer-Encoding is not supported"}, False)
+                    break
+                # Only plain non-negative integers (no sign, no whitespace) are valid lengths
+                raw_length = headers.get("content-length") or "0"
+                try:
+                    if not raw_length.isdigit():
+                        raise ValueError(raw_length)
+                    length = int(raw_length)
+                except ValueError:
+                    await self._respond(writer, 400, {"success": False, "error": "Invalid Content-Length"}, False)
+                    break
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, 413, {"success": False, "error": "Request body too large"}, False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                try:
+                    status, payload = await self._dispatch(method.upper(), target, headers, body)
+                except DaemonHTTPError as e:
+                    status, payload = e.status, {"success": False, "error": str(e)}
+                except Exception as e:
+                    logger.exception("Unhandled daemon error for %s %s", method, target)
+                    status, payload = 500, {"success": False, "error": str(e)}
+                self.requests_served += 1
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._connections.discard(writer)
+            try:
+                writer.close()
+                await writer.wait_closed()
+            except Exception:
+                pass
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: int, payload: Dict[str, Any], keep_alive: bool) -> None:
+        body = json.dumps(payload, default=str).encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status} {HTTP_REASONS.get(status, 'OK')}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    async def _dispatch(self, method: str, target: str, headers: Dict[str, str], body: bytes) -> Tuple[int, Dict[str, Any]]:
+        parts = urlsplit(target)
+        path = parts.path.rstrip("/") or "/"
+        query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+
+        if path == "/health":
+            return 200, {"status": "ok", "uptime_s": round(time.monotonic() - self._started, 1)}
+        if self.token and not hmac.compare_digest(
+            headers.get("authorization", "").encode("utf-8"), f"Bearer {self.token}".encode("utf-8")
+        ):
+            raise DaemonHTTPError(401, "Missing or invalid bearer token")
+
+        if path == "/sandboxes":
+            if method == "GET":
+                return 200, await self.list_sandboxes()
+            if method == "POST":
+                result = await self.create(self._json_body(body))
+                return (201 if result.get("success") else 500), result
+            raise DaemonHTTPError(405, f"{method} not allowed on {path}")
+        if path.startswith("/sandboxes/"):
+            sandbox_id, _, action = path[len("/sandboxes/"):].partition("/")
+            if action == "stats":
+                if method != "GET":
+                    raise DaemonHTTPError(405, f"{method} not allowed on {path}")
+                result = await self.manager.get_stats(sandbox_id, include_samples=bool(_flag(query, "samples", False)))
+                return (200 if result.get("success") else 404 if result.get("error_code") == ERROR_NOT_FOUND else 503), result
+            if action:
+                if method != "POST" or action not in ("hibernate", "resume"):
+                    raise DaemonHTTPError(404 if action not in ("hibernate", "resume") else 405, f"No route for {method} {path}")
+                if action == "hibernate":
+                    result = await self.manager.hibernate_sandbox(sandbox_id)
+                else:
+                    result = await self.manager.ensure_running(sandbox_id)
+                return (200 if result.get("success") else 404 if result.get("error_code") == ERROR_NOT_FOUND else 500), result
+            if method == "GET":
+                return self.describe(sandbox_id)
+            if method == "DELETE":
+                result = await self.stop(sandbox_id, fast_kill=_flag(query, "fast_kill"), recycle=bool(_flag(query, "recycle", False)))
+                return (200 if result.get("success") else 404 if result.get("error_code") == ERROR_NOT_FOUND else 500), result
+            raise DaemonHTTPError(405, f"{method} not allowed on {path}")
+        if path == "/stats":
+            if method != "GET":
+                raise DaemonHTTPError(405, f"{method} not allowed on {path}")
+            return 200, self.stats()
+        if path == "/stats/fleet":
+            if method != "GET":
+                raise DaemonHTTPError(405, f"{method} not allowed on {path}")
+            return 200, await self.manager.get_fleet_stats()
+        raise DaemonHTTPError(404, f"No route for {path}")
+
+    @staticmethod
+    def _json_body(body: bytes) -> Dict[str, Any]:
+        if not body.strip():
+            return {}
+        try:
+            data = json.loads(body)
+        except ValueError as e:
+            raise DaemonHTTPError(400, f"Invalid JSON body: {e}")
+        if not isinstance(data, dict):
+            raise DaemonHTTPError(400, "JSON body must be an object")
+        return data
+
+    # ---------------- operations ----------------
+    async def create(self, options: Dict[str, Any]) -> Dict[str, Any]:
+        """Lease from the pool when one is configured and the options match its sandboxes, otherwise create directly."""
+        if self.pool is not None and all(options.get(k, v) == v for k, v in POOL_CREATE_OPTIONS.items()):
+            return await self.pool.acquire()
+        return await self.manager.create_sandbox(
+            sandbox_id=options.get("sandbox_id"),
+            enable_internet=bool(options.get("enable_internet", True)),
+            wait_for_ready=bool(options.get("wait_for_ready", True)),
+        )
+
+    async def stop(self, sandbox_id: str, fast_kill: Optional[bool] = None, recycle: bool = False) -> Dict[str, Any]:
+        """Return pooled sandboxes to the pool; stop everything else."""
+        if self.pool is not None and self.pool.is_leased(sandbox_id):
+            return await self.pool.release(sandbox_id, recycle=recycle)
+        return await self.manager.stop_sandbox(sandbox_id, fast_kill=fast_kill)
+
+    async def list_sandboxes(self) -> Dict[str, Any]:
+        listing = await self.manager.list_sandboxes()
+        idle = set(self.pool.idle_ids()) if self.pool is not None else set()
+        for info in listing["sandboxes"]:
+            info["health"] = self.manager.prober.get(info["sandbox_id"])
+            if info["sandbox_id"] in idle:
+                info["status"] = "pooled"
+        return listing
+
+    def describe(self, sandbox_id: str) -> Tuple[int, Dict[str, Any]]:
+        entry = self.manager.active_sandboxes.get(sandbox_id)
+        if entry is None:
+            return 404, {"success": False, "error": f"Sandbox {sandbox_id} not found", "error_code": ERROR_NOT_FOUND}
+        sandbox = entry["sandbox"]
+        return 200, {
+            "success": True,
+            "sandbox_id": sandbox_id,
+            "e2b_sandbox_id": entry.get("e2b_sandbox_id") or (sandbox.sandbox_id if sandbox is not None else None),
+            "public_url": entry.get("public_url") or (self.manager._get_public_url(sandbox) if sandbox is not None else None),
+            "state": entry.get("state", "running"),
+            "health": self.manager.prober.get(sandbox_id),
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        health = self.manager.prober.snapshot()
+        paused = [e for e in self.manager.active_sandboxes.values() if e.get("state") == "paused"]
+        lifecycle = {}
+        for event, values in self._timings.items():
+            lifecycle[event] = {
+                "count": len(values),
+                "failures": self._failures[event],
+                "p50_ms": percentile(values, 50),
+                "p99_ms": percentile(values, 99),
+            }
+        return {
+            "success": True,
+            "template_id": self.manager.config.template_id,
+            "uptime_s": round(time.monotonic() - self._started, 1),
+            "requests_served": self.requests_served,
+            "active_sandboxes": len(self.manager.active_sandboxes),
+            "healthy_sandboxes": sum(1 for h in health.values() if h.get("healthy")),
+            "paused_sandboxes": len(paused),
+            "paused_memory_bytes": sum(e.get("mem_used_bytes") or 0 for e in paused),
+            "lifecycle_ms": lifecycle,
+            "pool": self.pool.stats() if self.pool is not None else None,
+            "registry": self.manager.registry.path if self.manager.registry is not None else None,
+        }
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run a long-lived E2B sandbox manager with a local HTTP control API")
+    parser.add_argument("--template-id", required=False, help="Template ID or alias to use (or set E2B_TEMPLATE_ID)")
+    parser.add_argument("--host", default="127.0.0.1", help="Bind address (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=int(os.getenv("E2B_DAEMON_PORT", DEFAULT_PORT)), help=f"Bind port (default: {DEFAULT_PORT}, env: E2B_DAEMON_PORT)")
+    parser.add_argument("--token", default=os.getenv("E2B_DAEMON_TOKEN"), help="Bearer token required by the API (env: E2B_DAEMON_TOKEN)")
+    parser.add_argument("--timeout", type=int, default=3600, help="Sandbox timeout seconds (default 3600)")
+    parser.add_argument("--headless", action="store_true", help="Launch sandboxes in lightweight headless mode")
+    parser.add_argument("--auth-token", dest="auth_token", default=None, help="Bearer token for the bridge API inside each sandbox (maps to AUTH_TOKEN)")
+    parser.add_argument("--pool-min", type=int, default=0, help="Keep this many warm sandboxes ready; 0 disables the pool (default: 0)")
+    parser.add_argument("--pool-max", type=int, default=0, help="Cap on pooled sandboxes (idle + leased), 0 for no cap (default: 0)")
+    parser.add_argument("--timings-log", default=os.getenv("E2B_TIMINGS_LOG", ""), help="Append create/stop phase timings as JSON lines to this file")
+    parser.add_argument("--hibernate-after", type=int, default=0, help="Pause sandboxes after this many seconds without gateway traffic; 0 disables (default: 0)")
+    parser.add_argument("--keep-sandboxes", action="store_true", help="Do not stop sandboxes when the daemon exits")
+    parser.add_argument(
+        "--state-dir",
+        default=os.getenv("E2B_STATE_DIR", os.path.join("~", ".e2b-mcp-sandbox")),
+        help="Directory for the persistent sandbox registry; sandboxes recorded there are reconnected on startup "
+             "(default: ~/.e2b-mcp-sandbox, env: E2B_STATE_DIR, empty to disable)",
+    )
+    return parser.parse_args(argv)
+
+
+async def main(argv=None) -> None:
+    args = parse_args(argv)
+    template_id = (args.template_id or os.getenv("E2B_TEMPLATE_ID", "")).strip()
+    if not template_id:
+        print("❌ Error: Missing template ID. Provide --template-id or set E2B_TEMPLATE_ID.")
+        sys.exit(2)
+    config = SandboxConfig(
+        template_id=template_id,
+        timeout=args.timeout,
+        headless=bool(args.headless),
+        pool_min_size=max(0, args.pool_min),
+        pool_max_size=max(0, args.pool_max),
+    )
+    auth_token = args.auth_token or os.getenv("E2B_MCP_AUTH_TOKEN") or os.getenv("AUTH_TOKEN")
+    if auth_token:
+        config.auth_token = auth_token
+    if args.timings_log:
+        config.timings_log = args.timings_log
+    if args.state_dir:
+        config.state_dir = args.state_dir
+    if args.hibernate_after > 0:
+        config.hibernate_idle_seconds = args.hibernate_after
+
+    manager = E2BSandboxManager(config)
+    pool = SandboxPool(manager) if args.pool_min > 0 else None
+    daemon = ManagerDaemon(
+        manager, pool=pool, host=args.host, port=args.port, token=args.token,
+        stop_on_exit=not args.keep_sandboxes,
+    )
+    if args.host not in ("127.0.0.1", "localhost", "::1") and not args.token:
+        logger.warning("Daemon bound to %s without --token; anyone who can reach it can create sandboxes", args.host)
+
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except (NotImplementedError, RuntimeError):
+            pass
+    await daemon.start()
+    print(f"🛰️  Sandbox daemon listening on http://{args.host}:{daemon.port}")
+    try:
+        await stop_event.wait()
+    finally:
+        print("\n🛑 Shutting down sandbox daemon...")
+        await daemon.close()
+
+
+if __name__ == "__main__":
+    if not os.getenv('E2B_API_KEY'):
+        print("❌ Error: E2B_API_KEY environment variable not set")
+        sys.exit(1)
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -4,12 +4,29 @@ E2B Sandbox Manager for MCP-enabled Web Sandbox
 Creates and manages e2b sandboxes with pre-configured MCP servers
 """
 
+import io
 import os
+import json
+import base64
+import hashlib
 import sys
+import math
+import time
+import uuid
+import heapq
+import shlex
+import random
+import sqlite3
 import asyncio
+import tarfile
 import argparse
-from typing import Optional, Dict, Any, Tuple, Callable, Type, Union
-from dataclasses import dataclass
+import threading
+import functools
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from typing import Optional, Dict, Any, Deque, List, Set, Tuple, Callable, Type, Union
+from dataclasses import dataclass, field
 from urllib.parse import quote as _url_quote
 #############################
 # Sandbox client import logic
@@ -43,22 +60,28 @@ if _sandbox_create_fn is None:
     try:  # Legacy: e2b_code_interpreter Sandbox (sync create)
         from e2b_code_interpreter import Sandbox as _LegacySandbox  # type: ignore
         if hasattr(_LegacySandbox, "create"):
-            # Legacy create is synchronous; we will offload with to_thread
+            # Legacy create is synchronous; we will offload to the manager's thread pool
             _sandbox_create_fn = _LegacySandbox.create  # type: ignore
             SandboxType = _LegacySandbox  # type: ignore
             _sandbox_kind = "legacy"
     except Exception:  # pragma: no cover
         _sandbox_create_fn = None
 
-if _sandbox_create_fn is None:  # Final guard: give a clear error early
-    raise RuntimeError(
-        "Unable to import E2B Sandbox client. Install or upgrade 'e2b' (preferred) or 'e2b-code-interpreter'."
-    )
+# Final guard lives in E2BSandboxManager.__init__ so an injected sandbox_factory (e.g. the offline
+# fake backend in fake_sandbox.py) works without the SDK installed
+_SANDBOX_IMPORT_ERROR = (
+    "Unable to import E2B Sandbox client. Install or upgrade 'e2b' (preferred) or 'e2b-code-interpreter'."
+)
 try:
     from e2b.sandbox.commands.command_handle import CommandExitException  # type: ignore
 except Exception:  # pragma: no cover
     class CommandExitException(Exception):
         pass
+try:
+    from e2b.exceptions import NotFoundException  # type: ignore
+except Exception:  # pragma: no cover
+    class NotFoundException(Exception):
+        pass
 import logging
 from datetime import datetime
 from importlib import resources as importlib_resources
@@ -70,6 +93,119 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Files pushed into the sandbox by _bootstrap_services (resolved next to this file, then packaged),
+# mapped to their install location inside the sandbox
+BOOTSTRAP_ASSETS = {
+    "startup.sh": "/home/user/startup.sh",
+    "chrome-devtools-wrapper.sh": "/home/user/chrome-devtools-wrapper.sh",
+    "servers.json": "/home/user/mcp-connect/mcp-servers.json",
+    "nginx.conf": "/etc/nginx/sites-available/default",
+    "supervisor.py": "/home/user/supervisor.py",
+}
+# Bundled bootstrap: single archive upload + single install-and-launch command
+BUNDLE_ARCHIVE = "/home/user/.mcp-bootstrap.tar.gz"
+BUNDLE_DIR = "/home/user/.mcp-bootstrap"
+# Readiness markers published by startup.sh (one file per phase plus phases.jsonl / failed)
+READY_DIR = "/home/user/.ready"
+READY_PHASES = ("xvfb", "chrome_cdp", "mcp_connect", "mcp_servers")
+# Per-service CPU/RSS/fd ring buffer written by supervisor.py's resource sampler
+STATS_FILE = f"{READY_DIR}/stats.json"
+# startup.sh runs under setsid and records its process group here so every service stops with one signal
+SERVICES_PGID_FILE = "/home/user/services.pgid"
+# Result frame emitted by the command session shell: "<marker> <id> <exit code> :<b64 stdout> :<b64 stderr>"
+SESSION_FRAME_MARKER = "__E2B_SESSION_FRAME__"
+# Defines the runner the session shell executes per command: the script arrives base64-encoded on
+# the command's stdin, runs in a subshell (state does not leak between commands) with its output
+# captured to temp files, and one result frame line is written to the session's stdout
+_SESSION_PREAMBLE = (
+    "__e2b_exec() { "
+    "local id=\"$1\" script out err rc; script=$(cat); "
+    "out=$(mktemp); err=$(mktemp); "
+    "( eval \"$script\" ) </dev/null >\"$out\" 2>\"$err\"; rc=$?; "
+    f"printf '%s %s %s :%s :%s\\n' {SESSION_FRAME_MARKER} \"$id\" \"$rc\" "
+    "\"$(base64 -w0 <\"$out\")\" \"$(base64 -w0 <\"$err\")\"; "
+    "rm -f \"$out\" \"$err\"; }\n"
+)
+# error_code on results for an unknown sandbox id, so callers need not match the error text
+ERROR_NOT_FOUND = "not_found"
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile rounded to 0.1; None for an empty sample."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return round(ordered[index], 1)
+
+
+def _not_found(sandbox_id: str) -> Dict[str, Any]:
+    return {"success": False, "error": f"Sandbox {sandbox_id} not found", "error_code": ERROR_NOT_FOUND}
+
+
+def _summarize_stats(samples: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Reduce sampler records to per-service latest/avg/max values plus fd/process growth."""
+    series: Dict[str, List[Dict[str, Any]]] = {}
+    for sample in samples:
+        for name, values in (sample.get("services") or {}).items():
+            series.setdefault(name, []).append(values)
+    summary: Dict[str, Dict[str, Any]] = {}
+    for name, points in series.items():
+        cpu = [p["cpu_pct"] for p in points if p.get("cpu_pct") is not None]
+        rss = [p["rss_bytes"] for p in points if p.get("rss_bytes") is not None]
+        fds = [p["fds"] for p in points if p.get("fds") is not None]
+        procs = [p["procs"] for p in points if p.get("procs") is not None]
+        summary[name] = {
+            "samples": len(points),
+            "cpu_pct": cpu[-1] if cpu else None,
+            "cpu_pct_avg": round(sum(cpu) / len(cpu), 1) if cpu else None,
+            "cpu_pct_max": max(cpu) if cpu else None,
+            "rss_bytes": rss[-1] if rss else None,
+            "rss_bytes_max": max(rss) if rss else None,
+            "fds": fds[-1] if fds else None,
+            "fds_max": max(fds) if fds else None,
+            "procs": procs[-1] if procs else None,
+            "procs_max": max(procs) if procs else None,
+            # Steady growth over the window points at leaks (e.g. Chrome renderers that never exit)
+            "fds_growth": fds[-1] - fds[0] if fds else None,
+            "procs_growth": procs[-1] - procs[0] if procs else None,
+        }
+    return summary
+
+
+class _PhaseTimer:
+    """Collect monotonic per-phase durations in milliseconds."""
+
+    def __init__(self) -> None:
+        self._started = time.monotonic()
+        self.timings: Dict[str, float] = {}
+        self._open: Dict[str, float] = {}
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        t0 = time.monotonic()
+        try:
+            yield
+        finally:
+            self.timings[name] = round((time.monotonic() - t0) * 1000, 1)
+
+    def start(self, name: str) -> None:
+        """Open a phase that spans code a context manager cannot wrap cleanly."""
+        self._open[name] = time.monotonic()
+
+    def stop(self, name: str) -> None:
+        t0 = self._open.pop(name, None)
+        if t0 is not None:
+            self.timings[name] = round((time.monotonic() - t0) * 1000, 1)
+
+    def stop_all(self) -> None:
+        """Close phases left open by an exception so failures still report partial timings."""
+        for name in list(self._open):
+            self.stop(name)
+
+    def snapshot(self) -> Dict[str, float]:
+        return {**self.timings, "total": round((time.monotonic() - self._started) * 1000, 1)}
+
 @dataclass
 class SandboxConfig:
     """Configuration for E2B Sandbox
@@ -106,17 +242,614 @@ class SandboxConfig:
     remote_base: str = (
         "https://raw.githubusercontent.com/EvalsOne/MCP-bridge/main/deploy/e2b"
     )
+    # Warm pool sizing (used by SandboxPool): keep pool_min_size idle sandboxes ready,
+    # never exceed pool_max_size sandboxes in total (idle + leased). 0 disables the cap.
+    pool_min_size: int = 1
+    pool_max_size: int = 0
+    # Seconds acquire() waits for a sandbox when the pool is at pool_max_size
+    pool_acquire_timeout: float = 60.0
+    # Bootstrap with one archive upload + one install command; falls back to per-step calls on failure
+    bundle_bootstrap: bool = True
+    # Compare sha256 of bootstrap assets with the sandbox copies and only transfer the ones that differ
+    asset_sync: bool = True
+    # Fleet operations (create_many / stop_all_sandboxes): max sandboxes handled concurrently
+    fleet_concurrency: int = 8
+    # Size of the dedicated thread pool used for blocking (sync/legacy) SDK calls
+    sync_worker_threads: int = 32
+    # Readiness: block inside the sandbox on startup.sh's phase markers (one call) before the public probe.
+    # ready_phase is the phase create_sandbox waits for: mcp_connect (default) or mcp_servers (warm caches).
+    ready_signal: bool = True
+    ready_phase: str = "mcp_connect"
+    ready_timeout: int = 90
+    # Teardown: seconds services get to exit after SIGTERM before SIGKILL; fast kill skips the
+    # in-sandbox stop entirely and only destroys the sandbox
+    stop_graceful_timeout: float = 5.0
+    stop_fast_kill: bool = False
+    # Lifecycle timings: append one JSON line per create/stop event to this file (None to disable)
+    timings_log: Optional[str] = None
+    # Persistent registry: record live sandboxes in <state_dir>/sandboxes.db so a restarted
+    # manager can reconnect instead of recreating (None keeps state in memory only)
+    state_dir: Optional[str] = None
+    # Hibernation: pause a sandbox (memory snapshot included) after this many seconds without
+    # gateway traffic (nginx access.log; health probes are not logged). 0 disables.
+    hibernate_idle_seconds: int = 0
+    hibernate_check_interval: int = 60
+    # Run maintenance commands (keepalive, readiness wait, asset hashes, idle check, stop) through one
+    # long-lived shell per sandbox instead of a fresh login shell per call (see CommandSession)
+    command_session: bool = True
+
+@dataclass
+class SandboxHealth:
+    """Rolling health record for one sandbox, maintained by HealthProber."""
+    sandbox_id: str
+    healthy: Optional[bool] = None
+    last_latency_ms: Optional[float] = None
+    last_checked: Optional[str] = None
+    consecutive_failures: int = 0
+    total_probes: int = 0
+    total_failures: int = 0
+    last_platform_ping: Optional[str] = None
+    history: Deque[Tuple[float, bool, Optional[float]]] = field(default_factory=deque)
+
+    def record(self, ok: bool, latency_ms: Optional[float], history_size: int) -> None:
+        self.healthy = ok
+        self.last_latency_ms = latency_ms
+        self.last_checked = datetime.now().isoformat()
+        self.total_probes += 1
+        if ok:
+            self.consecutive_failures = 0
+        else:
+            self.consecutive_failures += 1
+            self.total_failures += 1
+        self.history.append((time.time(), ok, latency_ms))
+        while len(self.history) > history_size:
+            self.history.popleft()
+
+    def to_dict(self) -> Dict[str, Any]:
+        latencies = sorted(l for _, ok, l in self.history if ok and l is not None)
+        return {
+            "sandbox_id": self.sandbox_id,
+            "healthy": self.healthy,
+            "last_latency_ms": self.last_latency_ms,
+            "last_checked": self.last_checked,
+            "consecutive_failures": self.consecutive_failures,
+            "total_probes": self.total_probes,
+            "total_failures": self.total_failures,
+            "last_platform_ping": self.last_platform_ping,
+            "p50_latency_ms": latencies[len(latencies) // 2] if latencies else None,
+            "history": [
+                {"ts": ts, "ok": ok, "latency_ms": latency} for ts, ok, latency in self.history
+            ],
+        }
+
+
+class SandboxRegistry:
+    """Durable SQLite record of live sandboxes (ids, URL, envs, last health) under a state dir."""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS sandboxes (
+        sandbox_id TEXT PRIMARY KEY,
+        e2b_sandbox_id TEXT NOT NULL,
+        template_id TEXT,
+        public_url TEXT,
+        envs TEXT,
+        health TEXT,
+        state TEXT DEFAULT 'running',
+        created_at TEXT,
+        updated_at TEXT
+    )
+    """
+
+    def __init__(self, state_dir: str):
+        self.state_dir = os.path.expanduser(state_dir)
+        os.makedirs(self.state_dir, mode=0o700, exist_ok=True)
+        self.path = os.path.join(self.state_dir, "sandboxes.db")
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        # envs carry the bridge AUTH_TOKEN; keep the database private to the owner
+        os.chmod(self.path, 0o600)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(self.SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(sandboxes)")}
+        if "state" not in columns:  # databases created before hibernation support
+            self._conn.execute("ALTER TABLE sandboxes ADD COLUMN state TEXT DEFAULT 'running'")
+
+    def upsert(
+        self,
+        sandbox_id: str,
+        e2b_sandbox_id: str,
+        template_id: Optional[str],
+        public_url: Optional[str],
+        envs: Optional[Dict[str, str]],
+    ) -> None:
+        now = datetime.now().isoformat()
+        self._conn.execute(
+            "INSERT INTO sandboxes (sandbox_id, e2b_sandbox_id, template_id, public_url, envs, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(sandbox_id) DO UPDATE SET e2b_sandbox_id=excluded.e2b_sandbox_id, "
+            "template_id=excluded.template_id, public_url=excluded.public_url, envs=excluded.envs, "
+            "updated_at=excluded.updated_at",
+            (sandbox_id, e2b_sandbox_id, template_id, public_url, json.dumps(envs or {}), now, now),
+        )
+
+    def update_health(self, sandbox_id: str, health: Dict[str, Any]) -> None:
+        summary = {k: v for k, v in health.items() if k != "history"}
+        self._conn.execute(
+            "UPDATE sandboxes SET health = ?, updated_at = ? WHERE sandbox_id = ?",
+            (json.dumps(summary), datetime.now().isoformat(), sandbox_id),
+        )
+
+    def set_state(self, sandbox_id: str, state: str) -> None:
+        self._conn.execute(
+            "UPDATE sandboxes SET state = ?, updated_at = ? WHERE sandbox_id = ?",
+            (state, datetime.now().isoformat(), sandbox_id),
+        )
+
+    def remove(self, sandbox_id: str) -> None:
+        self._conn.execute("DELETE FROM sandboxes WHERE sandbox_id = ?", (sandbox_id,))
+
+    def load(self, template_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Return recorded sandboxes, optionally limited to one template."""
+        query = (
+            "SELECT sandbox_id, e2b_sandbox_id, template_id, public_url, envs, health, state, created_at, updated_at "
+            "FROM sandboxes"
+        )
+        params: Tuple[Any, ...] = ()
+        if template_id is not None:
+            query += " WHERE template_id = ?"
+            params = (template_id,)
+        rows = []
+        for row in self._conn.execute(query + " ORDER BY created_at", params):
+            sandbox_id, e2b_id, tid, url, envs, health, state, created_at, updated_at = row
+            rows.append({
+                "sandbox_id": sandbox_id,
+                "e2b_sandbox_id": e2b_id,
+                "template_id": tid,
+                "public_url": url,
+                "envs": json.loads(envs) if envs else {},
+                "health": json.loads(health) if health else None,
+                "state": state or "running",
+                "created_at": created_at,
+                "updated_at": updated_at,
+            })
+        return rows
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class HealthProber:
+    """Single scheduler that probes /health and pings the platform for every managed sandbox.
+
+    Replaces one keepalive task (and one fresh HTTP client per interval) per sandbox with one
+    loop and one pooled keep-alive client (HTTP/2 when the ``h2`` package is available).
+    Each sandbox gets a random phase within the interval plus per-cycle jitter, so probes are
+    spread evenly over time instead of firing in bursts.
+    """
+
+    JITTER = 0.1  # +/- fraction of the interval applied to every reschedule
+
+    def __init__(self, manager: "E2BSandboxManager", history_size: int = 20, max_concurrency: int = 32):
+        self.manager = manager
+        self.history_size = history_size
+        self._semaphore_size = max(1, max_concurrency)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._health: Dict[str, SandboxHealth] = {}
+        # Heap entries carry the registration generation they were scheduled for, so entries
+        # left over from an earlier registration of the same sandbox are dropped
+        self._heap: List[Tuple[float, int, str, str, int]] = []
+        self._generation: Dict[str, int] = {}
+        self._seq = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._client: Any = None
+        self._inflight: Set[asyncio.Task] = set()
+
+    def _interval(self, kind: str) -> float:
+        if kind == "health":
+            return float(max(5, int(self.manager.config.keepalive_interval)))  # floor to >=5s
+        if kind == "idle":
+            return float(max(5, int(self.manager.config.hibernate_check_interval)))
+        return float(max(10, int(self.manager.config.platform_keepalive_interval)))
+
+    def _enabled(self, kind: str) -> bool:
+        cfg = self.manager.config
+        if kind == "idle":
+            value = cfg.hibernate_idle_seconds
+        else:
+            value = cfg.keepalive_interval if kind == "health" else cfg.platform_keepalive_interval
+        return bool(value and value > 0)
+
+    def _schedule(self, due: float, kind: str, sandbox_id: str, generation: int) -> None:
+        self._seq += 1
+        heapq.heappush(self._heap, (due, self._seq, kind, sandbox_id, generation))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def register(self, sandbox_id: str) -> None:
+        """Start probing a sandbox; the first probe lands at a random phase within the interval.
+
+        No-op for a sandbox that is already registered.
+        """
+        if sandbox_id not in self._health:
+            self._health[sandbox_id] = SandboxHealth(sandbox_id=sandbox_id)
+            self._seq += 1
+            generation = self._generation[sandbox_id] = self._seq
+            now = time.monotonic()
+            for kind in ("health", "platform", "idle"):
+                if self._enabled(kind):
+                    self._schedule(now + random.uniform(0, self._interval(kind)), kind, sandbox_id, generation)
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._semaphore = asyncio.Semaphore(self._semaphore_size)
+            self._task = asyncio.create_task(self._loop())
+
+    def unregister(self, sandbox_id: str) -> None:
+        """Stop probing a sandbox (pending heap entries are dropped lazily)."""
+        self._health.pop(sandbox_id, None)
+        self._generation.pop(sandbox_id, None)
+
+    def get(self, sandbox_id: str) -> Optional[Dict[str, Any]]:
+        record = self._health.get(sandbox_id)
+        return record.to_dict() if record else None
+
+    async def probe_now(self, sandbox_id: str) -> Optional[Dict[str, Any]]:
+        """Probe one registered sandbox immediately (outside the schedule) and return its record."""
+        await self._probe(sandbox_id)
+        return self.get(sandbox_id)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {sid: record.to_dict() for sid, record in self._health.items()}
+
+    def _get_client(self) -> Any:
+        if self._client is None:
+            import httpx  # local import to allow absence handling
+
+            try:
+                import h2  # noqa: F401  # type: ignore
+
+                http2 = True
+            except Exception:
+                http2 = False
+            self._client = httpx.AsyncClient(
+                verify=False,
+                timeout=5,
+                http2=http2,
+                limits=httpx.Limits(
+                    max_connections=self._semaphore_size,
+                    max_keepalive_connections=self._semaphore_size,
+                    keepalive_expiry=max(self._interval("health") * 2, 30.0),
+                ),
+            )
+        return self._client
+
+    async def _loop(self) -> None:
+        try:
+            import httpx  # noqa: F401
+        except Exception:
+            logger.warning("httpx not installed; disabling keepalive probes.")
+            httpx_ok = False
+        else:
+            httpx_ok = True
+        while True:
+            try:
+                if not self._heap:
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                    continue
+                due, _, kind, sandbox_id, generation = self._heap[0]
+                delay = due - time.monotonic()
+                if delay > 0:
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), delay)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                heapq.heappop(self._heap)
+                if (
+                    self._generation.get(sandbox_id) != generation
+                    or sandbox_id not in self.manager.active_sandboxes
+                ):
+                    continue
+                if kind == "health" and not httpx_ok:
+                    continue
+                interval = self._interval(kind)
+                self._schedule(
+                    due + interval * (1 + random.uniform(-self.JITTER, self.JITTER)), kind, sandbox_id, generation
+                )
+                task = asyncio.create_task(self._fire(kind, sandbox_id))
+                self._inflight.add(task)
+                task.add_done_callback(self._inflight.discard)
+            except asyncio.CancelledError:
+                return
+            except Exception as e:
+                logger.debug("Health prober loop error: %s", str(e))
+                await asyncio.sleep(1)
+
+    async def _fire(self, kind: str, sandbox_id: str) -> None:
+        async with self._semaphore:
+            try:
+                if kind == "health":
+                    await self._probe(sandbox_id)
+                elif kind == "idle":
+                    await self.manager._hibernate_if_idle(sandbox_id)
+                else:
+                    await self._platform_ping(sandbox_id)
+            except Exception as e:
+                logger.debug("Health prober %s error for %s: %s", kind, sandbox_id, str(e))
+
+    async def _probe(self, sandbox_id: str) -> None:
+        """Probe HTTPS (and optionally HTTP) /health over the shared client and record the outcome."""
+        entry = self.manager.active_sandboxes.get(sandbox_id)
+        record = self._health.get(sandbox_id)
+        if not entry or record is None:
+            return
+        sandbox = entry["sandbox"]
+        urls = [self.manager._get_public_url(sandbox, secure=True)]
+        if self.manager.config.probe_http:
+            urls.append(self.manager._get_public_url(sandbox, secure=False))
+
+        client = self._get_client()
+        results: Dict[str, bool] = {}
+        latency_ms: Optional[float] = None
+        for url in urls:
+            t0 = time.monotonic()
+            try:
+                resp = await client.get(f"{url}/health")
+                results[url] = resp.status_code == 200
+            except Exception:
+                results[url] = False
+            if results[url] and latency_ms is None:
+                latency_ms = round((time.monotonic() - t0) * 1000, 1)
+
+        ok = any(results.values())
+        record.record(ok, latency_ms, self.history_size)
+        if self.manager.registry is not None:
+            try:
+                self.manager.registry.update_health(sandbox_id, record.to_dict())
+            except sqlite3.Error as e:
+                logger.debug("Failed to persist health for %s: %s", sandbox_id, str(e))
+        if ok:
+            logger.debug("Keepalive OK for %s (%s, %sms)", sandbox_id, results, latency_ms)
+        else:
+            logger.warning(
+                "Keepalive probe failed for %s (%s, consecutive failures=%d)",
+                sandbox_id, results, record.consecutive_failures,
+            )
+
+    async def _platform_ping(self, sandbox_id: str) -> None:
+        """Execute a very cheap no-op command to keep the platform session active."""
+        entry = self.manager.active_sandboxes.get(sandbox_id)
+        if not entry:
+            return
+        await self.manager._shell(entry["sandbox"], "true", timeout=30)
+        record = self._health.get(sandbox_id)
+        if record is not None:
+            record.last_platform_ping = datetime.now().isoformat()
+
+    async def close(self) -> None:
+        """Stop the scheduler and release the pooled HTTP client."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except BaseException:
+                pass
+            self._task = None
+        for task in list(self._inflight):
+            task.cancel()
+        if self._inflight:
+            await asyncio.gather(*list(self._inflight), return_exceptions=True)
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class SessionCommandError(RuntimeError):
+    """A command run through CommandSession exited non-zero."""
+
+    def __init__(self, stdout: str, stderr: str, exit_code: int):
+        super().__init__(f"Command exited with {exit_code}: {stderr.strip()[-300:] or 'no stderr available'}")
+        self.stdout = stdout
+        self.stderr = stderr
+        self.exit_code = exit_code
+
+
+class SessionUnavailableError(RuntimeError):
+    """The command session was closed before the command was sent (so it never ran)."""
+
+
+@dataclass
+class SessionResult:
+    stdout: str
+    stderr: str
+    exit_code: int
+
+
+class CommandSession:
+    """Long-lived shell inside one sandbox that runs pipelined commands with framed results.
+
+    The SDK starts every ``commands.run`` as a fresh ``bash -l -c`` process (profiles sourced on
+    each call). The session starts one non-login ``bash`` with stdin attached once; afterwards
+    every command is one stdin write, and results come back as frame lines on the shell's stdout
+    carrying the command id, exit code, stdout and stderr. Several commands can be written in one
+    round trip with ``run_batch``. A command that times out kills the session; the manager
+    starts a new one on the next call.
+    """
+
+    def __init__(self, manager: "E2BSandboxManager", sandbox: Any):
+        self.manager = manager
+        self.sandbox = sandbox
+        self._handle: Any = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: Dict[str, "asyncio.Future[SessionResult]"] = {}
+        self._buffer = ""
+        self._counter = 0
+        self._send_lock = asyncio.Lock()
+        self._reader: Optional[Union[threading.Thread, "asyncio.Task[Any]"]] = None
+        self.closed = False
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._handle = await self.manager._run(
+            self.sandbox,
+            "exec bash --noprofile --norc -s",
+            background=True,
+            stdin=True,
+            cwd="/home/user",
+            on_stdout=self._feed_threadsafe,
+            on_stderr=self._log_stderr,
+            timeout=0,
+        )
+        if not hasattr(self._handle, "send_stdin"):
+            raise RuntimeError("Command handle does not support stdin")
+        wait = getattr(self._handle, "wait")
+        if asyncio.iscoroutinefunction(wait):
+            # Async handles deliver output through the callbacks passed to run()
+            self._reader = asyncio.create_task(self._watch_async(wait))
+        else:
+            # Sync handles only deliver output while wait() iterates the event stream
+            self._reader = threading.Thread(target=self._watch_sync, name="e2b-command-session", daemon=True)
+            self._reader.start()
+        await self._send(_SESSION_PREAMBLE)
+
+    async def run(self, command: str, cwd: Optional[str] = None, envs: Optional[Dict[str, str]] = None,
+                  timeout: Optional[float] = 60) -> SessionResult:
+        """Run one command in the session; raises SessionCommandError on a non-zero exit code."""
+        return (await self.run_batch([command], cwd=cwd, envs=envs, timeout=timeout, check=True))[0]
+
+    async def run_batch(self, commands: List[str], cwd: Optional[str] = None,
+                        envs: Optional[Dict[str, str]] = None, timeout: Optional[float] = 60,
+                        check: bool = False) -> List[SessionResult]:
+        """Write several commands in one stdin round trip and wait for all their frames (in order)."""
+        if self.closed:
+            raise SessionUnavailableError("Command session is closed")
+        prefix = "".join(f"export {k}={shlex.quote(str(v))}; " for k, v in (envs or {}).items())
+        if cwd:
+            prefix += f"cd {shlex.quote(cwd)} && "
+        lines = []
+        futures: List["asyncio.Future[SessionResult]"] = []
+        for command in commands:
+            self._counter += 1
+            frame_id = str(self._counter)
+            future = self._loop.create_future()  # type: ignore[union-attr]
+            self._pending[frame_id] = future
+            futures.append(future)
+            encoded = base64.b64encode(f"{prefix}{command}".encode("utf-8")).decode("ascii")
+            lines.append(f"echo {encoded} | base64 -d | __e2b_exec {frame_id}\n")
+        try:
+            await self._send("".join(lines))
+            results = await asyncio.wait_for(asyncio.gather(*futures), timeout or None)
+        except BaseException:
+            # A stuck or broken shell cannot be resynchronised; drop it so the next call starts fresh
+            await self.close()
+            raise
+        if check:
+            for result in results:
+                if result.exit_code != 0:
+                    raise SessionCommandError(result.stdout, result.stderr, result.exit_code)
+        return list(results)
+
+    async def _send(self, data: str) -> None:
+        async with self._send_lock:
+            await self.manager._call(self._handle.send_stdin, data)
+
+    def _feed_threadsafe(self, chunk: str) -> None:
+        if self._loop is None or self._loop.is_closed():
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._feed, chunk)
+        except RuntimeError:
+            pass
+
+    def _feed(self, chunk: str) -> None:
+        self._buffer += chunk
+        *lines, self._buffer = self._buffer.split("\n")
+        for line in lines:
+            parts = line.split(" ")
+            if len(parts) != 5 or parts[0] != SESSION_FRAME_MARKER:
+                continue
+            future = self._pending.pop(parts[1], None)
+            if future is None or future.done():
+                continue
+            try:
+                stdout, stderr = (base64.b64decode(p[1:]).decode("utf-8", errors="replace") for p in parts[3:5])
+                future.set_result(SessionResult(stdout, stderr, int(parts[2])))
+            except (ValueError, TypeError) as e:
+                future.set_exception(RuntimeError(f"Malformed session frame: {e}"))
+
+    @staticmethod
+    def _log_stderr(chunk: str) -> None:
+        logger.debug("Command session stderr: %s", chunk.rstrip())
+
+    def _watch_sync(self) -> None:
+        try:
+            self._handle.wait(on_stdout=self._feed_threadsafe, on_stderr=self._log_stderr)
+        except Exception as e:
+            logger.debug("Command session ended: %s", str(e))
+        if self._loop is not None and not self._loop.is_closed():
+            try:
+                self._loop.call_soon_threadsafe(self._fail_pending)
+            except RuntimeError:
+                pass
+
+    async def _watch_async(self, wait: Callable[[], Any]) -> None:
+        try:
+            await wait()
+        except Exception as e:
+            logger.debug("Command session ended: %s", str(e))
+        self._fail_pending()
+
+    def _fail_pending(self) -> None:
+        self.closed = True
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(RuntimeError("Command session ended"))
+        self._pending.clear()
+
+    async def close(self, kill: bool = True) -> None:
+        """End the session (pending commands fail); kill=False skips the remote kill when the sandbox goes away anyway."""
+        if self.closed and self._handle is None:
+            return
+        self.closed = True
+        handle, self._handle = self._handle, None
+        if handle is not None and kill:
+            try:
+                await self.manager._call(handle.kill)
+            except Exception:
+                pass
+        self._fail_pending()
+
 
 class E2BSandboxManager:
     """Manager for E2B Sandboxes with MCP support"""
 
-    def __init__(self, config: Optional[SandboxConfig] = None):
+    def __init__(
+        self,
+        config: Optional[SandboxConfig] = None,
+        on_timing: Optional[Callable[[Dict[str, Any]], Any]] = None,
+        sandbox_factory: Optional[Callable[..., Any]] = None,
+        sandbox_connector: Optional[Callable[[str], Any]] = None
+    ):
         """
         Initialize the sandbox manager
 
         Args:
             config: Optional sandbox configuration
+            on_timing: Optional callback receiving one timing record per create/stop event
+            sandbox_factory: Optional replacement for the SDK ``Sandbox.create`` (sync or async),
+                e.g. ``FakeBackend().create`` for offline benchmarks
+            sandbox_connector: Optional callable reconnecting to a live sandbox by E2B id
+                (default: view_sandbox_logs.connect_sandbox)
         """
+        if sandbox_factory is not None:
+            self._create_fn: Callable[..., Any] = sandbox_factory
+            self._create_kind = "async" if asyncio.iscoroutinefunction(sandbox_factory) else "sync"
+        elif _sandbox_create_fn is not None:
+            self._create_fn = _sandbox_create_fn
+            self._create_kind = _sandbox_kind
+        else:
+            raise RuntimeError(_SANDBOX_IMPORT_ERROR)
         self.config = config or SandboxConfig()
         if not self.config.template_id:
             # Allow fallback to environment variable
@@ -143,6 +876,162 @@ class E2BSandboxManager:
                 logger.warning("Invalid E2B_SANDBOX_TIMEOUT; using default %s", self.config.timeout)
 
         self.active_sandboxes: Dict[str, Dict[str, Any]] = {}
+        # Dedicated pool for blocking SDK calls so a large fleet cannot starve the default executor
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # One shared scheduler probes every sandbox (replaces per-sandbox keepalive loops)
+        self.prober = HealthProber(self)
+        # Lifecycle timing sinks (callback and/or config.timings_log JSON lines)
+        self.on_timing = on_timing
+        self._connect_fn = sandbox_connector
+        # Durable registry of live sandboxes (see restore_sandboxes)
+        self.registry: Optional[SandboxRegistry] = (
+            SandboxRegistry(self.config.state_dir) if self.config.state_dir else None
+        )
+        # Command sessions by E2B sandbox id (None once a sandbox turned out not to support them)
+        self._sessions: Dict[str, "asyncio.Future[Optional[CommandSession]]"] = {}
+
+    def _persist(self, sandbox_id: str, public_url: Optional[str] = None) -> None:
+        """Record (or refresh) a live sandbox in the registry, if one is configured."""
+        if self.registry is None:
+            return
+        entry = self.active_sandboxes.get(sandbox_id)
+        if entry is None:
+            return
+        try:
+            self.registry.upsert(
+                sandbox_id,
+                entry["e2b_sandbox_id"],
+                self.config.template_id,
+                public_url or entry.get("public_url") or self._get_public_url(entry["sandbox"]),
+                entry.get("envs"),
+            )
+            self.registry.set_state(sandbox_id, entry.get("state", "running"))
+        except sqlite3.Error as e:
+            logger.warning("Failed to persist sandbox %s: %s", sandbox_id, str(e))
+
+    def _forget(self, sandbox_id: str) -> None:
+        if self.registry is None:
+            return
+        try:
+            self.registry.remove(sandbox_id)
+        except sqlite3.Error as e:
+            logger.warning("Failed to remove sandbox %s from registry: %s", sandbox_id, str(e))
+
+    def _connect_existing(self, e2b_sandbox_id: str) -> Any:
+        """Reconnect to a live sandbox by its E2B id (blocking; run in the executor)."""
+        if self._connect_fn is not None:
+            return self._connect_fn(e2b_sandbox_id)
+        from view_sandbox_logs import connect_sandbox  # local import: resolves the SDK's resume helpers
+
+        return connect_sandbox(e2b_sandbox_id, secure=self.config.secure)
+
+    async def restore_sandboxes(self, concurrency: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Reconnect to the sandboxes recorded in the registry (after a restart or crash)
+
+        Sandboxes of this manager's template are reconnected concurrently and handed back to the
+        health prober. Only sandboxes the SDK reports as not found are dropped from the registry;
+        other reconnect errors (timeouts, DNS, credentials) keep the row for the next restore.
+
+        Args:
+            concurrency: Max reconnects in flight (default: config.fleet_concurrency)
+
+        Returns:
+            Dictionary with restored, lost (dropped) and failed (kept) sandbox ids plus per-sandbox results
+        """
+        if self.registry is None:
+            return {"success": True, "restored": [], "lost": [], "failed": [], "results": []}
+        rows = [r for r in self.registry.load(self.config.template_id) if r["sandbox_id"] not in self.active_sandboxes]
+        semaphore = asyncio.Semaphore(max(1, int(concurrency or self.config.fleet_concurrency)))
+
+        async def _restore_one(row: Dict[str, Any]) -> Dict[str, Any]:
+            sandbox_id = row["sandbox_id"]
+            if row["state"] == "paused":
+                # Connecting would resume it; keep it hibernated until resume_sandbox() is called
+                self.active_sandboxes[sandbox_id] = {
+                    "sandbox": None,
+                    "e2b_sandbox_id": row["e2b_sandbox_id"],
+                    "public_url": row["public_url"],
+                    "process_handles": {},
+                    "envs": row["envs"],
+                    "state": "paused",
+                    "paused_at": time.time(),
+                    "mem_used_bytes": None,
+                }
+                return {"sandbox_id": sandbox_id, "restored": True, "state": "paused"}
+            async with semaphore:
+                started = time.monotonic()
+                try:
+                    sandbox = await self._to_thread(self._connect_existing, row["e2b_sandbox_id"])
+                except NotFoundException as e:
+                    logger.warning("Sandbox %s (%s) is gone: %s", sandbox_id, row["e2b_sandbox_id"], str(e))
+                    self._forget(sandbox_id)
+                    return {"sandbox_id": sandbox_id, "restored": False, "lost": True, "error": str(e)}
+                except Exception as e:
+                    logger.warning("Could not reconnect to sandbox %s (%s); keeping it registered: %s", sandbox_id, row["e2b_sandbox_id"], str(e))
+                    return {"sandbox_id": sandbox_id, "restored": False, "lost": False, "error": str(e)}
+            self.active_sandboxes[sandbox_id] = {
+                "sandbox": sandbox,
+                "e2b_sandbox_id": row["e2b_sandbox_id"],
+                "public_url": row["public_url"],
+                "process_handles": {},
+                "envs": row["envs"],
+                "state": "running",
+                "last_activity": time.time(),
+            }
+            self._persist(sandbox_id)
+            try:
+                self.prober.register(sandbox_id)
+            except Exception as e:
+                logger.warning("Failed to register restored sandbox with health prober: %s", str(e))
+            return {
+                "sandbox_id": sandbox_id,
+                "restored": True,
+                "state": "running",
+                "reconnect_ms": round((time.monotonic() - started) * 1000, 1),
+            }
+
+        if rows:
+            logger.info("Reconnecting to %d sandboxes from %s", len(rows), self.registry.path)
+        results = await asyncio.gather(*(_restore_one(r) for r in rows))
+        return {
+            "success": True,
+            "restored": [r["sandbox_id"] for r in results if r["restored"]],
+            "lost": [r["sandbox_id"] for r in results if r.get("lost")],
+            "failed": [r["sandbox_id"] for r in results if not r["restored"] and not r.get("lost")],
+            "results": list(results),
+        }
+
+    def _emit_timing(
+        self,
+        event: str,
+        sandbox_id: Optional[str],
+        timer: "_PhaseTimer",
+        success: bool,
+        **extra: Any
+    ) -> Dict[str, Any]:
+        """Build a timing record for a lifecycle event and hand it to the configured sinks."""
+        record = {
+            "event": event,
+            "ts": datetime.now().isoformat(),
+            "sandbox_id": sandbox_id,
+            "template_id": self.config.template_id,
+            "success": success,
+            "timings_ms": timer.snapshot(),
+            **extra,
+        }
+        if self.on_timing is not None:
+            try:
+                self.on_timing(record)
+            except Exception as e:
+                logger.warning("Timing callback failed: %s", str(e))
+        if self.config.timings_log:
+            try:
+                with open(self.config.timings_log, "a", encoding="utf-8") as fh:
+                    fh.write(json.dumps(record, default=str) + "\n")
+            except OSError as e:
+                logger.warning("Failed to write timings log %s: %s", self.config.timings_log, str(e))
+        return record
 
     async def create_sandbox(
         self,
@@ -161,13 +1050,17 @@ class E2BSandboxManager:
         Returns:
             Dictionary containing sandbox information
         """
+        timer = _PhaseTimer()
+        bootstrap_steps: Optional[Dict[str, float]] = None
+        readiness_attempts: List[Dict[str, Any]] = []
         try:
             logger.info(f"Creating sandbox with template: {self.config.template_id}")
 
             # Create sandbox with custom template using whichever client was imported
-            if _sandbox_kind == 'async':
+            timer.start("sdk_create")
+            if self._create_kind == 'async':
                 # Async API: call directly
-                sandbox = await _sandbox_create_fn(  # type: ignore
+                sandbox = await self._create_fn(
                     template=self.config.template_id,
                     timeout=self.config.timeout,
                     metadata=self.config.metadata,
@@ -176,8 +1069,8 @@ class E2BSandboxManager:
                 )
             else:
                 # Legacy sync API: run in thread
-                sandbox = await asyncio.to_thread(
-                    _sandbox_create_fn,  # type: ignore
+                sandbox = await self._to_thread(
+                    self._create_fn,
                     template=self.config.template_id,
                     timeout=self.config.timeout,
                     metadata=self.config.metadata,
@@ -185,20 +1078,26 @@ class E2BSandboxManager:
                     allow_internet_access=enable_internet,
                 )
 
+            timer.stop("sdk_create")
             logger.info("Sandbox launched; startup handled by image entrypoint")
 
             # Generate sandbox ID if not provided
             if not sandbox_id:
                 sandbox_id = f"sandbox_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
             # Bootstrap services inside sandbox and persist handles
-            bootstrap_info = await self._bootstrap_services(sandbox)
+            with timer.phase("bootstrap"):
+                bootstrap_info = await self._bootstrap_services(sandbox)
+            bootstrap_steps = (bootstrap_info.get("bootstrap") or {}).get("timings_ms")
 
             handles = bootstrap_info["handles"]
 
             self.active_sandboxes[sandbox_id] = {
                 "sandbox": sandbox,
+                "e2b_sandbox_id": sandbox.sandbox_id,
                 "process_handles": handles,
                 "envs": bootstrap_info["envs"],
+                "state": "running",
+                "last_activity": time.time(),
             }
 
             logger.info(f"Sandbox created with ID: {sandbox.sandbox_id}")
@@ -216,9 +1115,22 @@ class E2BSandboxManager:
             # Wait for services to be ready if requested, and discover which URL is healthy
             healthy_url = None
             probe_result = {"https_ok": False, "http_ok": False}
+            readiness: Optional[Dict[str, Any]] = None
             if wait_for_ready:
+                signal_ok = False
+                if self.config.ready_signal:
+                    logger.info("Waiting for startup.sh readiness signal (phase=%s)...", self.config.ready_phase)
+                    with timer.phase("ready_signal"):
+                        readiness = await self._wait_for_ready_signal(sandbox)
+                    signal_ok = bool(readiness.get("ready"))
                 logger.info("Waiting for services to be ready (probing http and https /health)...")
-                ready_info = await self._wait_for_services(sandbox, https_url, http_url)
+                with timer.phase("health_probe"):
+                    if signal_ok:
+                        # Services are up inside the sandbox; only the public route may still lag briefly
+                        ready_info = await self._wait_for_services(sandbox, https_url, http_url, max_attempts=20, delay=0.25)
+                    else:
+                        ready_info = await self._wait_for_services(sandbox, https_url, http_url)
+                readiness_attempts = ready_info.get("attempts") or []
                 healthy_url = ready_info.get("healthy_url")
                 probe_result = {k: ready_info.get(k, False) for k in ("https_ok", "http_ok")}
 
@@ -324,7 +1236,9 @@ class E2BSandboxManager:
                 "created_at": datetime.now().isoformat(),
                 "timeout_seconds": self.config.timeout,
                 "internet_access": bool(enable_internet),
-                "probes": probe_result
+                "probes": probe_result,
+                "bootstrap": bootstrap_info.get("bootstrap"),
+                "readiness": readiness,
             }
 
             # Conditionally include optional URLs based on availability
@@ -339,19 +1253,23 @@ class E2BSandboxManager:
 
             logger.info(f"Sandbox ready: {public_url}")
 
-            # Start keepalive loops if configured
-            if self.config.keepalive_interval and self.config.keepalive_interval > 0:
-                try:
-                    task = asyncio.create_task(self._keepalive_loop(sandbox_id))
-                    self.active_sandboxes[sandbox_id]["keepalive_task"] = task
-                except Exception as e:
-                    logger.warning("Failed to start keepalive loop: %s", str(e))
-            if self.config.platform_keepalive_interval and self.config.platform_keepalive_interval > 0:
-                try:
-                    ptask = asyncio.create_task(self._platform_keepalive_loop(sandbox_id))
-                    self.active_sandboxes[sandbox_id]["platform_keepalive_task"] = ptask
-                except Exception as e:
-                    logger.warning("Failed to start platform keepalive loop: %s", str(e))
+            record = self._emit_timing(
+                "create", sandbox_id, timer, True,
+                bootstrap_steps=bootstrap_steps,
+                readiness_attempts=readiness_attempts,
+            )
+            result["timings_ms"] = record["timings_ms"]
+            result["readiness_attempts"] = readiness_attempts
+            logger.info("Sandbox %s lifecycle timings (ms): %s", sandbox_id, record["timings_ms"])
+
+            self.active_sandboxes[sandbox_id]["public_url"] = public_url
+            self._persist(sandbox_id, public_url)
+
+            # Hand the sandbox to the shared prober (health + platform keepalive) if configured
+            try:
+                self.prober.register(sandbox_id)
+            except Exception as e:
+                logger.warning("Failed to register sandbox with health prober: %s", str(e))
             return result
 
         except Exception as e:
@@ -363,10 +1281,18 @@ class E2BSandboxManager:
                     logger.warning(
                         f"Unable to clean up sandbox after failure: {cleanup_error}"
                     )
+            timer.stop_all()
+            record = self._emit_timing(
+                "create", sandbox_id, timer, False,
+                error=str(e),
+                bootstrap_steps=bootstrap_steps,
+                readiness_attempts=readiness_attempts,
+            )
             return {
                 "success": False,
                 "error": str(e),
-                "sandbox_id": sandbox_id
+                "sandbox_id": sandbox_id,
+                "timings_ms": record["timings_ms"],
             }
 
     async def _bootstrap_services(self, sandbox) -> Dict[str, Any]:
@@ -414,176 +1340,30 @@ class E2BSandboxManager:
             if key in os.environ and str(os.environ.get(key, "")).strip() != "":
                 service_envs[key] = os.environ[key]
 
-        logger.info("Preparing mcp-connect directory inside sandbox (startup.sh will manage .env)")
-        await self._run(sandbox, "mkdir -p /home/user/mcp-connect", background=False, envs=envs, cwd="/home/user")
-
-        # If a local nginx.conf exists in repo, push it into the sandbox and apply
-        try:
-            repo_dir = os.path.dirname(os.path.abspath(__file__))
-            local_nginx_conf = os.path.join(repo_dir, "nginx.conf")
-            if os.path.isfile(local_nginx_conf):
-                logger.info("Found local nginx.conf; pushing to sandbox and applying...")
-                with open(local_nginx_conf, "r", encoding="utf-8") as f:
-                    nginx_conf_content = f.read()
-
-                # Write to a temp location and move with sudo
-                await self._write(sandbox, "/home/user/nginx.conf.tmp", nginx_conf_content)
-
-                # Test and apply the configuration if nginx is already present
-                apply_cmd = (
-                    "bash -lc "
-                    "'set -e; "
-                    "sudo cp /home/user/nginx.conf.tmp /etc/nginx/sites-available/default; "
-                    "if pgrep -x nginx >/dev/null; then "
-                    "  sudo nginx -t && sudo nginx -s reload; "
-                    "else echo nginx not running yet; fi'"
-                )
-                await self._run(sandbox, apply_cmd, background=False, cwd="/home/user")
-            else:
-                logger.debug("No local nginx.conf found; keeping image default")
-        except Exception as e:
-            logger.warning("Failed to push/apply nginx.conf: %s", str(e))
-
-        # Ensure startup.sh exists and use it to bootstrap services (single orchestrator inside sandbox)
-
-        logger.info("Ensuring startup.sh is available inside sandbox")
-        startup_exists = False
-        try:
-            startup_check = await self._run(sandbox, "bash -lc 'if [ -f /home/user/startup.sh ]; then echo FOUND; else echo MISSING; fi'", background=False, cwd="/home/user")
-            startup_exists = 'FOUND' in (startup_check.stdout or '')
-        except CommandExitException:
-            startup_exists = False
-
-        repo_dir = os.path.dirname(os.path.abspath(__file__))
-        local_startup = os.path.join(repo_dir, "startup.sh")
-        local_wrapper = os.path.join(repo_dir, "chrome-devtools-wrapper.sh")
-        local_servers = os.path.join(repo_dir, "servers.json")
-
-        # Optional: prefer fetching assets from a remote repo (always-latest) inside the sandbox
-        # Now controlled via SandboxConfig instead of environment variables.
-        fetch_remote = bool(self.config.fetch_remote)
-        remote_base = str(self.config.remote_base).strip()
+        timer = _PhaseTimer()
+        with timer.phase("load_assets"):
+            assets = self._load_assets()
 
-        # Try to load resources from packaged e2b_mcp_sandbox if not present next to this file
-        def _resource_text(pkg: str, name: str) -> Optional[str]:
-            try:
-                pkg_mod = __import__(pkg, fromlist=['dummy'])
-                ref = importlib_resources.files(pkg_mod) / name  # type: ignore
-                if ref.is_file():
-                    return ref.read_text(encoding='utf-8')
-            except Exception:
-                return None
-            return None
+        changed = assets
+        if self.config.asset_sync and assets:
+            with timer.phase("asset_check"):
+                changed = await self._changed_assets(sandbox, assets)
+        unchanged = sorted(set(assets) - set(changed))
+        if unchanged:
+            logger.info("Bootstrap assets already up to date in sandbox: %s", ", ".join(unchanged))
 
-        startup_contents: Optional[str] = None
-        remote_ok = False
-        if fetch_remote:
+        mode = "steps"
+        if self.config.bundle_bootstrap:
             try:
-                logger.info("Fetching startup.sh from remote: %s", remote_base)
-                cmd = (
-                    f"bash -lc 'curl -fsSL {remote_base}/startup.sh -o /home/user/startup.sh && chmod +x /home/user/startup.sh && echo OK'"
-                )
-                out = await self._run(sandbox, cmd, background=False, cwd="/home/user")
-                if out and "OK" in (out.stdout or ""):
-                    startup_exists = True
-                    remote_ok = True
+                await self._bootstrap_bundled(sandbox, changed, service_envs, timer)
+                mode = "bundle"
             except Exception as e:
-                logger.warning("Remote fetch of startup.sh failed; falling back to packaged/local. %s", str(e))
-
-        if not remote_ok:
-            if os.path.isfile(local_startup):
-                with open(local_startup, "r", encoding="utf-8") as handle:
-                    startup_contents = handle.read()
-            if startup_contents is None:
-                # try packaged fallback from this package path
-                startup_contents = _resource_text('deploy.e2b', 'startup.sh')
-                if startup_contents:
-                    logger.info("Using packaged startup.sh from deploy.e2b")
-            if startup_contents is None:
-                logger.warning("Local startup.sh not found at %s and no packaged resource; cannot upload", local_startup)
-            else:
-                logger.info("Uploading startup.sh to sandbox (overwriting existing copy)")
-                await self._write(sandbox, "/home/user/startup.sh", startup_contents)
-                startup_exists = True
-
-        wrapper_contents: Optional[str] = None
-        wrapper_remote_ok = False
-        if fetch_remote:
-            try:
-                logger.info("Fetching chrome-devtools-wrapper.sh from remote: %s", remote_base)
-                cmd = (
-                    f"bash -lc 'curl -fsSL {remote_base}/chrome-devtools-wrapper.sh -o /home/user/chrome-devtools-wrapper.sh && chmod +x /home/user/chrome-devtools-wrapper.sh && echo OK'"
-                )
-                out = await self._run(sandbox, cmd, background=False, cwd="/home/user")
-                if out and "OK" in (out.stdout or ""):
-                    wrapper_remote_ok = True
-            except Exception:
-                pass
-        if not wrapper_remote_ok:
-            if os.path.isfile(local_wrapper):
-                with open(local_wrapper, "r", encoding="utf-8") as handle:
-                    wrapper_contents = handle.read()
-            if wrapper_contents is None:
-                wrapper_contents = _resource_text('deploy.e2b', 'chrome-devtools-wrapper.sh')
-                if wrapper_contents:
-                    logger.info("Using packaged chrome-devtools-wrapper.sh from deploy.e2b")
-            if wrapper_contents is None:
-                logger.warning("chrome-devtools wrapper script missing at %s and no packaged resource", local_wrapper)
-            else:
-                logger.info("Uploading chrome-devtools wrapper script to sandbox")
-                await self._write(sandbox, "/home/user/chrome-devtools-wrapper.sh", wrapper_contents)
-                try:
-                    await self._run(sandbox, "bash -lc 'chmod +x /home/user/chrome-devtools-wrapper.sh'", background=False, cwd="/home/user")
-                except CommandExitException as e:
-                    logger.warning("Failed to chmod chrome-devtools-wrapper.sh: %s", getattr(e, 'stderr', '') or str(e))
-
-        # MCP servers configuration: optionally override repo mcp-servers.json inside mcp-connect
-        try:
-            servers_contents: Optional[str] = None
-            # 1) 优先使用与 sandbox_deploy.py 同目录的 servers.json（开发场景）
-            if os.path.isfile(local_servers):
-                with open(local_servers, "r", encoding="utf-8") as handle:
-                    servers_contents = handle.read()
-                logger.info("Using local deploy/e2b/servers.json to override /home/user/mcp-connect/mcp-servers.json")
-            # 2) 若同目录没有，则尝试使用打包在 deploy.e2b 包里的 servers.json（生产安装场景）
-            if servers_contents is None:
-                pkg_servers = _resource_text('deploy.e2b', 'servers.json')
-                if pkg_servers:
-                    servers_contents = pkg_servers
-                    logger.info("Using packaged deploy.e2b/servers.json to override /home/user/mcp-connect/mcp-servers.json")
-
-            if servers_contents is not None:
-                await self._write(sandbox, "/home/user/mcp-connect/mcp-servers.json", servers_contents)
-            else:
-                logger.info("No deploy/e2b/servers.json (local or packaged) found; keeping mcp-connect repo mcp-servers.json")
-        except Exception as e:
-            logger.warning("Failed to update /home/user/mcp-connect/mcp-servers.json: %s", str(e))
-
-        if startup_exists:
-            try:
-                await self._run(sandbox, "bash -lc 'chmod +x /home/user/startup.sh'", background=False, cwd="/home/user")
-            except CommandExitException as e:
-                logger.warning("Failed to chmod startup.sh: %s", getattr(e, 'stderr', '') or str(e))
+                logger.warning("Bundled bootstrap failed; falling back to step-by-step bootstrap: %s", str(e))
+        if mode == "steps":
+            await self._bootstrap_stepwise(sandbox, changed, envs, service_envs, timer)
 
-            logger.info("Launching startup.sh to initialise GUI and proxy services")
-            try:
-                start_cmd = (
-                    "bash -lc '"
-                    "if [ -f /home/user/startup_sh.pid ] && kill -0 $(cat /home/user/startup_sh.pid) 2>/dev/null; then "
-                    "  echo startup.sh already running; "
-                    "else "
-                    "  nohup /home/user/startup.sh > /home/user/startup.log 2>&1 & "
-                    "  echo $! > /home/user/startup_sh.pid; "
-                    "fi'"
-                )
-                await self._run(sandbox, start_cmd, background=False, envs=service_envs, cwd="/home/user")
-            except CommandExitException as e:
-                logger.error("Failed to launch startup.sh: %s", getattr(e, 'stderr', '') or str(e))
-                raise
-
-            logger.info("startup.sh launched; delegating orchestration to startup.sh")
-        else:
-            logger.warning("startup.sh is not present inside sandbox; GUI services may be unavailable")
+        timings = timer.snapshot()
+        logger.info("Bootstrap (%s) phase timings (ms): %s", mode, timings)
 
         # Handles retained for compatibility with existing return structure
         chrome_handle = None
@@ -603,34 +1383,355 @@ class E2BSandboxManager:
                 "novnc": None,
             },
             "envs": {**envs, "LOG_LEVEL": "info"},
+            "bootstrap": {
+                "mode": mode,
+                "timings_ms": timings,
+                "assets_transferred": sorted(changed),
+                "assets_unchanged": unchanged,
+            },
         }
 
-    @staticmethod
-    def _parse_resolution(resolution: str) -> Tuple[str, str]:
-        """Extract width and height from an Xvfb resolution string (e.g. 1920x1080x24)."""
-        try:
-            parts = resolution.lower().split("x")
-            width = parts[0] if parts else "1920"
-            height = parts[1] if len(parts) > 1 else "1080"
-        except Exception:
-            return "1920", "1080"
-
-        width_digits = ''.join(ch for ch in width if ch.isdigit()) or "1920"
-        height_digits = ''.join(ch for ch in height if ch.isdigit()) or "1080"
-        return width_digits, height_digits
-
-    @staticmethod
-    def _template_indicates_headless(template_id: str) -> bool:
-        """Infer headless-like behavior from template naming conventions.
+    def _load_assets(self) -> Dict[str, str]:
+        """Read bootstrap assets from next to this file, falling back to the packaged deploy.e2b copies.
 
-        Treat aliases or IDs containing 'minimal' or 'simple' as headless (no GUI/noVNC).
-        This heuristic avoids exposing noVNC URLs for minimal/simple templates.
+        Returns:
+            Mapping of asset name (startup.sh, chrome-devtools-wrapper.sh, servers.json, nginx.conf,
+            supervisor.py) to file contents; missing assets are omitted.
         """
-        tid = (template_id or "").lower()
-        patterns = ("minimal", "simple", "mcp-dev-minimal", "mcp-dev-simple")
-        return any(p in tid for p in patterns)
+        repo_dir = os.path.dirname(os.path.abspath(__file__))
 
-    def _get_public_url(self, sandbox, secure: Optional[bool] = None) -> str:
+        # Try to load resources from packaged e2b_mcp_sandbox if not present next to this file
+        def _resource_text(pkg: str, name: str) -> Optional[str]:
+            try:
+                pkg_mod = __import__(pkg, fromlist=['dummy'])
+                ref = importlib_resources.files(pkg_mod) / name  # type: ignore
+                if ref.is_file():
+                    return ref.read_text(encoding='utf-8')
+            except Exception:
+                return None
+            return None
+
+        assets: Dict[str, str] = {}
+        for name in BOOTSTRAP_ASSETS:
+            local_path = os.path.join(repo_dir, name)
+            contents: Optional[str] = None
+            if os.path.isfile(local_path):
+                with open(local_path, "r", encoding="utf-8") as handle:
+                    contents = handle.read()
+            elif name != "nginx.conf":
+                # nginx.conf is only pushed when present next to this file; the image default applies otherwise
+                contents = _resource_text('deploy.e2b', name)
+                if contents:
+                    logger.info("Using packaged %s from deploy.e2b", name)
+            if contents is None:
+                logger.debug("Bootstrap asset %s not found locally or packaged", name)
+                continue
+            assets[name] = contents
+        return assets
+
+    @staticmethod
+    def _asset_manifest(assets: Dict[str, str]) -> Dict[str, str]:
+        """Map each asset's sandbox path to the sha256 of its contents."""
+        return {
+            BOOTSTRAP_ASSETS[name]: hashlib.sha256(contents.encode("utf-8")).hexdigest()
+            for name, contents in assets.items()
+        }
+
+    async def _changed_assets(self, sandbox, assets: Dict[str, str]) -> Dict[str, str]:
+        """Return the subset of assets whose sandbox copy is missing or differs, using one sha256sum call.
+
+        On any error every asset is treated as changed.
+        """
+        manifest = self._asset_manifest(assets)
+        paths = " ".join(shlex.quote(path) for path in manifest)
+        try:
+            out = await self._shell(sandbox, f"sha256sum {paths} 2>/dev/null; true")
+        except Exception as e:
+            logger.warning("Asset hash check failed; transferring all assets: %s", str(e))
+            return dict(assets)
+
+        remote: Dict[str, str] = {}
+        for line in (getattr(out, "stdout", "") or "").splitlines():
+            parts = line.strip().split(None, 1)
+            if len(parts) == 2:
+                remote[parts[1].lstrip("*")] = parts[0]
+        return {
+            name: contents
+            for name, contents in assets.items()
+            if remote.get(BOOTSTRAP_ASSETS[name]) != manifest[BOOTSTRAP_ASSETS[name]]
+        }
+
+    @staticmethod
+    def _pack_assets(assets: Dict[str, str]) -> bytes:
+        """Pack bootstrap assets into an in-memory tar.gz archive."""
+        buf = io.BytesIO()
+        with tarfile.open(fileobj=buf, mode="w:gz") as tar:
+            for name, contents in assets.items():
+                data = contents.encode("utf-8")
+                info = tarfile.TarInfo(name=name)
+                info.size = len(data)
+                info.mode = 0o755 if name.endswith((".sh", ".py")) else 0o644
+                info.mtime = int(time.time())
+                tar.addfile(info, io.BytesIO(data))
+        return buf.getvalue()
+
+    @staticmethod
+    def _inline_script_cmd(script: str) -> str:
+        """Wrap a multi-line script into one command (base64 avoids any quoting issues)."""
+        encoded = base64.b64encode(script.encode("utf-8")).decode("ascii")
+        # The SDK already runs every command in a login shell; no nested `bash -lc` needed
+        return f"echo {encoded} | base64 -d | bash -s"
+
+    def _render_install_script(self, has_bundle: bool) -> str:
+        """Render the idempotent install-and-launch script; only assets present in the bundle are installed."""
+        fetch_remote = "1" if self.config.fetch_remote else "0"
+        remote_base = shlex.quote(str(self.config.remote_base).strip())
+        return f"""#!/bin/bash
+# Generated by E2BSandboxManager: install bundled assets and launch startup.sh (idempotent)
+set -euo pipefail
+B={BUNDLE_DIR}
+HAS_BUNDLE={"1" if has_bundle else "0"}
+FETCH_REMOTE={fetch_remote}
+REMOTE_BASE={remote_base}
+
+mkdir -p /home/user/mcp-connect
+rm -rf "$B"; mkdir -p "$B"
+if [ "$HAS_BUNDLE" = "1" ]; then tar -xzf {BUNDLE_ARCHIVE} -C "$B"; rm -f {BUNDLE_ARCHIVE}; fi
+
+# nginx.conf is only bundled when it differs from the installed copy, so reload only then
+if [ -f "$B/nginx.conf" ]; then
+  sudo cp "$B/nginx.conf" /etc/nginx/sites-available/default
+  if pgrep -x nginx >/dev/null; then sudo nginx -t && sudo nginx -s reload; else echo "nginx not running yet"; fi
+fi
+
+for name in startup.sh chrome-devtools-wrapper.sh; do
+  if [ "$FETCH_REMOTE" = "1" ] && curl -fsSL "$REMOTE_BASE/$name" -o "$B/$name.remote"; then
+    mv -f "$B/$name.remote" "$B/$name"
+  fi
+  if [ -f "$B/$name" ]; then install -m 0755 "$B/$name" "/home/user/$name"; fi
+done
+
+if [ -f "$B/servers.json" ]; then cp -f "$B/servers.json" /home/user/mcp-connect/mcp-servers.json; fi
+if [ -f "$B/supervisor.py" ]; then install -m 0755 "$B/supervisor.py" /home/user/supervisor.py; fi
+
+if [ ! -f /home/user/startup.sh ]; then
+  echo "STARTUP_MISSING"
+  exit 0
+fi
+if [ -f /home/user/startup_sh.pid ] && kill -0 "$(cat /home/user/startup_sh.pid)" 2>/dev/null; then
+  echo "startup.sh already running"
+else
+  setsid nohup /home/user/startup.sh > /home/user/startup.log 2>&1 < /dev/null &
+  echo $! > /home/user/startup_sh.pid
+fi
+echo "BOOTSTRAP_OK"
+"""
+
+    async def _bootstrap_bundled(
+        self,
+        sandbox,
+        assets: Dict[str, str],
+        service_envs: Dict[str, str],
+        timer: "_PhaseTimer",
+    ) -> None:
+        """Bootstrap with at most one archive upload and one install-and-launch command.
+
+        The install script travels inline (base64) with the command, so when no asset changed
+        nothing is uploaded at all.
+        """
+        with timer.phase("bundle_pack"):
+            archive = self._pack_assets(assets) if assets else None
+            script = self._render_install_script(has_bundle=archive is not None)
+        if archive is not None:
+            logger.info("Uploading bootstrap bundle (%d bytes, %d assets)", len(archive), len(assets))
+            with timer.phase("bundle_upload"):
+                await self._write(sandbox, BUNDLE_ARCHIVE, archive)
+        install_cmd = self._inline_script_cmd(script)
+        with timer.phase("bundle_install_launch"):
+            out = await self._run(sandbox, install_cmd, background=False, envs=service_envs, cwd="/home/user")
+        stdout = getattr(out, "stdout", "") or ""
+        if "STARTUP_MISSING" in stdout:
+            logger.warning("startup.sh is not present inside sandbox; GUI services may be unavailable")
+        elif "BOOTSTRAP_OK" not in stdout:
+            raise RuntimeError(f"bundle install did not complete: {stdout.strip()[-200:]}")
+        else:
+            logger.info("startup.sh launched from bootstrap bundle; delegating orchestration to startup.sh")
+
+    async def _bootstrap_stepwise(
+        self,
+        sandbox,
+        assets: Dict[str, str],
+        envs: Dict[str, str],
+        service_envs: Dict[str, str],
+        timer: "_PhaseTimer",
+    ) -> None:
+        """Bootstrap with one remote call per step (fallback when the bundle path fails)."""
+        logger.info("Preparing mcp-connect directory inside sandbox (startup.sh will manage .env)")
+        with timer.phase("mkdir"):
+            await self._run(sandbox, "mkdir -p /home/user/mcp-connect", background=False, envs=envs, cwd="/home/user")
+
+        # If a local nginx.conf exists in repo and differs from the sandbox copy, push it and apply
+        try:
+            nginx_conf_content = assets.get("nginx.conf")
+            if nginx_conf_content is not None:
+                logger.info("Found local nginx.conf; pushing to sandbox and applying...")
+                with timer.phase("nginx"):
+                    # Write to a temp location and move with sudo
+                    await self._write(sandbox, "/home/user/nginx.conf.tmp", nginx_conf_content)
+
+                    # Test and apply the configuration if nginx is already present
+                    apply_cmd = (
+                        "bash -lc "
+                        "'set -e; "
+                        "sudo cp /home/user/nginx.conf.tmp /etc/nginx/sites-available/default; "
+                        "if pgrep -x nginx >/dev/null; then "
+                        "  sudo nginx -t && sudo nginx -s reload; "
+                        "else echo nginx not running yet; fi'"
+                    )
+                    await self._run(sandbox, apply_cmd, background=False, cwd="/home/user")
+            else:
+                logger.debug("No changed local nginx.conf; keeping sandbox copy")
+        except Exception as e:
+            logger.warning("Failed to push/apply nginx.conf: %s", str(e))
+
+        # Ensure startup.sh exists and use it to bootstrap services (single orchestrator inside sandbox)
+
+        logger.info("Ensuring startup.sh is available inside sandbox")
+        startup_exists = False
+        with timer.phase("startup_check"):
+            try:
+                startup_check = await self._run(sandbox, "bash -lc 'if [ -f /home/user/startup.sh ]; then echo FOUND; else echo MISSING; fi'", background=False, cwd="/home/user")
+                startup_exists = 'FOUND' in (startup_check.stdout or '')
+            except CommandExitException:
+                startup_exists = False
+
+        # Optional: prefer fetching assets from a remote repo (always-latest) inside the sandbox
+        # Now controlled via SandboxConfig instead of environment variables.
+        fetch_remote = bool(self.config.fetch_remote)
+        remote_base = str(self.config.remote_base).strip()
+
+        with timer.phase("startup_upload"):
+            remote_ok = False
+            if fetch_remote:
+                try:
+                    logger.info("Fetching startup.sh from remote: %s", remote_base)
+                    cmd = (
+                        f"bash -lc 'curl -fsSL {remote_base}/startup.sh -o /home/user/startup.sh && chmod +x /home/user/startup.sh && echo OK'"
+                    )
+                    out = await self._run(sandbox, cmd, background=False, cwd="/home/user")
+                    if out and "OK" in (out.stdout or ""):
+                        startup_exists = True
+                        remote_ok = True
+                except Exception as e:
+                    logger.warning("Remote fetch of startup.sh failed; falling back to packaged/local. %s", str(e))
+
+            if not remote_ok:
+                startup_contents = assets.get("startup.sh")
+                if startup_contents is None:
+                    if not startup_exists:
+                        logger.warning("Local startup.sh not found and no packaged resource; cannot upload")
+                else:
+                    logger.info("Uploading startup.sh to sandbox (overwriting existing copy)")
+                    await self._write(sandbox, "/home/user/startup.sh", startup_contents)
+                    startup_exists = True
+
+        with timer.phase("wrapper_upload"):
+            wrapper_remote_ok = False
+            if fetch_remote:
+                try:
+                    logger.info("Fetching chrome-devtools-wrapper.sh from remote: %s", remote_base)
+                    cmd = (
+                        f"bash -lc 'curl -fsSL {remote_base}/chrome-devtools-wrapper.sh -o /home/user/chrome-devtools-wrapper.sh && chmod +x /home/user/chrome-devtools-wrapper.sh && echo OK'"
+                    )
+                    out = await self._run(sandbox, cmd, background=False, cwd="/home/user")
+                    if out and "OK" in (out.stdout or ""):
+                        wrapper_remote_ok = True
+                except Exception:
+                    pass
+            if not wrapper_remote_ok:
+                wrapper_contents = assets.get("chrome-devtools-wrapper.sh")
+                if wrapper_contents is not None:
+                    logger.info("Uploading chrome-devtools wrapper script to sandbox")
+                    await self._write(sandbox, "/home/user/chrome-devtools-wrapper.sh", wrapper_contents)
+                    try:
+                        await self._run(sandbox, "bash -lc 'chmod +x /home/user/chrome-devtools-wrapper.sh'", background=False, cwd="/home/user")
+                    except CommandExitException as e:
+                        logger.warning("Failed to chmod chrome-devtools-wrapper.sh: %s", getattr(e, 'stderr', '') or str(e))
+
+        # MCP servers configuration: optionally override repo mcp-servers.json inside mcp-connect
+        with timer.phase("servers_upload"):
+            try:
+                servers_contents = assets.get("servers.json")
+                if servers_contents is not None:
+                    logger.info("Using deploy/e2b/servers.json to override /home/user/mcp-connect/mcp-servers.json")
+                    await self._write(sandbox, "/home/user/mcp-connect/mcp-servers.json", servers_contents)
+                else:
+                    logger.info("No changed deploy/e2b/servers.json; keeping sandbox mcp-servers.json")
+            except Exception as e:
+                logger.warning("Failed to update /home/user/mcp-connect/mcp-servers.json: %s", str(e))
+
+        # Service supervisor exec'd by startup.sh (it falls back to sequential startup without it)
+        with timer.phase("supervisor_upload"):
+            supervisor_contents = assets.get("supervisor.py")
+            if supervisor_contents is not None:
+                try:
+                    await self._write(sandbox, BOOTSTRAP_ASSETS["supervisor.py"], supervisor_contents)
+                except Exception as e:
+                    logger.warning("Failed to upload supervisor.py: %s", str(e))
+
+        if startup_exists:
+            with timer.phase("launch"):
+                try:
+                    await self._run(sandbox, "bash -lc 'chmod +x /home/user/startup.sh'", background=False, cwd="/home/user")
+                except CommandExitException as e:
+                    logger.warning("Failed to chmod startup.sh: %s", getattr(e, 'stderr', '') or str(e))
+
+                logger.info("Launching startup.sh to initialise GUI and proxy services")
+                try:
+                    start_cmd = (
+                        "bash -lc '"
+                        "if [ -f /home/user/startup_sh.pid ] && kill -0 $(cat /home/user/startup_sh.pid) 2>/dev/null; then "
+                        "  echo startup.sh already running; "
+                        "else "
+                        "  setsid nohup /home/user/startup.sh > /home/user/startup.log 2>&1 < /dev/null & "
+                        "  echo $! > /home/user/startup_sh.pid; "
+                        "fi'"
+                    )
+                    await self._run(sandbox, start_cmd, background=False, envs=service_envs, cwd="/home/user")
+                except CommandExitException as e:
+                    logger.error("Failed to launch startup.sh: %s", getattr(e, 'stderr', '') or str(e))
+                    raise
+
+            logger.info("startup.sh launched; delegating orchestration to startup.sh")
+        else:
+            logger.warning("startup.sh is not present inside sandbox; GUI services may be unavailable")
+
+    @staticmethod
+    def _parse_resolution(resolution: str) -> Tuple[str, str]:
+        """Extract width and height from an Xvfb resolution string (e.g. 1920x1080x24)."""
+        try:
+            parts = resolution.lower().split("x")
+            width = parts[0] if parts else "1920"
+            height = parts[1] if len(parts) > 1 else "1080"
+        except Exception:
+            return "1920", "1080"
+
+        width_digits = ''.join(ch for ch in width if ch.isdigit()) or "1920"
+        height_digits = ''.join(ch for ch in height if ch.isdigit()) or "1080"
+        return width_digits, height_digits
+
+    @staticmethod
+    def _template_indicates_headless(template_id: str) -> bool:
+        """Infer headless-like behavior from template naming conventions.
+
+        Treat aliases or IDs containing 'minimal' or 'simple' as headless (no GUI/noVNC).
+        This heuristic avoids exposing noVNC URLs for minimal/simple templates.
+        """
+        tid = (template_id or "").lower()
+        patterns = ("minimal", "simple", "mcp-dev-minimal", "mcp-dev-simple")
+        return any(p in tid for p in patterns)
+
+    def _get_public_url(self, sandbox, secure: Optional[bool] = None) -> str:
         """
         Get the public URL for the sandbox
 
@@ -674,7 +1775,8 @@ class E2BSandboxManager:
             delay: Delay between attempts in seconds
 
         Returns:
-            Dict with keys: https_ok (bool), http_ok (bool), healthy_url (str|None)
+            Dict with keys: https_ok (bool), http_ok (bool), healthy_url (str|None),
+            attempts (per-attempt duration and outcome)
         """
         try:
             import httpx  # local import to allow absence handling
@@ -685,54 +1787,157 @@ class E2BSandboxManager:
         https_ok = False
         http_ok = False
         healthy_url = None
+        attempts: List[Dict[str, Any]] = []
 
-        for attempt in range(max_attempts):
-            try:
-                # Try HTTPS first (ignore TLS validation issues because of self-signed cert)
-                async with httpx.AsyncClient(verify=False, timeout=5) as client:
-                    # HTTPS
+        # One client for all attempts so the connection is reused (TLS validation off for self-signed cert)
+        async with httpx.AsyncClient(verify=False, timeout=5) as client:
+            for attempt in range(max_attempts):
+                attempt_started = time.monotonic()
+                # HTTPS
+                try:
+                    resp = await client.get(f"{https_url}/health")
+                    if resp.status_code == 200:
+                        https_ok = True
+                        healthy_url = https_url
+                except Exception:
+                    pass
+                # Optional HTTP probe
+                if self.config.probe_http:
                     try:
-                        resp = await client.get(f"{https_url}/health")
+                        resp = await client.get(f"{http_url}/health")
                         if resp.status_code == 200:
-                            https_ok = True
-                            healthy_url = https_url
+                            http_ok = True
+                            if healthy_url is None:
+                                healthy_url = http_url
                     except Exception:
                         pass
-                    # Optional HTTP probe
-                    if self.config.probe_http:
-                        try:
-                            resp = await client.get(f"{http_url}/health")
-                            if resp.status_code == 200:
-                                http_ok = True
-                                if healthy_url is None:
-                                    healthy_url = http_url
-                        except Exception:
-                            pass
+                attempts.append({
+                    "attempt": attempt + 1,
+                    "ms": round((time.monotonic() - attempt_started) * 1000, 1),
+                    "https_ok": https_ok,
+                    "http_ok": http_ok,
+                })
 
-            except Exception:
-                # ignore session-level errors; we'll retry
-                pass
-
-            if https_ok or http_ok:
-                logger.info(
-                    f"Services are ready (https_ok={https_ok}, http_ok={http_ok}, healthy={healthy_url})"
-                )
-                return {"https_ok": https_ok, "http_ok": http_ok, "healthy_url": healthy_url}
+                if https_ok or http_ok:
+                    logger.info(
+                        f"Services are ready (https_ok={https_ok}, http_ok={http_ok}, healthy={healthy_url})"
+                    )
+                    return {"https_ok": https_ok, "http_ok": http_ok, "healthy_url": healthy_url, "attempts": attempts}
 
-            if self.config.probe_http:
-                logger.debug(
-                    f"Attempt {attempt + 1}/{max_attempts}: Services not ready yet (https={https_url}, http={http_url})"
-                )
-            else:
-                logger.debug(
-                    f"Attempt {attempt + 1}/{max_attempts}: Services not ready yet (https={https_url})"
-                )
-            await asyncio.sleep(delay)
+                if self.config.probe_http:
+                    logger.debug(
+                        f"Attempt {attempt + 1}/{max_attempts}: Services not ready yet (https={https_url}, http={http_url})"
+                    )
+                else:
+                    logger.debug(
+                        f"Attempt {attempt + 1}/{max_attempts}: Services not ready yet (https={https_url})"
+                    )
+                if attempt + 1 < max_attempts:
+                    await asyncio.sleep(delay)
 
         logger.warning(
             f"Services did not become ready after {max_attempts} attempts. Will continue without readiness guarantee."
         )
-        return {"https_ok": https_ok, "http_ok": http_ok, "healthy_url": healthy_url}
+        return {"https_ok": https_ok, "http_ok": http_ok, "healthy_url": healthy_url, "attempts": attempts}
+
+    async def create_many(
+        self,
+        count: int,
+        concurrency: Optional[int] = None,
+        sandbox_id_prefix: Optional[str] = None,
+        enable_internet: bool = True,
+        wait_for_ready: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Create several sandboxes with bounded parallelism
+
+        Args:
+            count: Number of sandboxes to create
+            concurrency: Max sandboxes created at once (default: config.fleet_concurrency)
+            sandbox_id_prefix: Prefix for generated sandbox IDs (suffixed with an index)
+            enable_internet: Whether to enable internet access
+            wait_for_ready: Whether to wait for services to be ready
+
+        Returns:
+            Dictionary with per-sandbox results (in creation order) and collected errors
+        """
+        limit = max(1, int(concurrency or self.config.fleet_concurrency))
+        semaphore = asyncio.Semaphore(limit)
+        prefix = sandbox_id_prefix or f"sandbox_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+
+        async def _create_one(index: int) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.create_sandbox(
+                    sandbox_id=f"{prefix}_{index}",
+                    enable_internet=enable_internet,
+                    wait_for_ready=wait_for_ready,
+                )
+
+        logger.info("Creating %d sandboxes (concurrency=%d)", count, limit)
+        results = await asyncio.gather(*(_create_one(i) for i in range(count)))
+        errors = [
+            {"sandbox_id": r.get("sandbox_id"), "error": r.get("error")}
+            for r in results if not r.get("success")
+        ]
+        return {
+            "success": not errors,
+            "requested": count,
+            "created_count": count - len(errors),
+            "failed_count": len(errors),
+            "results": list(results),
+            "errors": errors,
+        }
+
+    async def _wait_for_ready_signal(self, sandbox, phase: Optional[str] = None, timeout: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Block inside the sandbox until startup.sh publishes a readiness phase (single remote call).
+
+        The wait polls local marker files every 100ms inside the sandbox, so it returns right after
+        the phase is reached instead of up to one public-URL poll interval later.
+
+        Args:
+            sandbox: The sandbox instance
+            phase: Phase to wait for (default: config.ready_phase)
+            timeout: Seconds to wait inside the sandbox (default: config.ready_timeout)
+
+        Returns:
+            Dict with keys: ready (bool), phase, failed (str|None), phases ({phase: ms since startup.sh start}), wait_ms
+        """
+        phase = phase or self.config.ready_phase
+        if phase not in READY_PHASES:
+            raise ValueError(f"Unknown readiness phase {phase!r}; expected one of {READY_PHASES}")
+        timeout = int(timeout or self.config.ready_timeout)
+        cmd = (
+            f"D={READY_DIR}; end=$((SECONDS+{timeout})); "
+            f"while [ ! -f $D/{phase} ] && [ ! -f $D/failed ] && [ $SECONDS -lt $end ]; do sleep 0.1; done; "
+            "cat $D/phases.jsonl 2>/dev/null; "
+            "if [ -f $D/failed ]; then echo \"FAILED: $(cat $D/failed)\"; fi; true"
+        )
+        started = time.monotonic()
+        phases: Dict[str, float] = {}
+        failed: Optional[str] = None
+        try:
+            out = await self._shell(sandbox, cmd, timeout=timeout + 15)
+        except Exception as e:
+            logger.warning("Readiness signal wait failed; falling back to /health polling: %s", str(e))
+            return {"ready": False, "phase": phase, "failed": str(e), "phases": phases, "wait_ms": None}
+        for line in (getattr(out, "stdout", "") or "").splitlines():
+            line = line.strip()
+            if line.startswith("FAILED:"):
+                failed = line[len("FAILED:"):].strip()
+                continue
+            try:
+                event = json.loads(line)
+                phases[event["phase"]] = event.get("elapsed_ms")
+            except (ValueError, KeyError, TypeError):
+                continue
+        wait_ms = round((time.monotonic() - started) * 1000, 1)
+        ready = phase in phases
+        if ready:
+            logger.info("Readiness phase %s reached (phases: %s)", phase, phases)
+        else:
+            logger.warning("Readiness phase %s not reached (failed=%s, phases=%s)", phase, failed, phases)
+        return {"ready": ready, "phase": phase, "failed": failed, "phases": phases, "wait_ms": wait_ms}
 
     async def list_sandboxes(self) -> Dict[str, Any]:
         """
@@ -745,11 +1950,13 @@ class E2BSandboxManager:
 
         for sandbox_id, entry in self.active_sandboxes.items():
             sandbox = entry["sandbox"]
+            paused = entry.get("state") == "paused"
             sandboxes_info.append({
                 "sandbox_id": sandbox_id,
-                "e2b_sandbox_id": sandbox.sandbox_id,
-                "public_url": self._get_public_url(sandbox),
-                "status": "active"
+                # Paused sandboxes restored from the registry have no handle until resumed
+                "e2b_sandbox_id": entry.get("e2b_sandbox_id") or (sandbox.sandbox_id if sandbox is not None else None),
+                "public_url": entry.get("public_url") or (self._get_public_url(sandbox) if sandbox is not None else None),
+                "status": "paused" if paused else "active"
             })
 
         return {
@@ -758,176 +1965,512 @@ class E2BSandboxManager:
             "sandboxes": sandboxes_info
         }
 
-    async def stop_sandbox(self, sandbox_id: str) -> Dict[str, Any]:
+    def _render_stop_script(self, graceful_timeout: float) -> str:
+        """Render the one-shot teardown script: signal startup.sh's process group, or pid files for older layouts."""
+        iterations = max(1, int(graceful_timeout * 10))
+        display = shlex.quote(f"Xvfb {self.config.display}")
+        return f"""#!/bin/bash
+# Generated by E2BSandboxManager: stop every startup.sh service in one call
+PGID=$(cat {SERVICES_PGID_FILE} 2>/dev/null || true)
+# Live (non-zombie) members of the group; exited services may linger as zombies until reaped
+group_alive() {{
+  ps -e -o pgid=,stat= | awk -v g="$PGID" '$1 == g && $2 !~ /^Z/ {{ found = 1 }} END {{ exit !found }}'
+}}
+if [ -n "$PGID" ] && group_alive; then
+  sudo kill -TERM -- "-$PGID" 2>/dev/null || true
+  for _ in $(seq 1 {iterations}); do
+    group_alive || break
+    sleep 0.1
+  done
+  if group_alive; then
+    sudo kill -KILL -- "-$PGID" 2>/dev/null || true
+    echo "STOP_FORCED"
+  fi
+  echo "STOPPED_GROUP $PGID"
+else
+  # Older startup.sh without a process group: one pid file (or pattern) per service
+  stop_pid() {{
+    if [ -f "$1" ]; then kill "$(cat "$1")" 2>/dev/null || true; rm -f "$1"; else pkill -f -- "$2" 2>/dev/null || true; fi
+  }}
+  stop_pid /home/user/mcp.pid "npm run start"
+  stop_pid /home/user/mcp-connect/mcp.pid "npm run start"
+  stop_pid /home/user/chrome.pid "--remote-debugging-port=9222"
+  stop_pid /home/user/novnc.pid websockify
+  stop_pid /home/user/x11vnc.pid x11vnc
+  stop_pid /home/user/fluxbox.pid fluxbox
+  stop_pid /home/user/xvfb.pid {display}
+  echo "STOPPED_PIDFILES"
+fi
+# nginx may predate startup.sh (image default) or run under its own sudo session
+sudo nginx -s quit 2>/dev/null || true
+rm -f {SERVICES_PGID_FILE} /home/user/startup_sh.pid
+"""
+
+    async def stop_sandbox(
+        self,
+        sandbox_id: str,
+        fast_kill: Optional[bool] = None,
+        graceful_timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
         """
         Stop and remove a sandbox
 
         Args:
             sandbox_id: The ID of the sandbox to stop
+            fast_kill: Skip the in-sandbox service stop and only destroy the sandbox
+                (default: config.stop_fast_kill)
+            graceful_timeout: Seconds services get after SIGTERM before SIGKILL
+                (default: config.stop_graceful_timeout)
 
         Returns:
             Dictionary containing operation status
         """
         try:
             if sandbox_id not in self.active_sandboxes:
-                return {
-                    "success": False,
-                    "error": f"Sandbox {sandbox_id} not found"
-                }
+                return _not_found(sandbox_id)
 
+            timer = _PhaseTimer()
             sandbox_entry = self.active_sandboxes[sandbox_id]
             sandbox = sandbox_entry["sandbox"]
+            fast_kill = self.config.stop_fast_kill if fast_kill is None else fast_kill
+            if sandbox_entry.get("state") == "paused":
+                # Nothing runs inside a paused sandbox; a handle-less one (restored from the
+                # registry) has to be reattached, which resumes it, before it can be killed
+                fast_kill = True
+                if sandbox is None:
+                    with timer.phase("reattach"):
+                        sandbox = await self._to_thread(self._connect_existing, sandbox_entry["e2b_sandbox_id"])
+            graceful_timeout = self.config.stop_graceful_timeout if graceful_timeout is None else graceful_timeout
 
             logger.info(f"Stopping sandbox: {sandbox_id}")
 
-            # Cancel keepalive task if running
-            try:
-                task = sandbox_entry.get("keepalive_task")
-                if task:
-                    task.cancel()
-            except Exception:
-                pass
-            try:
-                ptask = sandbox_entry.get("platform_keepalive_task")
-                if ptask:
-                    ptask.cancel()
-            except Exception:
-                pass
+            # Stop health/keepalive probing
+            self.prober.unregister(sandbox_id)
 
-            # Attempt to terminate services gracefully even if detached
-            stop_cmds = [
-                "bash -lc 'if [ -f /home/user/mcp-connect/mcp.pid ]; then kill $(cat /home/user/mcp-connect/mcp.pid) 2>/dev/null || true; rm -f /home/user/mcp-connect/mcp.pid; else pkill -f \"npm run start\" 2>/dev/null || true; fi'",
-                "sudo nginx -s quit",
-                "bash -lc 'if [ -f /home/user/chrome.pid ]; then kill $(cat /home/user/chrome.pid) 2>/dev/null || true; rm -f /home/user/chrome.pid; else pkill -f -- \"--remote-debugging-port=9222\" 2>/dev/null || true; fi'",
-                "bash -lc 'if [ -f /home/user/novnc.pid ]; then kill $(cat /home/user/novnc.pid) 2>/dev/null || true; rm -f /home/user/novnc.pid; else pkill -f websockify 2>/dev/null || true; fi'",
-                "bash -lc 'if [ -f /home/user/x11vnc.pid ]; then kill $(cat /home/user/x11vnc.pid) 2>/dev/null || true; rm -f /home/user/x11vnc.pid; else pkill -f x11vnc 2>/dev/null || true; fi'",
-                "bash -lc 'if [ -f /home/user/fluxbox.pid ]; then kill $(cat /home/user/fluxbox.pid) 2>/dev/null || true; rm -f /home/user/fluxbox.pid; else pkill -x fluxbox 2>/dev/null || true; fi'",
-                f"bash -lc 'if [ -f /home/user/xvfb.pid ]; then kill $(cat /home/user/xvfb.pid) 2>/dev/null || true; rm -f /home/user/xvfb.pid; else pkill -f \"Xvfb {self.config.display}\" 2>/dev/null || true; fi'",
-            ]
-            for cmd in stop_cmds:
+            # Terminate all services with one remote call (the sandbox is destroyed right after anyway)
+            services_stop = "skipped"
+            if not fast_kill:
                 try:
-                    await self._run(sandbox, cmd, background=False, cwd="/home/user")
-                except Exception:
-                    pass
+                    timer.start("services_stop")
+                    out = await self._shell(
+                        sandbox,
+                        self._render_stop_script(graceful_timeout),
+                        timeout=int(graceful_timeout) + 30,
+                    )
+                    stdout = getattr(out, "stdout", "") or ""
+                    if "STOPPED_GROUP" in stdout:
+                        services_stop = "forced" if "STOP_FORCED" in stdout else "group"
+                    else:
+                        services_stop = "pidfiles"
+                except Exception as e:
+                    logger.debug("In-sandbox service stop failed for %s: %s", sandbox_id, str(e))
+                    services_stop = "failed"
+                finally:
+                    timer.stop("services_stop")
             # Stop the sandbox itself
-            await self._kill(sandbox)
+            with timer.phase("sdk_kill"):
+                await self._kill(sandbox)
 
             # Remove from active sandboxes
             del self.active_sandboxes[sandbox_id]
+            self._forget(sandbox_id)
 
+            record = self._emit_timing("stop", sandbox_id, timer, True, services_stop=services_stop)
             return {
                 "success": True,
-                "message": f"Sandbox {sandbox_id} stopped successfully"
+                "message": f"Sandbox {sandbox_id} stopped successfully",
+                "services_stop": services_stop,
+                "timings_ms": record["timings_ms"],
             }
 
         except Exception as e:
             logger.error(f"Failed to stop sandbox: {str(e)}")
-            return {
+            result = {
                 "success": False,
                 "error": str(e)
             }
+            if "timer" in locals():
+                timer.stop_all()
+                result["timings_ms"] = self._emit_timing("stop", sandbox_id, timer, False, error=str(e))["timings_ms"]
+            return result
 
-    async def stop_all_sandboxes(self) -> Dict[str, Any]:
+    async def stop_all_sandboxes(self, concurrency: Optional[int] = None, fast_kill: Optional[bool] = None) -> Dict[str, Any]:
         """
-        Stop all active sandboxes
+        Stop all active sandboxes in parallel
+
+        Args:
+            concurrency: Max sandboxes stopped at once (default: config.fleet_concurrency)
+            fast_kill: Skip the in-sandbox service stop (default: config.stop_fast_kill)
 
         Returns:
             Dictionary containing operation status
         """
-        results = []
+        limit = max(1, int(concurrency or self.config.fleet_concurrency))
+        semaphore = asyncio.Semaphore(limit)
 
-        for sandbox_id in list(self.active_sandboxes.keys()):
-            result = await self.stop_sandbox(sandbox_id)
-            results.append({
+        async def _stop_one(sandbox_id: str) -> Dict[str, Any]:
+            async with semaphore:
+                result = await self.stop_sandbox(sandbox_id, fast_kill=fast_kill)
+            entry = {
                 "sandbox_id": sandbox_id,
                 "stopped": result["success"]
-            })
+            }
+            if not result["success"]:
+                entry["error"] = result.get("error")
+            return entry
+
+        results = await asyncio.gather(*(_stop_one(sid) for sid in list(self.active_sandboxes.keys())))
+
+        return {
+            "success": all(r["stopped"] for r in results),
+            "stopped_count": sum(1 for r in results if r["stopped"]),
+            "results": list(results)
+        }
+
+    def get_health(self, sandbox_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Return prober health history
+
+        Args:
+            sandbox_id: Limit to one sandbox (default: all active sandboxes)
+
+        Returns:
+            Dictionary with per-sandbox latency, consecutive failures and recent probe history
+        """
+        if sandbox_id is not None:
+            record = self.prober.get(sandbox_id)
+            if record is None:
+                return _not_found(sandbox_id)
+            return {"success": True, "health": record}
+        return {"success": True, "health": self.prober.snapshot()}
+
+    async def get_stats(self, sandbox_id: str, include_samples: bool = False) -> Dict[str, Any]:
+        """
+        Read the in-sandbox resource sampler's ring buffer for one sandbox
+
+        Args:
+            sandbox_id: Sandbox to read
+            include_samples: Also return the raw samples (oldest first)
+
+        Returns:
+            Dictionary with per-service CPU %, RSS and fd counts (latest, average, peak and growth
+            over the sampled window) plus the sandbox's memory size and CPU count
+        """
+        entry = self.active_sandboxes.get(sandbox_id)
+        if entry is None:
+            return _not_found(sandbox_id)
+        if entry.get("state") != "running":
+            return {"success": False, "sandbox_id": sandbox_id, "error": f"Sandbox {sandbox_id} is {entry.get('state')}"}
+        try:
+            out = await self._shell(entry["sandbox"], f"cat {STATS_FILE} 2>/dev/null || true")
+            data = json.loads((getattr(out, "stdout", "") or "").strip() or "null")
+        except Exception as e:
+            return {"success": False, "sandbox_id": sandbox_id, "error": f"Failed to read stats: {e}"}
+        if not isinstance(data, dict) or not data.get("samples"):
+            return {
+                "success": False,
+                "sandbox_id": sandbox_id,
+                "error": "No resource samples (startup.sh not running under supervisor.py?)",
+            }
+
+        samples = data["samples"]
+        system = samples[-1].get("system") or {}
+        result = {
+            "success": True,
+            "sandbox_id": sandbox_id,
+            "interval_s": data.get("interval_s"),
+            "samples": len(samples),
+            "window_s": round((samples[-1]["ts_ms"] - samples[0]["ts_ms"]) / 1000.0, 1),
+            "sampled_at": datetime.fromtimestamp(samples[-1]["ts_ms"] / 1000.0).isoformat(),
+            "cpus": data.get("cpus"),
+            "mem_total_bytes": system.get("mem_total_bytes"),
+            "mem_available_bytes": system.get("mem_available_bytes"),
+            "services": _summarize_stats(samples),
+        }
+        if include_samples:
+            result["history"] = samples
+        return result
+
+    async def get_fleet_stats(self, concurrency: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Aggregate get_stats over every running sandbox, for right-sizing template variants
+
+        Args:
+            concurrency: Max sandboxes read at once (default: config.fleet_concurrency)
+
+        Returns:
+            Dictionary with per-service distributions across sandboxes (p50/p95/max of peak RSS,
+            average and peak CPU %, peak fds/processes), per-sandbox totals and sandboxes that
+            could not be read
+        """
+        limit = max(1, int(concurrency or self.config.fleet_concurrency))
+        semaphore = asyncio.Semaphore(limit)
+        running = [sid for sid, entry in self.active_sandboxes.items() if entry.get("state") == "running"]
+
+        async def _read_one(sandbox_id: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.get_stats(sandbox_id)
+
+        results = await asyncio.gather(*(_read_one(sid) for sid in running))
+        per_service: Dict[str, Dict[str, List[float]]] = {}
+        totals: Dict[str, List[float]] = {"rss_bytes_max": [], "cpu_pct_avg": [], "mem_used_pct": []}
+        errors = []
+        for result in results:
+            if not result.get("success"):
+                errors.append({"sandbox_id": result.get("sandbox_id"), "error": result.get("error")})
+                continue
+            rss_sum = 0
+            cpu_sum = 0.0
+            for name, values in result["services"].items():
+                bucket = per_service.setdefault(name, {"rss_bytes_max": [], "cpu_pct_avg": [], "cpu_pct_max": [],
+                                                       "fds_max": [], "procs_max": []})
+                for key in bucket:
+                    if values.get(key) is not None:
+                        bucket[key].append(values[key])
+                rss_sum += values.get("rss_bytes_max") or 0
+                cpu_sum += values.get("cpu_pct_avg") or 0.0
+            totals["rss_bytes_max"].append(rss_sum)
+            totals["cpu_pct_avg"].append(cpu_sum)
+            mem_total = result.get("mem_total_bytes")
+            mem_available = result.get("mem_available_bytes")
+            if mem_total and mem_available is not None:
+                totals["mem_used_pct"].append((mem_total - mem_available) / mem_total * 100.0)
+
+        def _dist(values: List[float]) -> Dict[str, Optional[float]]:
+            return {"p50": percentile(values, 50), "p95": percentile(values, 95),
+                    "max": round(max(values), 1) if values else None}
 
         return {
             "success": True,
-            "stopped_count": len(results),
-            "results": results
+            "template_id": self.config.template_id,
+            "sandboxes": len(results) - len(errors),
+            "services": {
+                name: dict({key: _dist(values) for key, values in bucket.items()}, sandboxes=len(bucket["rss_bytes_max"]))
+                for name, bucket in sorted(per_service.items())
+            },
+            "per_sandbox": {
+                "rss_bytes_max": _dist(totals["rss_bytes_max"]),
+                "cpu_pct_avg": _dist(totals["cpu_pct_avg"]),
+                "mem_used_pct": _dist(totals["mem_used_pct"]),
+            },
+            "errors": errors,
         }
 
-    async def _keepalive_loop(self, sandbox_id: str) -> None:
-        """Periodically ping the public URL to avoid idle eviction and refresh mapping.
+    async def _gateway_idle_seconds(self, sandbox_id: str) -> Optional[float]:
+        """Seconds since the last gateway request (nginx access.log mtime) or manager-side activity.
 
-        This loop will:
-        - Probe both HTTPS and HTTP /health endpoints (TLS verification disabled for self-signed)
-        - Prefer HTTPS when both are healthy
-        - Log status each cycle
+        nginx logs websocket and SSE requests (noVNC, streamable /mcp) only when they close, so any
+        open proxied connection counts as activity (0 seconds idle). Those are counted on nginx's
+        upstream side (to mcp-connect and websockify): nginx keeps no idle upstream connections, so
+        unlike the gateway port this excludes the prober's keep-alive connections.
         """
+        entry = self.active_sandboxes.get(sandbox_id)
+        if not entry or entry.get("state") != "running":
+            return None
+        since_activity = time.time() - entry.get("last_activity", time.time())
+        upstream = f"( dport = :{self.config.port} or dport = :{self.config.novnc_port} )"
+        out = await self._shell(
+            entry["sandbox"],
+            "stat -c %Y /var/log/nginx/access.log 2>/dev/null || echo 0; date +%s; "
+            f"ss -Htn state established {shlex.quote(upstream)} 2>/dev/null | wc -l",
+        )
         try:
-            import httpx
-        except Exception:
-            logger.warning("httpx not installed; disabling keepalive probes.")
+            last_request, now, open_connections = [int(v) for v in (getattr(out, "stdout", "") or "").split()[:3]]
+        except ValueError:
+            return since_activity
+        if open_connections:
+            return 0.0
+        # Both access.log values use the sandbox clock; the manager activity uses ours
+        return min(since_activity, float(now - last_request))
+
+    def touch(self, sandbox_id: str) -> None:
+        """Record activity that does not pass through the sandbox gateway (resets the idle window)."""
+        entry = self.active_sandboxes.get(sandbox_id)
+        if entry is not None:
+            entry["last_activity"] = time.time()
+
+    async def _hibernate_if_idle(self, sandbox_id: str) -> None:
+        entry = self.active_sandboxes.get(sandbox_id)
+        if not entry or not entry.get("hibernate", True):
             return
-        interval = max(5, int(self.config.keepalive_interval))  # floor to >=5s
-        while True:
-            try:
-                entry = self.active_sandboxes.get(sandbox_id)
-                if not entry:
-                    return
-                sandbox = entry["sandbox"]
-                https_url = self._get_public_url(sandbox, secure=True)
-                http_url = self._get_public_url(sandbox, secure=False) if self.config.probe_http else None
+        idle = await self._gateway_idle_seconds(sandbox_id)
+        if idle is not None and idle >= self.config.hibernate_idle_seconds:
+            logger.info("Sandbox %s idle for %.0fs; hibernating", sandbox_id, idle)
+            await self.hibernate_sandbox(sandbox_id)
+
+    async def _memory_used(self, sandbox: Any) -> Optional[int]:
+        """Latest mem_used (bytes) from the SDK sandbox metrics, when the SDK exposes them."""
+        fn = getattr(sandbox, "get_metrics", None)
+        if fn is None:
+            return None
+        try:
+            metrics = await self._call(fn)
+        except Exception as e:
+            logger.debug("Sandbox metrics unavailable: %s", str(e))
+            return None
+        if not metrics:
+            return None
+        return getattr(metrics[-1], "mem_used", None)
 
-                https_ok = False
-                http_ok = False
-                async with httpx.AsyncClient(verify=False, timeout=5) as client:
-                    try:
-                        r1 = await client.get(f"{https_url}/health")
-                        https_ok = (r1.status_code == 200)
-                    except Exception:
-                        https_ok = False
-                    if http_url:
-                        try:
-                            r2 = await client.get(f"{http_url}/health")
-                            http_ok = (r2.status_code == 200)
-                        except Exception:
-                            http_ok = False
+    async def hibernate_sandbox(self, sandbox_id: str) -> Dict[str, Any]:
+        """
+        Pause a running sandbox with its memory snapshot (bootstrapped services included)
 
-                if https_ok or http_ok:
-                    chosen = https_url if https_ok else (http_url or "")
-                    if self.config.probe_http:
-                        logger.debug("Keepalive OK for %s (https=%s, http=%s)", sandbox_id, https_ok, http_ok)
-                    else:
-                        logger.debug("Keepalive OK for %s (https=%s)", sandbox_id, https_ok)
-                else:
-                    if self.config.probe_http:
-                        logger.warning("Keepalive probe failed for %s (https=%s, http=%s)", sandbox_id, https_ok, http_ok)
-                    else:
-                        logger.warning("Keepalive probe failed for %s (https=%s)", sandbox_id, https_ok)
-                await asyncio.sleep(interval)
-            except asyncio.CancelledError:
-                return
-            except Exception as e:
-                logger.debug("Keepalive loop error: %s", str(e))
-                await asyncio.sleep(interval)
+        Probing stops while the sandbox is paused, so it is not kept warm by health pings.
 
-    async def _platform_keepalive_loop(self, sandbox_id: str) -> None:
-        """Ping the sandbox with a no-op command periodically to keep session active."""
-        interval = max(10, int(self.config.platform_keepalive_interval))
-        while True:
-            try:
-                entry = self.active_sandboxes.get(sandbox_id)
-                if not entry:
-                    return
+        Args:
+            sandbox_id: The ID of the sandbox to pause
+
+        Returns:
+            Dictionary with pause_ms and the memory in use when it was paused
+        """
+        entry = self.active_sandboxes.get(sandbox_id)
+        if entry is None:
+            return _not_found(sandbox_id)
+        if entry.get("state") == "paused":
+            return {"success": True, "sandbox_id": sandbox_id, "already_paused": True}
+        sandbox = entry["sandbox"]
+        pause = getattr(sandbox, "pause", None) or getattr(sandbox, "beta_pause", None)
+        if pause is None:
+            return {"success": False, "error": "This version of the e2b SDK does not support pausing sandboxes"}
+
+        timer = _PhaseTimer()
+        mem_used = await self._memory_used(sandbox)
+        self.prober.unregister(sandbox_id)
+        # The session's output stream does not survive a pause; a fresh one starts after resume
+        await self._close_session(sandbox, kill=True)
+        try:
+            with timer.phase("pause"):
+                await self._call(pause)
+        except Exception as e:
+            logger.error("Failed to hibernate sandbox %s: %s", sandbox_id, str(e))
+            self.prober.register(sandbox_id)
+            return {"success": False, "error": str(e)}
+        entry.update({"state": "paused", "paused_at": time.time(), "mem_used_bytes": mem_used})
+        self._persist(sandbox_id)
+        record = self._emit_timing("hibernate", sandbox_id, timer, True, mem_used_bytes=mem_used)
+        logger.info("Sandbox %s hibernated in %sms", sandbox_id, record["timings_ms"]["pause"])
+        return {
+            "success": True,
+            "sandbox_id": sandbox_id,
+            "pause_ms": record["timings_ms"]["pause"],
+            "mem_used_bytes": mem_used,
+        }
+
+    async def resume_sandbox(self, sandbox_id: str) -> Dict[str, Any]:
+        """
+        Resume a hibernated sandbox and wait until its gateway answers /health again
+
+        Args:
+            sandbox_id: The ID of the sandbox to resume
+
+        Returns:
+            Dictionary with resume_ms (SDK resume + first healthy probe), paused_seconds and
+            memory_saved_bytes / memory_saved_gb_hours (memory released while paused)
+        """
+        entry = self.active_sandboxes.get(sandbox_id)
+        if entry is None:
+            return _not_found(sandbox_id)
+        if entry.get("state") != "paused":
+            return {"success": True, "sandbox_id": sandbox_id, "already_running": True}
+
+        timer = _PhaseTimer()
+        try:
+            with timer.phase("sdk_resume"):
                 sandbox = entry["sandbox"]
-                # Execute a very cheap no-op
-                await self._run(sandbox, "bash -lc 'true'", False)
-                await asyncio.sleep(interval)
-            except asyncio.CancelledError:
-                return
-            except Exception as e:
-                logger.debug("Platform keepalive error: %s", str(e))
-                await asyncio.sleep(interval)
+                connect = getattr(sandbox, "connect", None) if sandbox is not None else None
+                if connect is not None:
+                    resumed = await self._call(connect)
+                    sandbox = resumed if resumed is not None and hasattr(resumed, "commands") else sandbox
+                else:
+                    sandbox = await self._to_thread(self._connect_existing, entry["e2b_sandbox_id"])
+            with timer.phase("health_probe"):
+                ready = await self._wait_for_services(
+                    sandbox,
+                    self._get_public_url(sandbox, secure=True),
+                    self._get_public_url(sandbox, secure=False),
+                    max_attempts=40,
+                    delay=0.25,
+                )
+        except Exception as e:
+            logger.error("Failed to resume sandbox %s: %s", sandbox_id, str(e))
+            timer.stop_all()
+            self._emit_timing("resume", sandbox_id, timer, False, error=str(e))
+            return {"success": False, "error": str(e)}
+
+        paused_seconds = time.time() - entry.get("paused_at", time.time())
+        mem_used = entry.get("mem_used_bytes")
+        entry.update({"sandbox": sandbox, "state": "running", "last_activity": time.time()})
+        entry.pop("paused_at", None)
+        self._persist(sandbox_id)
+        self.prober.register(sandbox_id)
+        record = self._emit_timing(
+            "resume", sandbox_id, timer, True,
+            paused_seconds=round(paused_seconds, 1),
+            memory_saved_bytes=mem_used,
+        )
+        return {
+            "success": True,
+            "sandbox_id": sandbox_id,
+            "resume_ms": record["timings_ms"]["total"],
+            "timings_ms": record["timings_ms"],
+            "healthy": bool(ready.get("https_ok") or ready.get("http_ok")),
+            "paused_seconds": round(paused_seconds, 1),
+            "memory_saved_bytes": mem_used,
+            "memory_saved_gb_hours": (
+                round(mem_used / 1024 ** 3 * paused_seconds / 3600, 4) if mem_used is not None else None
+            ),
+        }
+
+    async def ensure_running(self, sandbox_id: str) -> Dict[str, Any]:
+        """Resume the sandbox if it is hibernated (call before handing it to a client)."""
+        entry = self.active_sandboxes.get(sandbox_id)
+        if entry is None:
+            return _not_found(sandbox_id)
+        if entry.get("state") == "paused":
+            return await self.resume_sandbox(sandbox_id)
+        self.touch(sandbox_id)
+        return {"success": True, "sandbox_id": sandbox_id, "already_running": True}
 
     # ---------------- Helper abstraction layer for async vs legacy sandbox APIs ----------------
     @staticmethod
     def _is_coro(obj: Any) -> bool:
         return asyncio.iscoroutine(obj) or asyncio.isfuture(obj)
 
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=max(1, int(self.config.sync_worker_threads)),
+                thread_name_prefix="e2b-sync",
+            )
+        return self._executor
+
+    async def _to_thread(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a blocking SDK call on the manager's dedicated thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), functools.partial(fn, *args, **kwargs))
+
+    async def _call(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Await async SDK methods directly; offload sync (blocking) ones to the thread pool."""
+        if asyncio.iscoroutinefunction(fn):
+            return await fn(*args, **kwargs)
+        result = await self._to_thread(fn, *args, **kwargs)
+        if self._is_coro(result):
+            return await result
+        return result
+
+    async def shutdown(self) -> None:
+        """Stop the health prober and release the thread pool (call once the manager is no longer used)."""
+        await self.prober.close()
+        for key in list(self._sessions):
+            await self._close_session_future(self._sessions.pop(key))
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        if self.registry is not None:
+            self.registry.close()
+            self.registry = None
+
     async def _run(self, sandbox: Any, *args, **kwargs) -> Any:
         """Invoke sandbox.commands.run handling async or sync implementations."""
         runner = getattr(sandbox, 'commands', None)
@@ -936,34 +2479,379 @@ class E2BSandboxManager:
         fn = getattr(runner, 'run', None)
         if fn is None:
             raise RuntimeError("Sandbox.commands missing 'run' method")
+        return await self._call(fn, *args, **kwargs)
+
+    async def _start_session(self, sandbox: Any) -> Optional[CommandSession]:
+        session = CommandSession(self, sandbox)
         try:
-            result = fn(*args, **kwargs)
-            if self._is_coro(result):  # Async API
-                return await result
-            # Legacy returns an object directly
-            return result
+            await session.start()
+        except Exception as e:
+            logger.debug("Command session unavailable; using one command per call: %s", str(e))
+            await session.close()
+            return None
+        return session
+
+    async def _session(self, sandbox: Any) -> Optional[CommandSession]:
+        """The sandbox's command session, started on first use and restarted after it ended."""
+        if not self.config.command_session:
+            return None
+        key = sandbox.sandbox_id
+        future = self._sessions.get(key)
+        if future is not None and future.done():
+            if future.cancelled() or future.exception() is not None:
+                future = None
+            elif future.result() is not None and future.result().closed:
+                # An ended session is replaced; a None result (unsupported) is kept
+                future = None
+        if future is None:
+            future = asyncio.ensure_future(self._start_session(sandbox))
+            self._sessions[key] = future
+        return await asyncio.shield(future)
+
+    async def _close_session(self, sandbox: Any, kill: bool = False) -> None:
+        """Forget the sandbox's session; kill=False skips the remote kill when the sandbox goes away anyway."""
+        future = self._sessions.pop(sandbox.sandbox_id, None)
+        if future is not None:
+            await self._close_session_future(future, kill=kill)
+
+    @staticmethod
+    async def _close_session_future(future: "asyncio.Future[Optional[CommandSession]]", kill: bool = True) -> None:
+        # A session still starting is waited for, so its bash handle and reader thread are not leaked
+        if future.cancelled():
+            return
+        try:
+            session = await asyncio.shield(future)
         except Exception:
-            # Some legacy variants may require threading if blocking; fallback
-            return await asyncio.to_thread(fn, *args, **kwargs)
+            return
+        if session is not None:
+            await session.close(kill=kill)
+
+    async def _shell(self, sandbox: Any, command: str, cwd: Optional[str] = "/home/user",
+                     envs: Optional[Dict[str, str]] = None, timeout: Optional[float] = 60) -> Any:
+        """Run a shell command through the sandbox's command session (one-shot commands.run as fallback).
+
+        The fallback only runs when the session could not be started or was already closed, i.e.
+        when the command was never sent; commands need not be idempotent. Other session failures
+        (e.g. the session ending while the command ran) are raised.
 
-    async def _write(self, sandbox: Any, path: str, content: str) -> None:
+        Returns an object with stdout/stderr/exit_code; a non-zero exit raises SessionCommandError
+        (session) or CommandExitException (fallback).
+        """
+        session = await self._session(sandbox)
+        if session is not None:
+            try:
+                return await session.run(command, cwd=cwd, envs=envs, timeout=timeout)
+            except SessionUnavailableError as e:
+                logger.debug("Command session unavailable; running as a one-shot command: %s", str(e))
+        return await self._run(sandbox, command, background=False, cwd=cwd, envs=envs, timeout=timeout)
+
+    async def _write(self, sandbox: Any, path: str, content: Union[str, bytes]) -> None:
         files = getattr(sandbox, 'files', None)
         if files is None:
             raise RuntimeError("Sandbox object missing 'files' interface")
         fn = getattr(files, 'write', None)
         if fn is None:
             raise RuntimeError("Sandbox.files missing 'write' method")
-        result = fn(path, content)
-        if self._is_coro(result):
-            await result
+        await self._call(fn, path, content)
 
     async def _kill(self, sandbox: Any) -> None:
+        await self._close_session(sandbox)
         fn = getattr(sandbox, 'kill', None)
         if fn is None:
             return
-        result = fn()
-        if self._is_coro(result):
-            await result
+        await self._call(fn)
+
+
+class SandboxPool:
+    """Warm pool of bootstrapped, health-checked sandboxes for one manager/template.
+
+    The pool keeps ``min_size`` idle sandboxes ready so that ``acquire()`` can hand one
+    out without paying the cold create/bootstrap/readiness path. Use one pool per
+    template (i.e. per E2BSandboxManager).
+    """
+
+    # Idle sandboxes older than this fraction of config.timeout are discarded, not handed out
+    STALE_FRACTION = 0.9
+
+    def __init__(
+        self,
+        manager: E2BSandboxManager,
+        min_size: Optional[int] = None,
+        max_size: Optional[int] = None,
+        acquire_timeout: Optional[float] = None,
+    ):
+        """
+        Initialize the pool
+
+        Args:
+            manager: Manager used to create and stop pooled sandboxes
+            min_size: Idle sandboxes to keep ready (default: config.pool_min_size)
+            max_size: Cap on idle + leased sandboxes, 0 for no cap (default: config.pool_max_size)
+            acquire_timeout: Seconds to wait when the pool is at max_size (default: config.pool_acquire_timeout)
+        """
+        cfg = manager.config
+        self.manager = manager
+        self.min_size = max(0, int(cfg.pool_min_size if min_size is None else min_size))
+        self.max_size = max(0, int(cfg.pool_max_size if max_size is None else max_size))
+        if self.max_size and self.max_size < self.min_size:
+            raise ValueError("pool max_size must be 0 (unbounded) or >= min_size")
+        self.acquire_timeout = float(cfg.pool_acquire_timeout if acquire_timeout is None else acquire_timeout)
+
+        self._idle: List[Dict[str, Any]] = []
+        self._leased: Dict[str, Dict[str, Any]] = {}
+        self._born: Dict[str, float] = {}
+        self._creating = 0
+        self._closed = False
+        self._cond: Optional[asyncio.Condition] = None  # created lazily inside the running loop
+        self._tasks: Set[asyncio.Task] = set()
+
+        self.hits = 0
+        self.misses = 0
+        self.recycled = 0
+        self.discarded = 0
+
+    @property
+    def _lock(self) -> asyncio.Condition:
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        return self._cond
+
+    def _total(self) -> int:
+        return len(self._idle) + len(self._leased) + self._creating
+
+    def _has_capacity(self) -> bool:
+        return not self.max_size or self._total() < self.max_size
+
+    def _next_id(self) -> str:
+        # uuid suffix: ids must not collide across pools or across manager restarts
+        return f"pool_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:12]}"
+
+    def _is_stale(self, sandbox_id: str) -> bool:
+        if sandbox_id not in self.manager.active_sandboxes:
+            return True
+        born = self._born.get(sandbox_id)
+        if born is None or not self.manager.config.timeout:
+            return False
+        return (time.monotonic() - born) > self.manager.config.timeout * self.STALE_FRACTION
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _create(self) -> Dict[str, Any]:
+        """Create one sandbox and keep it only if it passed the readiness probe.
+
+        Returns the create_sandbox result; ``success`` is False when creation or the probe failed.
+        """
+        result = await self.manager.create_sandbox(sandbox_id=self._next_id(), wait_for_ready=True)
+        if not result.get("success"):
+            logger.warning("Pool sandbox creation failed: %s", result.get("error"))
+            return result
+        sandbox_id = result["sandbox_id"]
+        # Warm pool members must stay warm; never hibernate them
+        self.manager.active_sandboxes[sandbox_id]["hibernate"] = False
+        probes = result.get("probes") or {}
+        if not (probes.get("https_ok") or probes.get("http_ok")):
+            logger.warning("Pool sandbox %s failed health check; discarding", sandbox_id)
+            self.discarded += 1
+            await self.manager.stop_sandbox(sandbox_id, fast_kill=True)
+            return {"success": False, "sandbox_id": sandbox_id, "error": "Sandbox failed its readiness probe"}
+        self._born[sandbox_id] = time.monotonic()
+        return result
+
+    async def _replenish_one(self) -> None:
+        try:
+            result = await self._create()
+        finally:
+            self._creating -= 1
+        async with self._lock:
+            if result.get("success"):
+                if self._closed:
+                    self._spawn(self._discard(result["sandbox_id"]))
+                else:
+                    self._idle.append(result)
+            self._lock.notify_all()
+
+    def _schedule_replenish(self) -> None:
+        """Start background creations until idle + in-flight reaches min_size (within max_size)."""
+        if self._closed:
+            return
+        while len(self._idle) + self._creating < self.min_size and self._has_capacity():
+            self._creating += 1
+            self._spawn(self._replenish_one())
+
+    async def _discard(self, sandbox_id: str) -> None:
+        self._born.pop(sandbox_id, None)
+        try:
+            await self.manager.stop_sandbox(sandbox_id, fast_kill=True)
+        except Exception as e:
+            logger.warning("Failed to stop pooled sandbox %s: %s", sandbox_id, str(e))
+
+    async def start(self, wait: bool = True) -> Dict[str, Any]:
+        """
+        Fill the pool up to min_size
+
+        Args:
+            wait: Whether to wait until the initial sandboxes are ready
+
+        Returns:
+            Pool statistics after filling
+        """
+        async with self._lock:
+            self._schedule_replenish()
+            pending = list(self._tasks)
+        if wait and pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        return self.stats()
+
+    async def acquire(self) -> Dict[str, Any]:
+        """
+        Lease a ready sandbox, falling back to a cold create on a pool miss
+
+        Returns:
+            The create_sandbox result dict, plus pool_hit and acquire_ms keys
+        """
+        started = time.monotonic()
+        deadline = started + self.acquire_timeout
+        while True:
+            async with self._lock:
+                if self._closed:
+                    return {"success": False, "error": "Sandbox pool is closed"}
+                while self._idle:
+                    entry = self._idle.pop(0)
+                    sandbox_id = entry["sandbox_id"]
+                    if self._is_stale(sandbox_id):
+                        self.discarded += 1
+                        self._spawn(self._discard(sandbox_id))
+                        continue
+                    self.hits += 1
+                    self._leased[sandbox_id] = entry
+                    self._schedule_replenish()
+                    return {
+                        **entry,
+                        "pool_hit": True,
+                        "acquire_ms": round((time.monotonic() - started) * 1000, 3),
+                    }
+                if self._has_capacity():
+                    self.misses += 1
+                    self._creating += 1
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return {"success": False, "error": "Timed out waiting for a pooled sandbox"}
+                    try:
+                        await asyncio.wait_for(self._lock.wait(), remaining)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+            # Pool miss: pay the cold path outside the lock, with the same checks as pool members
+            try:
+                result = await self._create()
+            finally:
+                self._creating -= 1
+            async with self._lock:
+                if result.get("success"):
+                    self._leased[result["sandbox_id"]] = result
+                self._schedule_replenish()
+                self._lock.notify_all()
+            return {
+                **result,
+                "pool_hit": False,
+                "acquire_ms": round((time.monotonic() - started) * 1000, 3),
+            }
+
+    async def release(self, sandbox_id: str, recycle: bool = False) -> Dict[str, Any]:
+        """
+        Return a leased sandbox to the pool
+
+        Args:
+            sandbox_id: ID returned by acquire()
+            recycle: Put the sandbox back into the idle set if it is still healthy;
+                otherwise (default) it is killed and replaced in the background
+
+        Returns:
+            Dictionary containing operation status
+        """
+        async with self._lock:
+            entry = self._leased.pop(sandbox_id, None)
+        if entry is None:
+            return {"success": False, "error": f"Sandbox {sandbox_id} is not leased from this pool"}
+
+        recycled = False
+        if recycle and not self._closed and not self._is_stale(sandbox_id) and len(self._idle) < max(self.min_size, 1):
+            sandbox = self.manager.active_sandboxes[sandbox_id]["sandbox"]
+            probe = await self.manager._wait_for_services(
+                sandbox,
+                self.manager._get_public_url(sandbox, secure=True),
+                self.manager._get_public_url(sandbox, secure=False),
+                max_attempts=1,
+                delay=0,
+            )
+            recycled = bool(probe.get("https_ok") or probe.get("http_ok"))
+
+        async with self._lock:
+            if recycled:
+                self.recycled += 1
+                self._idle.append(entry)
+            else:
+                self.discarded += 1
+                self._spawn(self._discard(sandbox_id))
+                self._schedule_replenish()
+            self._lock.notify_all()
+
+        return {"success": True, "sandbox_id": sandbox_id, "recycled": recycled}
+
+    def is_leased(self, sandbox_id: str) -> bool:
+        """Whether the sandbox is currently leased from this pool."""
+        return sandbox_id in self._leased
+
+    def idle_ids(self) -> List[str]:
+        """IDs of the warm sandboxes waiting to be leased."""
+        return [entry["sandbox_id"] for entry in self._idle]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return pool occupancy and hit/miss counters."""
+        lookups = self.hits + self.misses
+        return {
+            "template_id": self.manager.config.template_id,
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+            "idle": len(self._idle),
+            "leased": len(self._leased),
+            "creating": self._creating,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            "recycled": self.recycled,
+            "discarded": self.discarded,
+        }
+
+    async def close(self, stop_leased: bool = False) -> Dict[str, Any]:
+        """
+        Stop idle sandboxes (and optionally leased ones) and stop replenishing
+
+        Args:
+            stop_leased: Also stop sandboxes that are currently leased
+
+        Returns:
+            Final pool statistics
+        """
+        async with self._lock:
+            self._closed = True
+            targets = [entry["sandbox_id"] for entry in self._idle]
+            self._idle.clear()
+            if stop_leased:
+                targets.extend(self._leased.keys())
+                self._leased.clear()
+            self._lock.notify_all()
+        for sandbox_id in targets:
+            self._spawn(self._discard(sandbox_id))
+        # In-flight replenishments discard their sandbox once they see _closed, which may spawn more tasks
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+        return self.stats()
 
 async def main():
     """CLI entrypoint: allow specifying --template-id and --sandbox-id."""
@@ -979,6 +2867,9 @@ async def main():
     parser.add_argument("--no-remote-fetch", action="store_true", help="Disable fetching startup.sh and configs from remote base")
     parser.add_argument("--remote-base", default=None, help="Remote base URL to fetch assets (e.g. https://raw.githubusercontent.com/<org>/<repo>/<branch>/deploy/e2b)")
     parser.add_argument("--probe-http", action="store_true", help="Also probe HTTP (port 80) /health alongside HTTPS during readiness and keepalive")
+    parser.add_argument("--ready-phase", choices=["mcp_connect", "mcp_servers"], default=None, help="startup.sh readiness phase to wait for (default: mcp_connect; mcp_servers also waits for MCP package warm-up)")
+    parser.add_argument("--no-bundle", action="store_true", help="Bootstrap with one remote call per step instead of a single bundled archive")
+    parser.add_argument("--timings-log", default=os.getenv("E2B_TIMINGS_LOG", ""), help="Append create/stop phase timings as JSON lines to this file (env: E2B_TIMINGS_LOG)")
     args = parser.parse_args()
 
     template_id = (args.template_id or os.getenv("E2B_TEMPLATE_ID", "")).strip()
@@ -1006,6 +2897,12 @@ async def main():
         config.xvfb_resolution = args.xvfb_resolution
     if args.probe_http:
         config.probe_http = True
+    if args.no_bundle:
+        config.bundle_bootstrap = False
+    if args.ready_phase:
+        config.ready_phase = args.ready_phase
+    if args.timings_log:
+        config.timings_log = args.timings_log
     manager = E2BSandboxManager(config)
     logger.info("Creating E2B sandbox (template=%s sandbox_id=%s)...", template_id, args.sandbox_id)
     result = await manager.create_sandbox(
@@ -1036,6 +2933,8 @@ async def main():
             print(f"    Auth Token: {service_info['auth_token']}")
     print(f"\n⏱️  Timeout: {result['timeout_seconds']} seconds")
     print(f"🕐 Created: {result['created_at']}")
+    if result.get("timings_ms"):
+        print("⏲️  Timings (ms): " + ", ".join(f"{k}={v}" for k, v in result["timings_ms"].items()))
     print("\n" + "="*60)
 
     # Keep sandbox running for demonstration
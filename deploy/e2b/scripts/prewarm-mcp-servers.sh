@@ -0,0 +1,106 @@
+#!/bin/bash
+# Build-time pre-warm of the packages behind npx/uvx MCP servers.
+#
+# Usage: prewarm-mcp-servers.sh <servers.json> <lock file>
+#
+# For every npx/uvx server in servers.json the package spec (e.g. chrome-devtools-mcp@latest)
+# is resolved to an exact version now, installed into the npm (_npx) / uv caches of the
+# build user, and recorded in the lock file. startup.sh rewrites mcp-servers.json to the
+# pinned specs, so the first session neither resolves versions nor downloads packages.
+# Each result is also printed as one "MCP_PREWARM {json}" line, which build.py collects to
+# report the cold first-call latency saved.
+
+set -uo pipefail
+
+CONFIG=${1:-/tmp/mcp-servers.json}
+LOCK=${2:-/home/user/.mcp-packages.lock.json}
+WARM_TIMEOUT=${MCP_PREWARM_TIMEOUT:-300}
+
+if [ ! -f "${CONFIG}" ]; then
+    echo "prewarm: ${CONFIG} not found; nothing to pre-warm"
+    exit 0
+fi
+
+now_ms() { date +%s%3N; }
+
+# Exact version of an npm spec (name, name@tag, name@range, @scope/name@tag)
+resolve_npm() {
+    npm view "$1" version 2>/dev/null | tail -n 1 | sed -E "s/.*'([^']+)'.*/\1/; s/^[^ ]+ //"
+}
+
+# Latest (or pinned) version of a PyPI package spec (name, name@latest, name@ver, name==ver)
+resolve_pypi() {
+    local spec=$1 name version
+    case "${spec}" in
+        *==*) echo "${spec#*==}"; return ;;
+        *@latest) name=${spec%@latest} ;;
+        *@*) echo "${spec#*@}"; return ;;
+        *) name=${spec} ;;
+    esac
+    version=$(curl -fsSL "https://pypi.org/pypi/${name}/json" 2>/dev/null \
+        | python3 -c 'import json, sys; print(json.load(sys.stdin)["info"]["version"])' 2>/dev/null)
+    echo "${version}"
+}
+
+# npm spec without its version/tag (keeps the @scope/ prefix)
+npm_name() {
+    local spec=$1
+    if [ "${spec#@}" != "${spec}" ]; then
+        local rest=${spec#@}
+        echo "@${rest%%@*}"
+    else
+        echo "${spec%%@*}"
+    fi
+}
+
+entries=$(node -e '
+const cfg = JSON.parse(require("fs").readFileSync(process.argv[1], "utf8"));
+const servers = cfg.mcpServers || cfg.servers || cfg;
+for (const [name, s] of Object.entries(servers)) {
+  if (!s || (s.command !== "npx" && s.command !== "uvx")) continue;
+  const pkg = (s.args || []).find((a) => !a.startsWith("-"));
+  if (pkg) console.log(`${name}\t${s.command}\t${pkg}`);
+}' "${CONFIG}") || { echo "prewarm: failed to parse ${CONFIG}"; exit 0; }
+
+results=()
+while IFS=$'\t' read -r server cmd spec; do
+    [ -n "${server}" ] || continue
+    pinned=""
+    status="ok"
+    started=$(now_ms)
+    case "${cmd}" in
+        npx)
+            version=$(resolve_npm "${spec}")
+            if [ -n "${version}" ]; then
+                pinned="$(npm_name "${spec}")@${version}"
+                timeout "${WARM_TIMEOUT}" npm exec --yes --package="${pinned}" -- true >/dev/null 2>&1 || status="failed"
+            else
+                status="unresolved"
+            fi
+            ;;
+        uvx)
+            version=$(resolve_pypi "${spec}")
+            name=${spec%%[@=]*}
+            if [ -n "${version}" ]; then
+                pinned="${name}@${version}"
+                timeout "${WARM_TIMEOUT}" uvx "${pinned}" --help >/dev/null 2>&1 </dev/null || status="failed"
+            else
+                status="unresolved"
+            fi
+            ;;
+    esac
+    elapsed=$(( $(now_ms) - started ))
+    line=$(printf '{"server":"%s","command":"%s","spec":"%s","pinned":"%s","status":"%s","warm_ms":%s}' \
+        "${server}" "${cmd}" "${spec}" "${pinned}" "${status}" "${elapsed}")
+    echo "MCP_PREWARM ${line}"
+    results+=("${line}")
+done <<< "${entries}"
+
+mkdir -p "$(dirname "${LOCK}")"
+{
+    printf '{"generated_at":"%s","servers":[' "$(date -u '+%Y-%m-%dT%H:%M:%SZ')"
+    (IFS=,; printf '%s' "${results[*]}")
+    printf ']}\n'
+} > "${LOCK}"
+echo "prewarm: wrote ${LOCK} (${#results[@]} servers)"
+exit 0
@@ -6,7 +6,8 @@
 set -euo pipefail
 
 LOG_DIR=/home/user
-STARTUP_VERSION="v2025-10-15-01"
+STARTUP_VERSION="v2026-10-16-03"
+READY_DIR=/home/user/.ready
 DESKTOP_DIR=/home/user/Desktop
 CONFIG_ROOT=/home/user/.config
 FLUXBOX_DIR=/home/user/.fluxbox
@@ -22,6 +23,98 @@ log() {
     printf '%s %s\n' "$(date -u '+%Y-%m-%dT%H:%M:%SZ')" "$*"
 }
 
+# Phase-by-phase readiness signal consumed by E2BSandboxManager:
+# each phase touches ${READY_DIR}/<phase> and appends a JSON line to ${READY_DIR}/phases.jsonl
+# (phases: xvfb, chrome_cdp, mcp_connect, mcp_servers; ${READY_DIR}/failed carries a failure reason)
+START_MS=$(date +%s%3N)
+mkdir -p "${READY_DIR}"
+rm -f "${READY_DIR}/phases.jsonl" "${READY_DIR}/failed" "${READY_DIR}/xvfb" "${READY_DIR}/chrome_cdp" \
+    "${READY_DIR}/mcp_connect" "${READY_DIR}/mcp_servers" "${READY_DIR}/gui"
+
+# Record the process group so the manager can stop every service with a single signal.
+# The manager launches this script under setsid; background services inherit the group.
+ps -o pgid= -p $$ | tr -d ' ' > /home/user/services.pgid || true
+
+mark_ready() {
+    local now elapsed
+    now=$(date +%s%3N)
+    elapsed=$((now - START_MS))
+    printf '{"phase":"%s","ts_ms":%s,"elapsed_ms":%s}\n' "$1" "${now}" "${elapsed}" >> "${READY_DIR}/phases.jsonl"
+    touch "${READY_DIR}/$1"
+    log "Phase ready: $1 (+${elapsed}ms)"
+}
+
+mark_failed() {
+    printf '%s\n' "$*" > "${READY_DIR}/failed"
+    log "Startup failed: $*"
+}
+
+# Rewrite npx/uvx package specs in mcp-servers.json to the versions pre-installed into the template
+# (scripts/prewarm-mcp-servers.sh); only servers whose spec still matches the build-time spec are pinned
+pin_mcp_servers() {
+    local cfg=/home/user/mcp-connect/mcp-servers.json
+    local lock=/home/user/.mcp-packages.lock.json
+    [ -f "${cfg}" ] && [ -f "${lock}" ] || return 0
+    command -v node >/dev/null 2>&1 || return 0
+    node -e '
+const fs = require("fs");
+const [cfgPath, lockPath] = process.argv.slice(1);
+const cfg = JSON.parse(fs.readFileSync(cfgPath, "utf8"));
+const lock = JSON.parse(fs.readFileSync(lockPath, "utf8"));
+const servers = cfg.mcpServers || cfg.servers || cfg;
+let pinned = 0;
+for (const entry of lock.servers || []) {
+  const s = servers[entry.server];
+  if (entry.status !== "ok" || !entry.pinned || !s || s.command !== entry.command) continue;
+  const i = (s.args || []).findIndex((a) => !a.startsWith("-"));
+  if (i < 0 || s.args[i] !== entry.spec) continue;
+  s.args[i] = entry.pinned;
+  pinned++;
+}
+if (pinned) fs.writeFileSync(cfgPath, JSON.stringify(cfg, null, 2) + "\n");
+console.log(pinned);' "${cfg}" "${lock}" 2>/dev/null | { read -r n; log "Pinned ${n:-0} MCP server package(s) to template versions"; } || true
+}
+
+# Hand service bring-up to the asyncio supervisor (supervisor.py) when it is installed: services start
+# from a dependency graph in parallel, gate on readiness checks and are restarted with backoff on crash.
+# SUPERVISOR=0 (or a missing python3/supervisor.py) keeps the sequential bring-up below.
+SUPERVISOR_PY=/home/user/supervisor.py
+run_supervisor() {
+    case "${SUPERVISOR:-1}" in
+        0|false|no) return 0 ;;
+    esac
+    if [ ! -f "${SUPERVISOR_PY}" ] || ! command -v python3 >/dev/null 2>&1; then
+        log "supervisor.py unavailable; using sequential startup"
+        return 0
+    fi
+    log "Handing service startup to supervisor.py (profile: $1)"
+    export STARTUP_START_MS=${START_MS}
+    exec python3 -u "${SUPERVISOR_PY}" --profile "$1"
+}
+
+# Pre-fetch the packages behind npx/uvx servers in mcp-servers.json so the first session does not download them
+warm_mcp_servers() {
+    local cfg=/home/user/mcp-connect/mcp-servers.json
+    [ -f "${cfg}" ] || return 0
+    command -v node >/dev/null 2>&1 || return 0
+    node -e '
+const cfg = JSON.parse(require("fs").readFileSync(process.argv[1], "utf8"));
+const servers = cfg.mcpServers || cfg.servers || cfg;
+for (const s of Object.values(servers)) {
+  if (!s || (s.command !== "npx" && s.command !== "uvx")) continue;
+  const pkg = (s.args || []).find((a) => !a.startsWith("-"));
+  if (pkg) console.log(`${s.command} ${pkg}`);
+}' "${cfg}" 2>/dev/null | {
+        while read -r cmd pkg; do
+            case "${cmd}" in
+                npx) timeout 180 npm exec --yes --package="${pkg}" -- true >/dev/null 2>&1 || log "warm-up failed: npx ${pkg}" ;;
+                uvx) timeout 180 uvx "${pkg}" --help >/dev/null 2>&1 || log "warm-up failed: uvx ${pkg}" ;;
+            esac &
+        done
+        wait
+    }
+}
+
 log "Starting E2B MCP Sandbox..."
 log "Startup script version: ${STARTUP_VERSION}"
 
@@ -62,6 +155,8 @@ HOST="${HOST}"
 LOG_LEVEL="info"
 ENVFILE
 
+    pin_mcp_servers
+
     log "Node.js / npm versions:"
     node -v || log "node not found"
     npm -v || log "npm not found"
@@ -90,6 +185,7 @@ ENVFILE
 if [ "${HEADLESS}" = "1" ] || [ "${HEADLESS}" = "true" ]; then
     log "HEADLESS mode: starting only nginx + mcp-connect"
     prepare_mcp_env
+    run_supervisor headless
 
     # nginx proxy
     log "Ensuring nginx reverse proxy is running (headless)"
@@ -114,21 +210,24 @@ if [ "${HEADLESS}" = "1" ] || [ "${HEADLESS}" = "true" ]; then
 
     log "Waiting for mcp-connect to become healthy (headless)..."
     code=""
-    for _ in $(seq 1 30); do
+    for _ in $(seq 1 120); do
         code=$(curl -s -o /dev/null -w '%{http_code}' "http://127.0.0.1:${PORT}/health" || true)
         if [ "$code" = "200" ]; then
             log "mcp-connect is healthy (HTTP 200)"
             break
         fi
-        sleep 2
+        sleep 0.5
     done
 
     if [ "$code" != "200" ]; then
         log "mcp-connect failed to become healthy (last code: $code)"
+        mark_failed "mcp-connect unhealthy (last code: $code)"
         log "--- tail nginx error.log ---"
         sudo tail -n 50 /var/log/nginx/error.log 2>/dev/null || true
         exit 1
     fi
+    mark_ready mcp_connect
+    ( warm_mcp_servers; mark_ready mcp_servers ) &
 
     cleanup() {
         log "Shutting down services (headless)..."
@@ -181,24 +280,6 @@ rm -f "/tmp/.X${DISPLAY_NUM}-lock" "${DISPLAY_SOCKET}" >/dev/null 2>&1 || true
 mkdir -p /tmp/.X11-unix
 chmod 1777 /tmp/.X11-unix || true
 
-log "Ensuring Xvfb is running on ${XVFB_DISPLAY}"
-nohup Xvfb "${XVFB_DISPLAY}" -screen 0 "${XVFB_RESOLUTION}" -nolisten tcp -auth "${XAUTH_FILE}" > "${LOG_DIR}/xvfb.log" 2>&1 &
-XVFB_PID=$!
-echo ${XVFB_PID} > "${LOG_DIR}/xvfb.pid"
-
-for attempt in $(seq 1 20); do
-    if [ -S "${DISPLAY_SOCKET}" ]; then
-        log "Xvfb socket ${DISPLAY_SOCKET} is ready"
-        break
-    fi
-    log "Waiting for Xvfb socket ${DISPLAY_SOCKET} (attempt ${attempt})"
-    sleep 0.5
-done
-
-if [ ! -S "${DISPLAY_SOCKET}" ]; then
-    log "WARNING: Xvfb socket ${DISPLAY_SOCKET} did not appear"
-fi
-
 export DISPLAY="${XVFB_DISPLAY}"
 
 log "Preparing desktop directories and templates"
@@ -297,6 +378,43 @@ Categories=System;
 DESKTOP_ENTRY
 chmod +x "${DESKTOP_DIR}/"*.desktop
 
+if [ -n "${VNC_PASSWORD}" ]; then
+    log "Configuring VNC password file"
+    mkdir -p /home/user/.vnc
+    x11vnc -storepasswd "${VNC_PASSWORD}" /home/user/.vnc/passwd >/dev/null 2>&1
+    chmod 600 /home/user/.vnc/passwd
+    X11VNC_AUTH_OPTS=("-rfbauth" "/home/user/.vnc/passwd")
+else
+    log "VNC password not set; starting x11vnc without authentication"
+    X11VNC_AUTH_OPTS=("-nopw")
+fi
+
+# Supervised bring-up (does not return when supervisor.py is available); it reads
+# X11VNC_WAIT/X11VNC_DEFER/X11VNC_EXTRA itself, so only strip flags x11vnc must not inherit
+unset X11VNC_OPTS X11VNC_OPTIONS X11VNC_ARGS TIGHT_QUALITY TIGHT_COMPRESSLEVEL VNC_QUALITY VNC_COMPRESSLEVEL || true
+run_supervisor gui
+
+# Sequential bring-up ----------------------------------------------------------
+log "Ensuring Xvfb is running on ${XVFB_DISPLAY}"
+nohup Xvfb "${XVFB_DISPLAY}" -screen 0 "${XVFB_RESOLUTION}" -nolisten tcp -auth "${XAUTH_FILE}" > "${LOG_DIR}/xvfb.log" 2>&1 &
+XVFB_PID=$!
+echo ${XVFB_PID} > "${LOG_DIR}/xvfb.pid"
+
+for attempt in $(seq 1 20); do
+    if [ -S "${DISPLAY_SOCKET}" ]; then
+        log "Xvfb socket ${DISPLAY_SOCKET} is ready"
+        break
+    fi
+    log "Waiting for Xvfb socket ${DISPLAY_SOCKET} (attempt ${attempt})"
+    sleep 0.5
+done
+
+if [ ! -S "${DISPLAY_SOCKET}" ]; then
+    log "WARNING: Xvfb socket ${DISPLAY_SOCKET} did not appear"
+else
+    mark_ready xvfb
+fi
+
 log "Ensuring fluxbox window manager is running"
 pkill -x fluxbox >/dev/null 2>&1 || true
 nohup fluxbox > "${LOG_DIR}/fluxbox.log" 2>&1 &
@@ -335,17 +453,6 @@ fi
   fi
 ) &
 
-if [ -n "${VNC_PASSWORD}" ]; then
-    log "Configuring VNC password file"
-    mkdir -p /home/user/.vnc
-    x11vnc -storepasswd "${VNC_PASSWORD}" /home/user/.vnc/passwd >/dev/null 2>&1
-    chmod 600 /home/user/.vnc/passwd
-    X11VNC_AUTH_OPTS=("-rfbauth" "/home/user/.vnc/passwd")
-else
-    log "VNC password not set; starting x11vnc without authentication"
-    X11VNC_AUTH_OPTS=("-nopw")
-fi
-
 # Dynamic tuning parameters ----------------------------------------------------
 X11VNC_WAIT=${X11VNC_WAIT:-20}          # milliseconds to wait between screen polls
 X11VNC_DEFER=${X11VNC_DEFER:-20}        # defer update batching (ms)
@@ -473,6 +580,17 @@ else
     ) &
 fi
 
+# Publish chrome_cdp once the DevTools endpoint answers (without blocking the rest of startup)
+(
+    for i in $(seq 1 60); do
+        if curl -fsS "http://127.0.0.1:9222/json/version" >/dev/null 2>&1; then
+            mark_ready chrome_cdp
+            break
+        fi
+        sleep 0.5
+    done
+) &
+
 # Mark GUI readiness flag after both noVNC and Chrome are up
 mkdir -p /home/user/.ready
 if [ "${NOVNC_READY}" = "1" ] && [ -n "${CHROME_PID:-}" ]; then
@@ -505,23 +623,26 @@ fi
 
 log "Waiting for mcp-connect to become healthy..."
 code=""
-for _ in $(seq 1 30); do
+for _ in $(seq 1 120); do
     code=$(curl -s -o /dev/null -w '%{http_code}' "http://127.0.0.1:${PORT}/health" || true)
     if [ "$code" = "200" ]; then
         log "mcp-connect is healthy (HTTP 200)"
         break
     fi
-    sleep 2
+    sleep 0.5
 done
 
 if [ "$code" != "200" ]; then
     log "mcp-connect failed to become healthy (last code: $code)"
+    mark_failed "mcp-connect unhealthy (last code: $code)"
     log "--- tail chrome.log ---"
     tail -n 50 "${LOG_DIR}/chrome.log" 2>/dev/null || true
     log "--- tail nginx error.log ---"
     sudo tail -n 50 /var/log/nginx/error.log 2>/dev/null || true
     exit 1
 fi
+mark_ready mcp_connect
+( warm_mcp_servers; mark_ready mcp_servers ) &
 
 cleanup() {
     log "Shutting down services..."
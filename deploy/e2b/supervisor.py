@@ -0,0 +1,773 @@
+#!/usr/bin/env python3
+"""
+In-sandbox service supervisor for the MCP sandbox template
+
+Replaces the sequential bring-up in startup.sh (start a service, sleep-poll, start the
+next one) with a small asyncio supervisor:
+
+- services start from a dependency graph, so independent services (Xvfb, nginx,
+  mcp-connect) come up in parallel and dependents start as soon as their gate opens
+- readiness is gated on real checks: the X socket exists, the VNC port accepts
+  connections, noVNC / the Chrome CDP endpoint / mcp-connect /health answer HTTP 200
+- crashed services are restarted with exponential backoff (reset after a stable run)
+- per-service timings are written to <ready dir>/services.json and the readiness
+  phases consumed by E2BSandboxManager (phases.jsonl, one marker file per phase,
+  failed) keep their format
+- CPU, RSS and fd counts of every service's process tree are sampled into a ring
+  buffer in <ready dir>/stats.json (read by E2BSandboxManager.get_stats)
+
+Only the standard library is used; startup.sh prepares the environment (Xauthority,
+desktop configs, .env, npm deps) and then execs this module:
+
+    python3 /home/user/supervisor.py --profile gui
+    python3 /home/user/supervisor.py --profile headless
+
+Every child stays in the supervisor's process group, so the manager's single
+process-group signal still stops everything.
+"""
+
+import os
+import json
+import time
+import shlex
+import signal
+import asyncio
+import argparse
+import urllib.request
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+LOG_DIR = "/home/user"
+READY_DIR = "/home/user/.ready"
+MCP_CONNECT_DIR = "/home/user/mcp-connect"
+CHROME_LAUNCHER = "/home/user/bin/chrome-devtools.sh"
+SERVICES_FILE = "services.json"
+# Readiness polling interval and restart backoff (seconds)
+POLL_INTERVAL = 0.1
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+# A service that stays up this long has its backoff reset
+STABLE_AFTER = 60.0
+STOP_GRACE = 5.0
+WARM_TIMEOUT = 180
+# Resource sampler: one sample per interval, the last STATS_SAMPLES kept in <ready dir>/stats.json
+STATS_FILE = "stats.json"
+SAMPLE_INTERVAL = 5.0
+STATS_SAMPLES = 120
+
+ReadyCheck = Callable[[], Awaitable[bool]]
+
+
+def now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def log(message: str) -> None:
+    """Log in startup.sh's format (stdout is startup.log once exec'd from it)."""
+    stamp = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+    print(f"{stamp} [supervisor] {message}", flush=True)
+
+
+# Readiness checks -------------------------------------------------------------
+
+def socket_exists(path: str) -> ReadyCheck:
+    async def check() -> bool:
+        return os.path.exists(path)
+    return check
+
+
+def tcp_port(port: int, host: str = "127.0.0.1") -> ReadyCheck:
+    async def check() -> bool:
+        try:
+            _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout=1)
+        except (OSError, asyncio.TimeoutError):
+            return False
+        writer.close()
+        return True
+    return check
+
+
+def http_ok(url: str) -> ReadyCheck:
+    def probe() -> bool:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as resp:
+                return resp.status == 200
+        except Exception:
+            return False
+
+    async def check() -> bool:
+        return await asyncio.get_running_loop().run_in_executor(None, probe)
+    return check
+
+
+# Service model ----------------------------------------------------------------
+
+@dataclass
+class Service:
+    """One supervised service.
+
+    Exactly one of cmd (a long-running process), task (a one-shot coroutine) or neither
+    (a target that is ready once its dependencies are) is set.
+    """
+    name: str
+    cmd: Optional[List[str]] = None
+    deps: List[str] = field(default_factory=list)
+    ready: Optional[ReadyCheck] = None
+    ready_timeout: float = 30.0
+    # Readiness phase published for E2BSandboxManager (None = timings only)
+    phase: Optional[str] = None
+    # Write <ready dir>/failed when the first start never becomes ready
+    critical: bool = False
+    log_file: Optional[str] = None
+    cwd: Optional[str] = None
+    env: Dict[str, str] = field(default_factory=dict)
+    # Commands used on later attempts (e.g. x11vnc with minimal flags)
+    fallback_cmd: Optional[List[str]] = None
+    # Skip spawning when the readiness check already passes (externally managed)
+    adopt: bool = False
+    pre_start: Optional[Callable[[], None]] = None
+    task: Optional[Callable[[], Awaitable[None]]] = None
+    restart: bool = True
+
+
+@dataclass
+class ServiceState:
+    status: str = "pending"
+    pid: Optional[int] = None
+    started_ms: Optional[int] = None
+    ready_ms: Optional[int] = None
+    restarts: int = 0
+    last_exit: Optional[int] = None
+
+    def to_dict(self, start_ms: int) -> Dict[str, Any]:
+        return {
+            "status": self.status,
+            "pid": self.pid,
+            "start_ms": self.started_ms - start_ms if self.started_ms is not None else None,
+            "ready_ms": self.ready_ms - start_ms if self.ready_ms is not None else None,
+            "ready_after_ms": (
+                self.ready_ms - self.started_ms
+                if self.ready_ms is not None and self.started_ms is not None else None
+            ),
+            "restarts": self.restarts,
+            "last_exit": self.last_exit,
+        }
+
+
+class Supervisor:
+    """Start services from their dependency graph and keep them running."""
+
+    def __init__(
+        self,
+        services: List[Service],
+        ready_dir: str = READY_DIR,
+        log_dir: str = LOG_DIR,
+        start_ms: Optional[int] = None,
+        sample_interval: Optional[float] = SAMPLE_INTERVAL,
+        stats_samples: int = STATS_SAMPLES,
+    ):
+        names = {svc.name for svc in services}
+        for svc in services:
+            missing = [dep for dep in svc.deps if dep not in names]
+            if missing:
+                raise ValueError(f"service {svc.name} depends on unknown service(s): {', '.join(missing)}")
+        self.services = {svc.name: svc for svc in services}
+        self._check_acyclic()
+        self.ready_dir = ready_dir
+        self.log_dir = log_dir
+        self.start_ms = start_ms or now_ms()
+        self.state = {name: ServiceState() for name in self.services}
+        self._procs: Dict[str, asyncio.subprocess.Process] = {}
+        self._gates: Dict[str, asyncio.Event] = {}
+        self._stopping: Optional[asyncio.Event] = None
+        # No sampler when the interval is 0/None or /proc is unavailable
+        self.sampler = (
+            ResourceSampler(self, sample_interval, stats_samples)
+            if sample_interval and os.path.isdir("/proc") else None
+        )
+
+    def _check_acyclic(self) -> None:
+        visiting, done = set(), set()
+
+        def visit(name: str) -> None:
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"dependency cycle through service {name}")
+            visiting.add(name)
+            for dep in self.services[name].deps:
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+
+        for name in self.services:
+            visit(name)
+
+    # Readiness markers and timings ---------------------------------------------
+
+    def _mark_ready(self, phase: str) -> None:
+        ts = now_ms()
+        elapsed = ts - self.start_ms
+        with open(os.path.join(self.ready_dir, "phases.jsonl"), "a", encoding="utf-8") as handle:
+            handle.write(json.dumps({"phase": phase, "ts_ms": ts, "elapsed_ms": elapsed}) + "\n")
+        open(os.path.join(self.ready_dir, phase), "a").close()
+        log(f"Phase ready: {phase} (+{elapsed}ms)")
+
+    def _mark_failed(self, reason: str) -> None:
+        with open(os.path.join(self.ready_dir, "failed"), "w", encoding="utf-8") as handle:
+            handle.write(reason + "\n")
+        log(f"Startup failed: {reason}")
+
+    def _write_timings(self) -> None:
+        data = {
+            "started_ms": self.start_ms,
+            "updated_ms": now_ms(),
+            "supervisor_pid": os.getpid(),
+            "services": {
+                name: dict(self.state[name].to_dict(self.start_ms), deps=self.services[name].deps)
+                for name in self.services
+            },
+        }
+        path = os.path.join(self.ready_dir, SERVICES_FILE)
+        tmp = f"{path}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as handle:
+                json.dump(data, handle, indent=2)
+            os.replace(tmp, path)
+        except OSError as e:
+            log(f"could not write {path}: {e}")
+
+    def _set(self, name: str, **changes: Any) -> None:
+        for key, value in changes.items():
+            setattr(self.state[name], key, value)
+        self._write_timings()
+
+    # Service lifecycle ----------------------------------------------------------
+
+    async def _wait_gate(self, svc: Service) -> None:
+        """Wait for every dependency; a dependency that never got ready only delays, never blocks."""
+        for dep in svc.deps:
+            await self._gates[dep].wait()
+            if self.state[dep].status not in ("ready", "adopted", "done"):
+                log(f"{svc.name}: dependency {dep} is {self.state[dep].status}; starting anyway")
+
+    async def _spawn(self, svc: Service, cmd: List[str]) -> asyncio.subprocess.Process:
+        if svc.pre_start:
+            svc.pre_start()
+        out = open(os.path.join(self.log_dir, svc.log_file), "ab") if svc.log_file else asyncio.subprocess.DEVNULL
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *cmd,
+                cwd=svc.cwd,
+                env=dict(os.environ, **svc.env),
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=out,
+                stderr=asyncio.subprocess.STDOUT,
+            )
+        finally:
+            if not isinstance(out, int):
+                out.close()
+        try:
+            with open(os.path.join(self.log_dir, f"{svc.name}.pid"), "w") as handle:
+                handle.write(f"{proc.pid}\n")
+        except OSError:
+            pass
+        return proc
+
+    async def _await_ready(self, svc: Service, proc: asyncio.subprocess.Process) -> bool:
+        """Poll the readiness check until it passes, the process exits, or the timeout elapses."""
+        if svc.ready is None:
+            # No probe: treat a process that survives its first poll interval as started
+            await asyncio.sleep(POLL_INTERVAL)
+            return proc.returncode is None
+        deadline = time.monotonic() + svc.ready_timeout
+        while time.monotonic() < deadline:
+            if proc.returncode is not None:
+                return False
+            if await svc.ready():
+                return True
+            await asyncio.sleep(POLL_INTERVAL)
+        return False
+
+    def _gate_open(self, svc: Service, ok: bool, first: bool) -> None:
+        gate = self._gates[svc.name]
+        if gate.is_set():
+            return
+        if ok and svc.phase:
+            self._mark_ready(svc.phase)
+        elif not ok:
+            log(f"WARNING: {svc.name} did not become ready within {svc.ready_timeout:g}s")
+            if svc.critical and first:
+                self._mark_failed(f"{svc.name} did not become ready within {svc.ready_timeout:g}s")
+        gate.set()
+
+    async def _run_service(self, svc: Service) -> None:
+        await self._wait_gate(svc)
+        if self._stopping.is_set():
+            return
+
+        if svc.task is not None or svc.cmd is None:
+            self._set(svc.name, status="starting", started_ms=now_ms())
+            ok = True
+            if svc.task is not None:
+                try:
+                    await svc.task()
+                except Exception as e:
+                    ok = False
+                    log(f"{svc.name} failed: {e}")
+            self._set(svc.name, status="done" if ok else "failed", ready_ms=now_ms())
+            self._gate_open(svc, ok, first=True)
+            return
+
+        if svc.adopt and svc.ready is not None and await svc.ready():
+            ts = now_ms()
+            log(f"{svc.name} already running; adopting it (not supervised)")
+            self._set(svc.name, status="adopted", started_ms=ts, ready_ms=ts)
+            self._gate_open(svc, True, first=True)
+            return
+
+        attempt = 0
+        failures = 0
+        while not self._stopping.is_set():
+            cmd = svc.cmd if attempt == 0 or not svc.fallback_cmd else svc.fallback_cmd
+            started = now_ms()
+            started_mono = time.monotonic()
+            try:
+                proc = await self._spawn(svc, cmd)
+            except OSError as e:
+                log(f"{svc.name}: failed to start {shlex.join(cmd)}: {e}")
+                proc = None
+            if proc is not None:
+                self._procs[svc.name] = proc
+                self._set(svc.name, status="starting", pid=proc.pid, started_ms=started, ready_ms=None)
+                log(f"{svc.name} started (pid {proc.pid}): {shlex.join(cmd)}")
+                ok = await self._await_ready(svc, proc)
+                if ok:
+                    self._set(svc.name, status="ready", ready_ms=now_ms())
+                    if attempt:
+                        log(f"{svc.name} recovered after {attempt} restart(s) in {now_ms() - started}ms")
+                self._gate_open(svc, ok, first=attempt == 0)
+                code = await proc.wait()
+                self._procs.pop(svc.name, None)
+                if self._stopping.is_set():
+                    break
+                uptime = time.monotonic() - started_mono
+                if uptime >= STABLE_AFTER:
+                    failures = 0
+                self._set(svc.name, status="exited", pid=None, last_exit=code)
+                log(f"{svc.name} exited with code {code} after {uptime:.1f}s")
+            else:
+                self._gate_open(svc, False, first=attempt == 0)
+                self._set(svc.name, status="exited", pid=None)
+            if not svc.restart:
+                break
+            delay = min(BACKOFF_MAX, BACKOFF_BASE * (2 ** failures))
+            failures += 1
+            attempt += 1
+            self._set(svc.name, status="backoff", restarts=attempt)
+            log(f"Restarting {svc.name} in {delay:.1f}s (restart #{attempt})")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _shutdown(self) -> None:
+        procs = list(self._procs.items())
+        for name, proc in procs:
+            if proc.returncode is None:
+                log(f"Stopping {name} (pid {proc.pid})")
+                try:
+                    proc.terminate()
+                except ProcessLookupError:
+                    pass
+        if procs:
+            waits = [proc.wait() for _, proc in procs]
+            try:
+                await asyncio.wait_for(asyncio.gather(*waits), timeout=STOP_GRACE)
+            except asyncio.TimeoutError:
+                for _, proc in procs:
+                    if proc.returncode is None:
+                        proc.kill()
+        for state in self.state.values():
+            if state.status in ("starting", "ready", "exited", "backoff"):
+                state.status = "stopped"
+                state.pid = None
+        self._write_timings()
+
+    async def run(self) -> None:
+        """Bring every service up and supervise until SIGTERM/SIGINT."""
+        loop = asyncio.get_running_loop()
+        self._stopping = asyncio.Event()
+        self._gates = {name: asyncio.Event() for name in self.services}
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, self._stopping.set)
+        os.makedirs(self.ready_dir, exist_ok=True)
+        self._write_timings()
+        log(f"Supervising {len(self.services)} services: {', '.join(self.services)}")
+
+        tasks = [asyncio.ensure_future(self._run_service(svc)) for svc in self.services.values()]
+        if self.sampler is not None:
+            tasks.append(asyncio.ensure_future(self.sampler.run(self._stopping)))
+        startup = asyncio.ensure_future(asyncio.gather(*(gate.wait() for gate in self._gates.values())))
+        stop = asyncio.ensure_future(self._stopping.wait())
+        await asyncio.wait([startup, stop], return_when=asyncio.FIRST_COMPLETED)
+        if startup.done():
+            summary = ", ".join(
+                f"{name}={state.ready_ms - self.start_ms}ms" if state.ready_ms is not None else f"{name}={state.status}"
+                for name, state in self.state.items()
+            )
+            log(f"All services started: {summary}")
+        await stop
+        startup.cancel()
+        log("Shutting down services...")
+        await self._shutdown()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+# Resource sampling ------------------------------------------------------------
+
+class ResourceSampler:
+    """Sample CPU, RSS and open fds of every supervised service's process tree from /proc.
+
+    A service's tree is its pid plus all descendants, so Chrome renderers and the npm -> node
+    chain of mcp-connect are attributed to their service. Samples are kept in a ring buffer
+    and written to <ready dir>/stats.json after every sample for E2BSandboxManager.get_stats.
+    """
+
+    def __init__(self, supervisor: "Supervisor", interval: float = SAMPLE_INTERVAL, size: int = STATS_SAMPLES):
+        self.supervisor = supervisor
+        self.interval = interval
+        self.samples: deque = deque(maxlen=max(1, size))
+        self._ticks: Dict[int, int] = {}
+        self._last_mono: Optional[float] = None
+        self._clk_tck = os.sysconf("SC_CLK_TCK")
+        self._page_size = os.sysconf("SC_PAGE_SIZE")
+
+    @staticmethod
+    def _read_stat(pid: int) -> Optional[List[str]]:
+        """Fields of /proc/<pid>/stat after the command name (index 0 is the state)."""
+        try:
+            with open(f"/proc/{pid}/stat", "r") as handle:
+                data = handle.read()
+        except OSError:
+            return None
+        return data[data.rfind(")") + 2:].split()
+
+    def _process_table(self) -> Dict[int, List[str]]:
+        table = {}
+        for entry in os.listdir("/proc"):
+            if entry.isdigit():
+                fields = self._read_stat(int(entry))
+                if fields is not None:
+                    table[int(entry)] = fields
+        return table
+
+    @staticmethod
+    def _fd_count(pid: int) -> Optional[int]:
+        try:
+            return len(os.listdir(f"/proc/{pid}/fd"))
+        except OSError:
+            # Processes of another user (nginx under sudo) do not expose their fds
+            return None
+
+    @staticmethod
+    def _system() -> Dict[str, Any]:
+        meminfo: Dict[str, int] = {}
+        try:
+            with open("/proc/meminfo", "r") as handle:
+                for line in handle:
+                    key, _, value = line.partition(":")
+                    if key in ("MemTotal", "MemAvailable"):
+                        meminfo[key] = int(value.split()[0]) * 1024
+            load1 = os.getloadavg()[0]
+        except (OSError, ValueError):
+            return {}
+        return {
+            "mem_total_bytes": meminfo.get("MemTotal"),
+            "mem_available_bytes": meminfo.get("MemAvailable"),
+            "load1": round(load1, 2),
+        }
+
+    def sample(self) -> Dict[str, Any]:
+        """Take one sample, append it to the ring buffer and return it."""
+        now = time.monotonic()
+        elapsed = now - self._last_mono if self._last_mono is not None else None
+        table = self._process_table()
+        children: Dict[int, List[int]] = {}
+        for pid, fields in table.items():
+            children.setdefault(int(fields[1]), []).append(pid)
+
+        ticks: Dict[int, int] = {}
+        services: Dict[str, Any] = {}
+        for name, state in self.supervisor.state.items():
+            if state.pid is None or state.pid not in table:
+                continue
+            tree, stack = [], [state.pid]
+            while stack:
+                pid = stack.pop()
+                tree.append(pid)
+                stack.extend(children.get(pid, []))
+            cpu_ticks = 0
+            rss = 0
+            fds: Optional[int] = None
+            for pid in tree:
+                fields = table[pid]
+                ticks[pid] = int(fields[11]) + int(fields[12])
+                # Processes not seen in the previous sample started during this interval
+                cpu_ticks += ticks[pid] - self._ticks.get(pid, 0)
+                rss += int(fields[21]) * self._page_size
+                count = self._fd_count(pid)
+                if count is not None:
+                    fds = (fds or 0) + count
+            cpu_pct = None
+            if elapsed:
+                cpu_pct = round(100.0 * cpu_ticks / self._clk_tck / elapsed, 1)
+            services[name] = {"cpu_pct": cpu_pct, "rss_bytes": rss, "fds": fds, "procs": len(tree)}
+
+        self._ticks = ticks
+        self._last_mono = now
+        record = {"ts_ms": now_ms(), "services": services, "system": self._system()}
+        self.samples.append(record)
+        return record
+
+    def _write(self) -> None:
+        data = {
+            "interval_s": self.interval,
+            "capacity": self.samples.maxlen,
+            "cpus": os.cpu_count(),
+            "samples": list(self.samples),
+        }
+        path = os.path.join(self.supervisor.ready_dir, STATS_FILE)
+        tmp = f"{path}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as handle:
+                json.dump(data, handle, separators=(",", ":"))
+            os.replace(tmp, path)
+        except OSError as e:
+            log(f"could not write {path}: {e}")
+
+    async def run(self, stopping: asyncio.Event) -> None:
+        while not stopping.is_set():
+            try:
+                self.sample()
+                self._write()
+            except Exception as e:
+                log(f"resource sample failed: {e}")
+            try:
+                await asyncio.wait_for(stopping.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+
+# Service graph ----------------------------------------------------------------
+
+def _truthy(value: Optional[str]) -> bool:
+    return str(value or "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def mcp_server_packages(config_path: str) -> List[List[str]]:
+    """Return [command, package] for every npx/uvx server in mcp-servers.json."""
+    try:
+        with open(config_path, "r", encoding="utf-8") as handle:
+            cfg = json.load(handle)
+    except (OSError, ValueError):
+        return []
+    servers = cfg.get("mcpServers") or cfg.get("servers") or cfg
+    packages = []
+    for server in servers.values() if isinstance(servers, dict) else []:
+        if not isinstance(server, dict) or server.get("command") not in ("npx", "uvx"):
+            continue
+        pkg = next((a for a in server.get("args") or [] if not str(a).startswith("-")), None)
+        if pkg:
+            packages.append([server["command"], pkg])
+    return packages
+
+
+async def warm_mcp_servers(config_path: str = os.path.join(MCP_CONNECT_DIR, "mcp-servers.json")) -> None:
+    """Pre-fetch the packages behind npx/uvx servers concurrently (failures are logged, not fatal)."""
+
+    async def warm(cmd: str, pkg: str) -> None:
+        argv = ["npm", "exec", "--yes", f"--package={pkg}", "--", "true"] if cmd == "npx" else ["uvx", pkg, "--help"]
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *argv,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.DEVNULL,
+            )
+        except OSError as e:
+            log(f"warm-up failed: {cmd} {pkg}: {e}")
+            return
+        try:
+            code = await asyncio.wait_for(proc.wait(), timeout=WARM_TIMEOUT)
+        except asyncio.TimeoutError:
+            proc.kill()
+            code = None
+        if code != 0:
+            log(f"warm-up failed: {cmd} {pkg}")
+
+    await asyncio.gather(*(warm(cmd, pkg) for cmd, pkg in mcp_server_packages(config_path)))
+
+
+def build_services(profile: str, env: Optional[Dict[str, str]] = None) -> List[Service]:
+    """Service graph for the sandbox template, configured from startup.sh's environment.
+
+    Args:
+        profile: "gui" (full desktop) or "headless" (nginx + mcp-connect only)
+        env: Environment to read settings from (defaults to os.environ)
+
+    Returns:
+        Services in declaration order; start order comes from their deps
+    """
+    env = dict(os.environ if env is None else env)
+    port = int(env.get("PORT") or 3000)
+
+    services = [
+        Service(
+            name="nginx",
+            cmd=["sudo", "nginx", "-g", "daemon off;"],
+            ready=tcp_port(80),
+            adopt=True,
+        ),
+        Service(
+            name="mcp",
+            cmd=["npm", "run", "start"],
+            cwd=MCP_CONNECT_DIR,
+            log_file="mcp.log",
+            ready=http_ok(f"http://127.0.0.1:{port}/health"),
+            ready_timeout=60,
+            phase="mcp_connect",
+            critical=True,
+            adopt=True,
+        ),
+        Service(name="mcp_servers", deps=["mcp"], task=warm_mcp_servers, phase="mcp_servers"),
+    ]
+    if profile == "headless":
+        return services
+
+    display = env.get("XVFB_DISPLAY") or env.get("DISPLAY") or ":99"
+    display_num = display.lstrip(":").split(".")[0]
+    x_socket = f"/tmp/.X11-unix/X{display_num}"
+    xauth = env.get("XAUTH_FILE") or env.get("XAUTHORITY") or "/home/user/.Xauthority"
+    vnc_port = int(env.get("VNC_PORT") or 5900)
+    novnc_port = int(env.get("NOVNC_PORT") or 6080)
+
+    def clear_x_lock() -> None:
+        # A crashed Xvfb leaves its lock and socket behind and would refuse to restart
+        for path in (f"/tmp/.X{display_num}-lock", x_socket):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    x11vnc_base = [
+        "x11vnc", "-display", display, "-rfbport", str(vnc_port),
+        "-localhost", "-forever", "-shared", "-auth", xauth,
+    ]
+    x11vnc_tuning = [
+        "-wait", env.get("X11VNC_WAIT") or "20",
+        "-defer", env.get("X11VNC_DEFER") or "20",
+        "-noxdamage", "-ncache", "0",
+    ] + shlex.split(env.get("X11VNC_EXTRA") or "")
+    if env.get("VNC_PASSWORD"):
+        x11vnc_auth = ["-rfbauth", "/home/user/.vnc/passwd"]
+    else:
+        x11vnc_auth = ["-nopw"]
+    x11vnc_log = ["-o", os.path.join(LOG_DIR, "x11vnc.log")]
+
+    services += [
+        Service(
+            name="xvfb",
+            cmd=["Xvfb", display, "-screen", "0", env.get("XVFB_RESOLUTION") or "1920x1080x24",
+                 "-nolisten", "tcp", "-auth", xauth],
+            log_file="xvfb.log",
+            ready=socket_exists(x_socket),
+            ready_timeout=10,
+            phase="xvfb",
+            pre_start=clear_x_lock,
+        ),
+        Service(name="fluxbox", cmd=["fluxbox"], deps=["xvfb"], log_file="fluxbox.log"),
+        Service(
+            name="pcmanfm",
+            cmd=["pcmanfm", "--desktop", "--profile=default"],
+            deps=["xvfb"],
+            log_file="pcmanfm.log",
+        ),
+        Service(
+            name="x11vnc",
+            cmd=x11vnc_base + x11vnc_tuning + x11vnc_auth + x11vnc_log,
+            # Minimal flags on restarts, in case a tuning option is unsupported by this build
+            fallback_cmd=x11vnc_base + x11vnc_auth + x11vnc_log,
+            deps=["xvfb"],
+            ready=tcp_port(vnc_port),
+            ready_timeout=5,
+        ),
+        Service(
+            name="novnc",
+            cmd=["websockify", f"--web={env.get('NOVNC_WEBROOT') or '/usr/share/novnc'}",
+                 str(novnc_port), f"127.0.0.1:{vnc_port}"],
+            deps=["x11vnc"],
+            log_file="novnc.log",
+            ready=http_ok(f"http://127.0.0.1:{novnc_port}/vnc.html"),
+            ready_timeout=10,
+        ),
+        Service(
+            name="chrome",
+            cmd=[CHROME_LAUNCHER, "about:blank"],
+            deps=["xvfb"],
+            log_file="chrome.log",
+            ready=http_ok("http://127.0.0.1:9222/json/version"),
+            phase="chrome_cdp",
+            adopt=True,
+            env={"XDG_RUNTIME_DIR": "/home/user/.xdg"},
+            pre_start=lambda: os.makedirs("/home/user/.xdg", exist_ok=True),
+        ),
+        Service(name="gui", deps=["novnc", "chrome"], phase="gui"),
+    ]
+    if _truthy(env.get("TINT2_ENABLED")):
+        services.append(Service(name="tint2", cmd=["tint2"], deps=["xvfb"], log_file="tint2.log"))
+    return services
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Start and supervise the sandbox services")
+    parser.add_argument("--profile", choices=["gui", "headless"], default="gui", help="Service set to run")
+    parser.add_argument("--ready-dir", default=READY_DIR, help="Readiness marker directory")
+    parser.add_argument("--log-dir", default=LOG_DIR, help="Directory for per-service logs and pid files")
+    parser.add_argument(
+        "--start-ms",
+        type=int,
+        default=int(os.environ.get("STARTUP_START_MS") or 0) or None,
+        help="Epoch ms that phase timings are relative to (default: $STARTUP_START_MS or now)",
+    )
+    parser.add_argument(
+        "--sample-interval",
+        type=float,
+        default=float(os.environ.get("SUPERVISOR_SAMPLE_INTERVAL") or SAMPLE_INTERVAL),
+        help="Seconds between per-service CPU/RSS/fd samples; 0 disables sampling "
+             f"(default: $SUPERVISOR_SAMPLE_INTERVAL or {SAMPLE_INTERVAL:g})",
+    )
+    parser.add_argument(
+        "--stats-samples",
+        type=int,
+        default=int(os.environ.get("SUPERVISOR_STATS_SAMPLES") or STATS_SAMPLES),
+        help=f"Samples kept in the stats ring buffer (default: $SUPERVISOR_STATS_SAMPLES or {STATS_SAMPLES})",
+    )
+    args = parser.parse_args()
+
+    supervisor = Supervisor(
+        build_services(args.profile),
+        ready_dir=args.ready_dir,
+        log_dir=args.log_dir,
+        start_ms=args.start_ms,
+        sample_interval=args.sample_interval,
+        stats_samples=args.stats_samples,
+    )
+    asyncio.run(supervisor.run())
+
+
+if __name__ == "__main__":
+    main()
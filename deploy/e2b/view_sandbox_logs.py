@@ -4,11 +4,17 @@
 from __future__ import annotations
 
 import argparse
+import base64
 import inspect
+import json
 import os
 import shlex
 import sys
-from typing import Optional
+import tarfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
 
 SandboxType = None
 
@@ -52,6 +58,8 @@ except Exception:  # pragma: no cover - fallback when package layout changes
 
 
 DEFAULT_LOG_DIR = "/home/user"
+# Upper bound on bytes returned per file by one incremental (offset-based) fetch
+MAX_FETCH_BYTES = 4 * 1024 * 1024
 
 
 def build_parser() -> argparse.ArgumentParser:
@@ -62,12 +70,34 @@ def build_parser() -> argparse.ArgumentParser:
     )
     parser.add_argument(
         "sandbox_id",
-        help="ID of the sandbox to inspect (e.g. sandbox_20240101_120000).",
+        nargs="+",
+        help=(
+            "ID of the sandbox to inspect (e.g. sandbox_20240101_120000). "
+            "Several IDs are accepted with --collect."
+        ),
     )
     parser.add_argument(
         "--path",
-        default=f"{DEFAULT_LOG_DIR}/novnc.log",
-        help="Absolute path of the log file inside the sandbox (default: /home/user/novnc.log).",
+        action="append",
+        default=None,
+        help=(
+            "Absolute path of the log file inside the sandbox (default: /home/user/novnc.log). "
+            "Repeat to read several files at once; lines are then prefixed with [file name]."
+        ),
+    )
+    parser.add_argument(
+        "-f",
+        "--follow",
+        action="store_true",
+        help="Keep streaming new lines (one background command inside the sandbox) until Ctrl+C.",
+    )
+    parser.add_argument(
+        "--offset-state",
+        default=None,
+        help=(
+            "JSON file mapping each --path to a byte offset. Only bytes written since the stored "
+            "offset are fetched, then the offsets are saved again (resumable polling)."
+        ),
     )
     parser.add_argument(
         "--lines",
@@ -83,7 +113,22 @@ def build_parser() -> argparse.ArgumentParser:
     parser.add_argument(
         "--log-dir",
         default=DEFAULT_LOG_DIR,
-        help="Directory inside the sandbox to search when using --list (default: /home/user).",
+        help="Directory inside the sandbox to search when using --list or --collect (default: /home/user).",
+    )
+    parser.add_argument(
+        "--collect",
+        metavar="OUT_DIR",
+        default=None,
+        help=(
+            "Download every *.log under --log-dir of each sandbox as one compressed archive "
+            "and unpack it into OUT_DIR/<sandbox_id>/."
+        ),
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help="Sandboxes collected at once with --collect (default: 4).",
     )
     parser.add_argument(
         "--insecure",
@@ -138,6 +183,7 @@ def connect_sandbox(sandbox_id: str, secure: bool) -> SandboxType:  # type: igno
 
 
 def run_command(sandbox: Sandbox, command: str) -> str:
+    """Run a shell command (the SDK already wraps it in a login shell; no `bash -lc` needed)."""
     try:
         result = sandbox.commands.run(
             command,
@@ -158,7 +204,7 @@ def run_command(sandbox: Sandbox, command: str) -> str:
 
 def list_logs(sandbox: Sandbox, log_dir: str) -> str:
     escaped_dir = shlex.quote(log_dir)
-    cmd = f"bash -lc 'set -e; ls -1 {escaped_dir}/*.log 2>/dev/null'"
+    cmd = f"set -e; ls -1 {escaped_dir}/*.log 2>/dev/null"
     output = run_command(sandbox, cmd)
     return output.strip() or "<no log files found>"
 
@@ -166,10 +212,10 @@ def list_logs(sandbox: Sandbox, log_dir: str) -> str:
 def tail_log(sandbox: Sandbox, path: str, lines: int) -> str:
     escaped_path = shlex.quote(path)
     cmd = (
-        "bash -lc 'set -e; "
+        "set -e; "
         f"if [ ! -f {escaped_path} ]; then echo "
         f"\"Log file not found: {escaped_path}\" >&2; exit 1; fi; "
-        f"tail -n {lines} {escaped_path}'"
+        f"tail -n {lines} {escaped_path}"
     )
     try:
         return run_command(sandbox, cmd)
@@ -184,20 +230,300 @@ def tail_log(sandbox: Sandbox, path: str, lines: int) -> str:
         raise
 
 
+def _label(path: str, paths: List[str]) -> str:
+    """Short per-file prefix: the base name, or the full path when base names collide."""
+    name = os.path.basename(path)
+    if sum(1 for p in paths if os.path.basename(p) == name) > 1:
+        return path
+    return name
+
+
+def _prefixed_tail_script(paths: List[str], lines: int, follow: bool) -> str:
+    """One shell script tailing every path, each line prefixed with [file] when there are several."""
+    if len(paths) == 1:
+        flags = f"-n {lines} -F" if follow else f"-n {lines}"
+        return f"tail {flags} -- {shlex.quote(paths[0])}"
+    parts = []
+    for path in paths:
+        prefix = f"[{_label(path, paths)}] ".replace("\\", "\\\\").replace("|", "\\|").replace("&", "\\&")
+        # --pid ends each follower once the wrapping shell is killed
+        flags = f"-n {lines} -F --pid=$$" if follow else f"-n {lines}"
+        parts.append(
+            f"tail {flags} -- {shlex.quote(path)} 2>&1 | sed -u {shlex.quote(f's|^|{prefix}|')}"
+            + (" &" if follow else ";")
+        )
+    if follow:
+        parts.append("wait")
+    return " ".join(parts)
+
+
+def tail_logs(sandbox: Sandbox, paths: List[str], lines: int) -> str:
+    """Last lines of several files in one command, multiplexed into one prefixed stream."""
+    return run_command(sandbox, _prefixed_tail_script(paths, lines, follow=False))
+
+
+def follow_logs(
+    sandbox: Sandbox,
+    paths: List[str],
+    lines: int,
+    write: Callable[[str], object] = sys.stdout.write,
+) -> int:
+    """Stream new log lines through stdout callbacks of one background command until interrupted."""
+    cmd = _prefixed_tail_script(paths, lines, follow=True)
+
+    # SDK stream chunks are not line-aligned: hold back each stream's partial last line
+    pending = {"stdout": "", "stderr": ""}
+
+    def _emitter(stream: str) -> Callable[[str], None]:
+        def _emit(chunk: str) -> None:
+            complete, newline, rest = (pending[stream] + chunk).rpartition("\n")
+            pending[stream] = rest
+            if newline:
+                write(complete + newline)
+                sys.stdout.flush()
+
+        return _emit
+
+    handle = sandbox.commands.run(
+        cmd,
+        background=True,
+        cwd="/home/user",
+        timeout=0,  # keep the stream open indefinitely
+    )
+    try:
+        # Sync SDK handles deliver output only to callbacks given to wait()
+        handle.wait(on_stdout=_emitter("stdout"), on_stderr=_emitter("stderr"))
+    except KeyboardInterrupt:
+        pass
+    except CommandExitException as exc:
+        stderr = getattr(exc, "stderr", "") or str(exc)
+        raise RuntimeError(f"Follow command ended inside sandbox: {stderr}") from exc
+    finally:
+        try:
+            handle.kill()
+        except Exception:
+            pass
+        for stream in ("stdout", "stderr"):
+            if pending[stream]:
+                write(pending[stream] + "\n")
+        sys.stdout.flush()
+    return 0
+
+
+def fetch_since(
+    sandbox: Sandbox,
+    offsets: Dict[str, int],
+    max_bytes: int = MAX_FETCH_BYTES,
+) -> Dict[str, Tuple[str, int]]:
+    """
+    Fetch only the bytes appended to each file since its offset, in one command.
+
+    Returns a mapping path -> (new text, next offset). Files that shrank (rotated or
+    truncated) are read again from the start; missing files return ("", -1).
+    """
+    script = []
+    for path, offset in offsets.items():
+        quoted = shlex.quote(path)
+        script.append(
+            f"f={quoted}; off={max(0, int(offset))}; "
+            'if [ -f "$f" ]; then '
+            'size=$(stat -c %s "$f"); if [ "$size" -lt "$off" ]; then off=0; fi; '
+            f'end=$size; if [ $((end - off)) -gt {int(max_bytes)} ]; then end=$((off + {int(max_bytes)})); fi; '
+            'printf "%s\t%s\t" "$off" "$end"; '
+            'tail -c +$((off + 1)) "$f" | head -c $((end - off)) | base64 -w0; echo; '
+            'else printf -- "-1\t-1\t\n"; fi'
+        )
+    output = run_command(sandbox, "; ".join(script))
+    results: Dict[str, Tuple[str, int]] = {}
+    for path, line in zip(offsets, output.splitlines()):
+        start, end, payload = (line.split("\t", 2) + ["", ""])[:3]
+        if int(end) < 0:
+            results[path] = ("", -1)
+            continue
+        text = base64.b64decode(payload).decode("utf-8", errors="replace") if payload else ""
+        results[path] = (text, int(end))
+    return results
+
+
+def incremental_fetch(sandbox: Sandbox, paths: List[str], state_file: str) -> str:
+    """Resumable polling: fetch what was appended since the offsets stored in state_file."""
+    try:
+        with open(state_file, "r", encoding="utf-8") as fh:
+            state = json.load(fh)
+    except (OSError, ValueError):
+        state = {}
+    results = fetch_since(sandbox, {path: int(state.get(path, 0)) for path in paths})
+
+    chunks = []
+    for path, (text, next_offset) in results.items():
+        if next_offset < 0:
+            sys.stderr.write(f"Log file not found: {path}\n")
+            continue
+        state[path] = next_offset
+        if not text:
+            continue
+        if len(paths) > 1:
+            label = _label(path, paths)
+            text = "".join(f"[{label}] {line}" for line in text.splitlines(keepends=True))
+        chunks.append(text)
+
+    with open(state_file, "w", encoding="utf-8") as fh:
+        json.dump(state, fh, indent=2)
+    return "".join(chunks)
+
+
+def _human_bytes(size: int) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if size < 1024 or unit == "MiB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size} B"
+
+
+def collect_sandbox_logs(
+    sandbox_id: str,
+    out_dir: str,
+    log_dir: str = DEFAULT_LOG_DIR,
+    secure: bool = True,
+    connect: Callable[..., Sandbox] = connect_sandbox,
+) -> Dict[str, object]:
+    """
+    Archive all *.log under log_dir in one command, download it in one transfer and unpack it locally.
+
+    Returns:
+        Dict with files, archive/uncompressed sizes and connect/archive/download timings (ms)
+    """
+    result: Dict[str, object] = {"sandbox_id": sandbox_id, "success": False}
+    t0 = time.monotonic()
+    try:
+        sandbox = connect(sandbox_id, secure=secure)
+        t_connect = time.monotonic()
+
+        archive = f"/tmp/logs-{uuid.uuid4().hex[:8]}.tar.gz"
+        quoted_archive = shlex.quote(archive)
+        script = (
+            f"cd {shlex.quote(log_dir)} && "
+            "find . -type f -name '*.log' -print0 "
+            f"| tar --null -T - -czf {quoted_archive}"
+        )
+        run_command(sandbox, script)
+        t_archive = time.monotonic()
+
+        try:
+            data = sandbox.files.read(archive, format="bytes")
+            t_download = time.monotonic()
+        finally:
+            try:
+                run_command(sandbox, f"rm -f {quoted_archive}")
+            except RuntimeError:
+                pass
+
+        target = os.path.join(out_dir, sandbox_id)
+        os.makedirs(target, exist_ok=True)
+        local_archive = os.path.join(target, "logs.tar.gz")
+        with open(local_archive, "wb") as fh:
+            fh.write(data)
+        with tarfile.open(local_archive, "r:gz") as tar:
+            members = [m for m in tar.getmembers() if m.isfile()]
+            if hasattr(tarfile, "data_filter"):
+                tar.extractall(target, members=members, filter="data")
+            else:  # pragma: no cover - Python < 3.12 without extraction filters
+                tar.extractall(target, members=[
+                    m for m in members if not m.name.startswith("/") and ".." not in m.name.split("/")
+                ])
+
+        result.update(
+            success=True,
+            path=target,
+            files=len(members),
+            archive_bytes=len(data),
+            uncompressed_bytes=sum(m.size for m in members),
+            connect_ms=round((t_connect - t0) * 1000, 1),
+            archive_ms=round((t_archive - t_connect) * 1000, 1),
+            download_ms=round((t_download - t_archive) * 1000, 1),
+        )
+    except Exception as exc:
+        result["error"] = str(exc)
+    result["total_ms"] = round((time.monotonic() - t0) * 1000, 1)
+    return result
+
+
+def collect_logs(
+    sandbox_ids: List[str],
+    out_dir: str,
+    log_dir: str = DEFAULT_LOG_DIR,
+    concurrency: int = 4,
+    secure: bool = True,
+    connect: Callable[..., Sandbox] = connect_sandbox,
+) -> List[Dict[str, object]]:
+    """Collect logs from many sandboxes with at most `concurrency` transfers in flight."""
+    os.makedirs(out_dir, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        return list(pool.map(
+            lambda sid: collect_sandbox_logs(sid, out_dir, log_dir, secure=secure, connect=connect),
+            sandbox_ids,
+        ))
+
+
+def format_collect_report(results: List[Dict[str, object]], wall_s: float) -> str:
+    lines = []
+    for r in results:
+        if r["success"]:
+            lines.append(
+                f"✅ {r['sandbox_id']}: {r['files']} files, "
+                f"{_human_bytes(r['archive_bytes'])} archive ({_human_bytes(r['uncompressed_bytes'])} raw) "
+                f"-> {r['path']} | connect {r['connect_ms']} ms, archive {r['archive_ms']} ms, "
+                f"download {r['download_ms']} ms, total {r['total_ms']} ms"
+            )
+        else:
+            lines.append(f"❌ {r['sandbox_id']}: {r.get('error')}")
+    ok = [r for r in results if r["success"]]
+    transferred = sum(r["archive_bytes"] for r in ok)
+    lines.append(
+        f"Collected {len(ok)}/{len(results)} sandboxes, {_human_bytes(transferred)} transferred "
+        f"in {wall_s:.2f}s"
+    )
+    return "\n".join(lines)
+
+
 def main(argv: Optional[list[str]] = None) -> int:
     parser = build_parser()
     args = parser.parse_args(argv)
 
+    if len(args.sandbox_id) > 1 and not args.collect:
+        parser.error("multiple sandbox IDs are only supported with --collect")
+
     ensure_api_key()
 
-    sandbox = connect_sandbox(args.sandbox_id, secure=not args.insecure)
+    if args.collect:
+        t0 = time.monotonic()
+        results = collect_logs(
+            args.sandbox_id,
+            args.collect,
+            log_dir=args.log_dir,
+            concurrency=args.concurrency,
+            secure=not args.insecure,
+        )
+        sys.stdout.write(format_collect_report(results, time.monotonic() - t0) + "\n")
+        return 0 if all(r["success"] for r in results) else 1
+
+    sandbox = connect_sandbox(args.sandbox_id[0], secure=not args.insecure)
+    paths = args.path or [f"{DEFAULT_LOG_DIR}/novnc.log"]
 
     if args.exec_cmd:
-        output = run_command(sandbox, f"bash -lc {shlex.quote(args.exec_cmd)}")
+        output = run_command(sandbox, args.exec_cmd)
     elif args.list:
         output = list_logs(sandbox, args.log_dir)
+    elif args.follow:
+        return follow_logs(sandbox, paths, args.lines)
+    elif args.offset_state:
+        output = incremental_fetch(sandbox, paths, args.offset_state)
+        if not output:
+            return 0
+    elif len(paths) > 1:
+        output = tail_logs(sandbox, paths, args.lines)
     else:
-        output = tail_log(sandbox, args.path, args.lines)
+        output = tail_log(sandbox, paths[0], args.lines)
 
     sys.stdout.write(output)
     if not output.endswith("\n"):
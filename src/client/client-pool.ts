@@ -0,0 +1,402 @@
+import type { Logger } from '../utils/logger.js';
+import { summarizeSamples } from '../utils/stats.js';
+import type { MCPClientManager } from './mcp-client-manager.js';
+
+export interface ClientPoolOptions {
+  minClients: number;
+  maxClients: number;
+  // 0 = no per-client limit
+  maxInFlightPerClient: number;
+  queueTimeoutMs: number;
+}
+
+interface PooledClient {
+  id: string;
+  inFlight: number;
+  lastUsed: number;
+}
+
+interface PendingSpawn {
+  member: Promise<PooledClient>;
+  // false for the ensureMin() spawns: joining one does not count as an avoided spawn
+  onDemand: boolean;
+}
+
+interface Waiter {
+  enqueuedAt: number;
+  resolve: (clientId: string) => void;
+  reject: (error: Error) => void;
+  timer: NodeJS.Timeout;
+}
+
+/**
+ * Raised when a request waited `queueTimeoutMs` for a pool slot without getting one.
+ */
+export class PoolSaturatedError extends Error {
+  constructor(message: string) {
+    super(message);
+    this.name = 'PoolSaturatedError';
+  }
+}
+
+// Queue waits kept for the percentile metrics
+const WAIT_SAMPLE_SIZE = 500;
+
+/**
+ * A pool of MCP clients (one server process each) for a single /bridge cache key.
+ *
+ * Requests go to an idle client first, then to a newly spawned one while the pool is below
+ * `maxClients`, then to the least-loaded client with a free slot; otherwise they queue until a
+ * slot frees up or `queueTimeoutMs` elapses. Spawning on demand is single-flight per unit of
+ * demand: a request joins a spawn in progress while that spawn's request slots cover it, and
+ * only starts another spawn (in parallel) when they do not.
+ */
+export class ClientPool {
+  public readonly label: string;
+  private readonly mcpClient: MCPClientManager;
+  private readonly logger: Logger;
+  private readonly spawnClient: () => Promise<string>;
+  private readonly options: ClientPoolOptions;
+  private readonly members: PooledClient[] = [];
+  private readonly waiters: Waiter[] = [];
+  private readonly waitSamples: number[] = [];
+  private spawning = 0;
+  // Most recent spawn still in progress; cold requests await it while the slots of the
+  // spawns in progress cover them, instead of spawning again
+  private pendingSpawn: PendingSpawn | null = null;
+  // Requests in acquire() waiting on a spawn (their own or one they joined)
+  private awaitingSpawn = 0;
+  private closed = false;
+  private _lastUsed = Date.now();
+  private peakInFlight = 0;
+  private peakQueued = 0;
+  private readonly counters = {
+    acquired: 0,
+    queuedTotal: 0,
+    timeouts: 0,
+    spawned: 0,
+    spawnFailures: 0,
+    spawnsAvoided: 0,
+  };
+
+  constructor(
+    label: string,
+    mcpClient: MCPClientManager,
+    logger: Logger,
+    spawnClient: () => Promise<string>,
+    options: ClientPoolOptions
+  ) {
+    this.label = label;
+    this.mcpClient = mcpClient;
+    this.logger = logger;
+    this.spawnClient = spawnClient;
+    this.options = options;
+  }
+
+  public get lastUsed(): number {
+    return this._lastUsed;
+  }
+
+  public get inFlight(): number {
+    return this.members.reduce((sum, member) => sum + member.inFlight, 0);
+  }
+
+  /**
+   * Spawn clients in the background until the pool holds `minClients`.
+   */
+  public ensureMin(): void {
+    const missing = this.options.minClients - this.members.length - this.spawning;
+    for (let i = 0; i < missing; i++) {
+      this.spawnInBackground(false);
+    }
+  }
+
+  /**
+   * Reserve a slot on a client and return its ID; pair every call with release().
+   */
+  public async acquire(): Promise<string> {
+    if (this.closed) {
+      throw new Error(`Client pool for ${this.label} is closed`);
+    }
+    this._lastUsed = Date.now();
+
+    let joinedSpawn = false;
+    for (;;) {
+      const idle = this.available().find((member) => member.inFlight === 0);
+      if (idle) {
+        return this.lease(idle);
+      }
+
+      // A request that already waited for a spawn takes any free slot rather than waiting again
+      const free = joinedSpawn ? this.leastLoaded() : undefined;
+      if (free) {
+        return this.lease(free);
+      }
+
+      if (this.pendingSpawn && this.spawnsCoverDemand()) {
+        if (!joinedSpawn) {
+          joinedSpawn = true;
+          if (this.pendingSpawn.onDemand) {
+            this.counters.spawnsAvoided++;
+          }
+        }
+        // Share the outcome of the spawn in progress, then dispatch again
+        await this.awaitSpawn(this.pendingSpawn.member);
+        continue;
+      }
+
+      if (this.canSpawn()) {
+        const member = await this.awaitSpawn(this.spawn(true));
+        const clientId = this.lease(member);
+        // Requests queued while this client was spawning can use its remaining slots
+        this.drain();
+        return clientId;
+      }
+
+      const leastLoaded = this.leastLoaded();
+      if (leastLoaded) {
+        return this.lease(leastLoaded);
+      }
+      break;
+    }
+
+    this.counters.queuedTotal++;
+    return new Promise<string>((resolve, reject) => {
+      const waiter: Waiter = {
+        enqueuedAt: Date.now(),
+        resolve,
+        reject,
+        timer: setTimeout(() => {
+          const index = this.waiters.indexOf(waiter);
+          if (index >= 0) {
+            this.waiters.splice(index, 1);
+          }
+          this.counters.timeouts++;
+          this.recordWait(Date.now() - waiter.enqueuedAt);
+          reject(new PoolSaturatedError(
+            `No client available for ${this.label} within ${this.options.queueTimeoutMs}ms`
+          ));
+        }, this.options.queueTimeoutMs),
+      };
+      this.waiters.push(waiter);
+      this.peakQueued = Math.max(this.peakQueued, this.waiters.length);
+    });
+  }
+
+  public release(clientId: string): void {
+    const member = this.members.find((candidate) => candidate.id === clientId);
+    if (member) {
+      member.inFlight = Math.max(0, member.inFlight - 1);
+      member.lastUsed = Date.now();
+    }
+    this._lastUsed = Date.now();
+    this.drain();
+  }
+
+  public has(clientId: string): boolean {
+    return this.members.some((member) => member.id === clientId);
+  }
+
+  /**
+   * Drop a client whose transport closed; queued requests move to the remaining clients.
+   */
+  public remove(clientId: string): boolean {
+    const index = this.members.findIndex((member) => member.id === clientId);
+    if (index < 0) {
+      return false;
+    }
+    this.members.splice(index, 1);
+    this.drain();
+    return true;
+  }
+
+  /**
+   * Clients without requests in flight that have not been used for `idleMs`.
+   */
+  public idleClients(idleMs: number): string[] {
+    const now = Date.now();
+    return this.members
+      .filter((member) => member.inFlight === 0 && now - member.lastUsed >= idleMs)
+      .map((member) => member.id);
+  }
+
+  /**
+   * Detach clients idle for `idleMs` beyond `minClients` and return their IDs for closing.
+   */
+  public trimIdle(idleMs: number): string[] {
+    const removable = this.idleClients(idleMs).slice(
+      0,
+      Math.max(0, this.members.length - this.options.minClients)
+    );
+    for (const clientId of removable) {
+      this.members.splice(this.members.findIndex((member) => member.id === clientId), 1);
+    }
+    return removable;
+  }
+
+  public async close(): Promise<void> {
+    this.closed = true;
+    for (const waiter of this.waiters.splice(0)) {
+      clearTimeout(waiter.timer);
+      waiter.reject(new Error(`Client pool for ${this.label} is closed`));
+    }
+    const members = this.members.splice(0);
+    await Promise.all(members.map(async ({ id }) => {
+      try {
+        await this.mcpClient.closeClient(id);
+      } catch (error) {
+        this.logger.error(`Error closing client ${id}:`, error);
+      }
+    }));
+  }
+
+  public stats(): Record<string, unknown> {
+    const inFlight = this.inFlight;
+    const cap = this.options.maxInFlightPerClient;
+    return {
+      server: this.label,
+      options: { ...this.options },
+      clients: this.members.length,
+      spawning: this.spawning,
+      inFlight,
+      peakInFlight: this.peakInFlight,
+      perClientInFlight: this.members.map((member) => member.inFlight),
+      // Share of request slots in use (null without a per-client limit)
+      occupancy: cap > 0 && this.members.length > 0
+        ? Math.round((inFlight / (cap * this.members.length)) * 1000) / 1000
+        : null,
+      queued: this.waiters.length,
+      peakQueued: this.peakQueued,
+      ...this.counters,
+      queueWaitMs: summarizeSamples(this.waitSamples),
+    };
+  }
+
+  private available(): PooledClient[] {
+    return this.members.filter((member) => this.mcpClient.isAlive(member.id));
+  }
+
+  private leastLoaded(): PooledClient | undefined {
+    const cap = this.options.maxInFlightPerClient;
+    let best: PooledClient | undefined;
+    for (const member of this.available()) {
+      if (cap > 0 && member.inFlight >= cap) {
+        continue;
+      }
+      if (!best || member.inFlight < best.inFlight) {
+        best = member;
+      }
+    }
+    return best;
+  }
+
+  /**
+   * Whether the request slots of the clients being spawned cover one more request on top of
+   * those already waiting for them or queued.
+   */
+  private spawnsCoverDemand(): boolean {
+    const cap = this.options.maxInFlightPerClient;
+    if (cap === 0) {
+      return this.spawning > 0;
+    }
+    return this.spawning * cap > this.awaitingSpawn + this.waiters.length;
+  }
+
+  private async awaitSpawn(spawn: Promise<PooledClient>): Promise<PooledClient> {
+    this.awaitingSpawn++;
+    try {
+      return await spawn;
+    } finally {
+      this.awaitingSpawn--;
+    }
+  }
+
+  private canSpawn(): boolean {
+    return !this.closed && this.members.length + this.spawning < this.options.maxClients;
+  }
+
+  private lease(member: PooledClient, waitedMs?: number): string {
+    member.inFlight++;
+    member.lastUsed = Date.now();
+    this.counters.acquired++;
+    if (waitedMs !== undefined) {
+      this.recordWait(waitedMs);
+    }
+    this.peakInFlight = Math.max(this.peakInFlight, this.inFlight);
+    return member.id;
+  }
+
+  private recordWait(waitedMs: number): void {
+    this.waitSamples.push(waitedMs);
+    if (this.waitSamples.length > WAIT_SAMPLE_SIZE) {
+      this.waitSamples.shift();
+    }
+  }
+
+  /**
+   * Spawn a client and add it to the pool; onDemand marks spawns started for requests
+   * (rather than to reach `minClients`).
+   */
+  private spawn(onDemand: boolean): Promise<PooledClient> {
+    const pending: PendingSpawn = {
+      member: this.spawnMember().finally(() => {
+        if (this.pendingSpawn === pending) {
+          this.pendingSpawn = null;
+        }
+      }),
+      onDemand,
+    };
+    this.pendingSpawn = pending;
+    return pending.member;
+  }
+
+  private async spawnMember(): Promise<PooledClient> {
+    this.spawning++;
+    try {
+      const id = await this.spawnClient();
+      this.counters.spawned++;
+      if (this.closed) {
+        await this.mcpClient.closeClient(id).catch(() => {});
+        throw new Error(`Client pool for ${this.label} is closed`);
+      }
+      const member = { id, inFlight: 0, lastUsed: Date.now() };
+      this.members.push(member);
+      return member;
+    } catch (error) {
+      this.counters.spawnFailures++;
+      throw error;
+    } finally {
+      this.spawning--;
+    }
+  }
+
+  private spawnInBackground(onDemand: boolean): void {
+    this.spawn(onDemand)
+      .then(() => this.drain())
+      .catch((error) => {
+        this.logger.error(`Failed to spawn pooled client for ${this.label}:`, error);
+        // Fail queued requests rather than leaving them waiting on a server that does not start
+        if (this.members.length + this.spawning === 0) {
+          for (const waiter of this.waiters.splice(0)) {
+            clearTimeout(waiter.timer);
+            waiter.reject(error instanceof Error ? error : new Error(String(error)));
+          }
+        }
+      });
+  }
+
+  private drain(): void {
+    while (this.waiters.length > 0) {
+      const member = this.leastLoaded();
+      if (!member) {
+        break;
+      }
+      const waiter = this.waiters.shift()!;
+      clearTimeout(waiter.timer);
+      waiter.resolve(this.lease(member, Date.now() - waiter.enqueuedAt));
+    }
+    if (this.waiters.length > this.spawning && this.canSpawn()) {
+      this.spawnInBackground(true);
+    }
+  }
+}
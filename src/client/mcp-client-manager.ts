@@ -1,3 +1,5 @@
+import { randomUUID } from 'crypto';
+import { EventEmitter } from 'events';
 import { Client } from '@modelcontextprotocol/sdk/client/index.js';
 import { getDefaultEnvironment, StdioClientTransport } from '@modelcontextprotocol/sdk/client/stdio.js';
 import { SSEClientTransport } from '@modelcontextprotocol/sdk/client/sse.js';
@@ -14,13 +16,23 @@ import {
   ListResourcesResultSchema,
   ListResourceTemplatesResultSchema,
   ListToolsResultSchema,
+  PromptListChangedNotificationSchema,
   ReadResourceResultSchema,
+  ResourceListChangedNotificationSchema,
+  ToolListChangedNotificationSchema,
   LATEST_PROTOCOL_VERSION,
   CompatibilityCallToolResultSchema
 } from '@modelcontextprotocol/sdk/types.js';
 import { Logger } from '../utils/logger.js';
 
-export class MCPClientManager {
+/**
+ * Owns the MCP client connections used by the /bridge endpoint.
+ *
+ * Emits `clientClosed` (clientId) once a client's transport closes, fails, or is closed
+ * explicitly, so callers caching client IDs can evict them without probing, and
+ * `listChanged` (clientId, notification method) when a server reports a list change.
+ */
+export class MCPClientManager extends EventEmitter {
   private clients: Map<string, Client> = new Map();
   private transports: Map<string, Transport> = new Map();
   private readonly logger: Logger;
@@ -43,11 +55,13 @@ export class MCPClientManager {
   };
 
   constructor(logger: Logger) {
+    super();
     this.logger = logger;
   }
 
   public async createClient(serverPath: string, args?: string[], env?: Record<string, string>): Promise<string> {
-    const clientId = `client_${Date.now()}`;
+    // Concurrent creations in the same millisecond must not share an ID
+    const clientId = `client_${randomUUID()}`;
     this.logger.info(`Creating client ${clientId} for ${serverPath}`);
     try {
       let transport;
@@ -79,6 +93,31 @@ export class MCPClientManager {
         capabilities: this.capabilities
       });
 
+      // Passive liveness: a closed or failed transport drops the client right away
+      client.onclose = () => {
+        if (this.clients.has(clientId)) {
+          this.logger.warn(`Client ${clientId} transport closed`);
+        }
+        this.forget(clientId);
+      };
+      client.onerror = (error) => {
+        if (!this.clients.has(clientId)) {
+          return;
+        }
+        this.logger.warn(`Client ${clientId} transport error; closing client:`, error);
+        void this.closeClient(clientId).catch(() => {});
+      };
+
+      for (const schema of [
+        ToolListChangedNotificationSchema,
+        PromptListChangedNotificationSchema,
+        ResourceListChangedNotificationSchema,
+      ]) {
+        client.setNotificationHandler(schema, (notification) => {
+          this.emit('listChanged', clientId, notification.method);
+        });
+      }
+
       await client.connect(transport);
       
       this.clients.set(clientId, client);
@@ -91,6 +130,30 @@ export class MCPClientManager {
     }
   }
 
+  /**
+   * Whether the client exists and its transport has not closed.
+   */
+  public isAlive(clientId: string): boolean {
+    return this.clients.has(clientId);
+  }
+
+  /**
+   * Ping a client with a timeout. Used by the idle-client health sweep; never throws.
+   */
+  public async checkHealth(clientId: string, timeoutMs: number): Promise<boolean> {
+    const client = this.clients.get(clientId);
+    if (!client) {
+      return false;
+    }
+    try {
+      await client.ping({ timeout: timeoutMs });
+      return true;
+    } catch (error) {
+      this.logger.warn(`Health check failed for client ${clientId}:`, error);
+      return false;
+    }
+  }
+
   public async executeRequest(clientId: string, method: string, params: any): Promise<any> {
     const client = this.clients.get(clientId);
     if (!client) {
@@ -157,12 +220,19 @@ export class MCPClientManager {
         await client.close();
         await transport.close();
       } finally {
-        this.transports.delete(clientId);
-        this.clients.delete(clientId);
+        this.forget(clientId);
       }
     }
   }
 
+  private forget(clientId: string): void {
+    const known = this.clients.delete(clientId);
+    this.transports.delete(clientId);
+    if (known) {
+      this.emit('clientClosed', clientId);
+    }
+  }
+
   public async stop(): Promise<void> {
     try {
       await this.cleanup();
@@ -3,6 +3,7 @@ import path from 'path';
 import fs from 'fs';
 import yaml from 'js-yaml';
 import { fileURLToPath } from 'url';
+import type { ClientPoolOptions } from '../client/client-pool.js';
 
 const __filename = fileURLToPath(import.meta.url);
 const __dirname = path.dirname(__filename);
@@ -17,6 +18,8 @@ export interface StreamableServerConfig {
   description?: string;
   timeout?: number;
   retries?: number;
+  // Idle sessions kept pre-started for new clients (0/unset = start on demand)
+  poolSize?: number;
 }
 
 export interface Config {
@@ -34,6 +37,18 @@ export interface Config {
     sessionTtlMs: number;
     servers: Record<string, StreamableServerConfig>;
   };
+  bridge: {
+    // Idle /bridge clients are pinged this often (0 disables the sweep)
+    healthCheckIntervalMs: number;
+    healthCheckTimeoutMs: number;
+    // Client pool per serverPath+args+env
+    pool: ClientPoolOptions;
+  };
+  // tools/prompts/resources list responses cached per upstream server (ttlMs 0 disables)
+  listCache: {
+    ttlMs: number;
+    maxEntries: number;
+  };
 }
 
 function validateConfig(config: Config): void {
@@ -48,6 +63,35 @@ function validateConfig(config: Config): void {
   if (Number.isNaN(config.streamable.sessionTtlMs) || config.streamable.sessionTtlMs <= 0) {
     throw new Error('STREAM_SESSION_TTL_MS must be a positive integer');
   }
+
+  if (Number.isNaN(config.bridge.healthCheckIntervalMs) || config.bridge.healthCheckIntervalMs < 0) {
+    throw new Error('BRIDGE_HEALTH_INTERVAL_MS must be a non-negative integer');
+  }
+
+  if (Number.isNaN(config.bridge.healthCheckTimeoutMs) || config.bridge.healthCheckTimeoutMs <= 0) {
+    throw new Error('BRIDGE_HEALTH_TIMEOUT_MS must be a positive integer');
+  }
+
+  const { minClients, maxClients, maxInFlightPerClient, queueTimeoutMs } = config.bridge.pool;
+  if (!Number.isInteger(maxClients) || maxClients < 1) {
+    throw new Error('BRIDGE_POOL_MAX must be a positive integer');
+  }
+  if (!Number.isInteger(minClients) || minClients < 0 || minClients > maxClients) {
+    throw new Error('BRIDGE_POOL_MIN must be an integer between 0 and BRIDGE_POOL_MAX');
+  }
+  if (!Number.isInteger(maxInFlightPerClient) || maxInFlightPerClient < 0) {
+    throw new Error('BRIDGE_POOL_MAX_IN_FLIGHT must be a non-negative integer');
+  }
+  if (!Number.isInteger(queueTimeoutMs) || queueTimeoutMs <= 0) {
+    throw new Error('BRIDGE_POOL_QUEUE_TIMEOUT_MS must be a positive integer');
+  }
+
+  if (Number.isNaN(config.listCache.ttlMs) || config.listCache.ttlMs < 0) {
+    throw new Error('LIST_CACHE_TTL_MS must be a non-negative integer');
+  }
+  if (Number.isNaN(config.listCache.maxEntries) || config.listCache.maxEntries <= 0) {
+    throw new Error('LIST_CACHE_MAX_ENTRIES must be a positive integer');
+  }
 }
 
 /**
@@ -80,6 +124,12 @@ function resolveEnvVarsInObject(obj: any): any {
   return obj;
 }
 
+function validatePoolSize(key: string, poolSize: unknown): void {
+  if (poolSize !== undefined && (!Number.isInteger(poolSize) || (poolSize as number) < 0)) {
+    throw new Error(`poolSize for server "${key}" must be a non-negative integer`);
+  }
+}
+
 function parseServers(): Record<string, StreamableServerConfig> {
   // Priority 1: Load from JSON file
   const configPaths = [
@@ -107,6 +157,7 @@ function parseServers(): Record<string, StreamableServerConfig> {
           if (!config.command) {
             throw new Error(`Missing command for server "${key}"`);
           }
+          validatePoolSize(key, config.poolSize);
 
           // Resolve environment variable references
           resolvedServers[key] = resolveEnvVarsInObject(config);
@@ -136,6 +187,7 @@ function parseServers(): Record<string, StreamableServerConfig> {
       if (!value.command) {
         throw new Error(`Missing command for server "${key}"`);
       }
+      validatePoolSize(key, value.poolSize);
     });
     console.log('✓ Loaded MCP servers from MCP_SERVERS environment variable');
     return resolveEnvVarsInObject(parsed);
@@ -172,6 +224,20 @@ export function loadConfig(): Config {
       sessionTtlMs: parseInt(process.env.STREAM_SESSION_TTL_MS || `${5 * 60 * 1000}`, 10),
       servers: parseServers(),
     },
+    bridge: {
+      healthCheckIntervalMs: parseInt(process.env.BRIDGE_HEALTH_INTERVAL_MS || '30000', 10),
+      healthCheckTimeoutMs: parseInt(process.env.BRIDGE_HEALTH_TIMEOUT_MS || '5000', 10),
+      pool: {
+        minClients: parseInt(process.env.BRIDGE_POOL_MIN || '1', 10),
+        maxClients: parseInt(process.env.BRIDGE_POOL_MAX || '1', 10),
+        maxInFlightPerClient: parseInt(process.env.BRIDGE_POOL_MAX_IN_FLIGHT || '0', 10),
+        queueTimeoutMs: parseInt(process.env.BRIDGE_POOL_QUEUE_TIMEOUT_MS || '30000', 10),
+      },
+    },
+    listCache: {
+      ttlMs: parseInt(process.env.LIST_CACHE_TTL_MS || '60000', 10),
+      maxEntries: parseInt(process.env.LIST_CACHE_MAX_ENTRIES || '1000', 10),
+    },
   };
 
   validateConfig(config);
@@ -3,8 +3,10 @@ import express, { Request, Response } from 'express';
 import { Config, StreamableServerConfig } from '../config/config.js';
 import { Logger } from '../utils/logger.js';
 import { MCPClientManager } from '../client/mcp-client-manager.js';
+import { ClientPool, PoolSaturatedError } from '../client/client-pool.js';
 import { TunnelManager } from '../utils/tunnel.js';
 import { StreamSessionManager } from '../stream/session-manager.js';
+import { ListCache } from './list-cache.js';
 import type { StreamSession } from '../stream/stream-session.js';
 import type { JSONRPCMessage } from '@modelcontextprotocol/sdk/types.js';
 
@@ -19,11 +21,11 @@ export class HttpServer {
   private reconnectTimer: NodeJS.Timeout | null = null;
   private streamSessionCleanupTimer: NodeJS.Timeout | null = null;
   private bridgeCleanupTimer: NodeJS.Timeout | null = null;
-  private clientCache: Map<string, {
-    id: string,
-    lastUsed: number,
-    env?: Record<string, string>
-  }> = new Map();
+  private bridgeHealthTimer: NodeJS.Timeout | null = null;
+  private clientPools: Map<string, ClientPool> = new Map();
+  private readonly listCache: ListCache;
+  // List cache scope of each stream session (its serverId and header env overrides)
+  private readonly sessionCacheScopes = new WeakMap<StreamSession, string>();
   private readonly CLIENT_CACHE_TTL = 5 * 60 * 1000; // five minutes caching time
   private readonly CLEANUP_INTERVAL_DIVISOR = 3; // Run cleanup every TTL/3
   private readonly streamSessionManager: StreamSessionManager;
@@ -49,6 +51,18 @@ export class HttpServer {
       this.config.streamable.sessionTtlMs
     );
 
+    // Transport close/error events evict cached bridge clients, so the hot path needs no ping
+    this.mcpClient.on('clientClosed', (clientId: string) => this.evictBridgeClient(clientId));
+
+    this.listCache = new ListCache(this.config.listCache.ttlMs, this.config.listCache.maxEntries);
+    this.mcpClient.on('listChanged', (clientId: string, notificationMethod: string) => {
+      for (const [cacheKey, clientPool] of this.clientPools.entries()) {
+        if (clientPool.has(clientId)) {
+          this.listCache.invalidateForNotification(cacheKey, notificationMethod);
+        }
+      }
+    });
+
     this.setupMiddleware();
     this.setupRoutes();
 
@@ -88,6 +102,16 @@ export class HttpServer {
     } else {
       this.logger.warn('Bridge session cleanup is DISABLED - sessions will not be automatically cleaned up');
     }
+
+    // Idle clients produce no transport traffic, so a dead process would only surface on the next
+    // request; ping them in the background instead
+    const healthInterval = this.config.bridge.healthCheckIntervalMs;
+    if (healthInterval > 0) {
+      this.bridgeHealthTimer = setInterval(
+        () => void this.sweepIdleBridgeClients(),
+        healthInterval
+      );
+    }
   }
 
   private setupMiddleware(): void {
@@ -186,7 +210,6 @@ export class HttpServer {
   private setupRoutes(): void {
     // Bridge endpoint
     this.app.post('/bridge', async (req: Request, res: Response) => {
-      let clientId: string | undefined;
       try {
         const { serverPath, method, params, args, env } = req.body;
         this.logger.info('Bridge request received:', this.maskSensitiveData(req.body));
@@ -200,46 +223,43 @@ export class HttpServer {
 
         // Generate cache key
         const cacheKey = `${serverPath}-${JSON.stringify(args)}-${JSON.stringify(env)}`;
-        const cachedClient = this.clientCache.get(cacheKey);
-
-        if (cachedClient) {
-          try {
-            // Test if the connection is still valid
-            await this.mcpClient.executeRequest(cachedClient.id, 'ping', {});
-            clientId = cachedClient.id;
-            cachedClient.lastUsed = Date.now();
-          } catch (error) {
-            // If the connection is invalid, delete the cache and create a new one
-            await this.mcpClient.closeClient(cachedClient.id).catch(() => {});
-            this.clientCache.delete(cacheKey);
-            clientId = await this.mcpClient.createClient(serverPath, args, env);
-            this.clientCache.set(cacheKey, {
-              id: clientId,
-              lastUsed: Date.now(),
-              env
-            });
+        const clientPool = this.getBridgePool(cacheKey, serverPath, args, env);
+
+        // Execute request; list methods are answered from the list cache when possible
+        const cacheable = this.listCache.isCacheable(method);
+        let response = cacheable ? this.listCache.get(cacheKey, method, params) : undefined;
+        if (response === undefined) {
+          const requestedAt = Date.now();
+          response = await this.executeBridgeRequest(clientPool, method, params);
+          if (cacheable) {
+            this.listCache.set(cacheKey, method, params, response, requestedAt);
           }
-        } else {
-          // Create new client
-          clientId = await this.mcpClient.createClient(serverPath, args, env);
-          this.clientCache.set(cacheKey, {
-            id: clientId,
-            lastUsed: Date.now(),
-            env
-          });
         }
-
-        // Execute request
-        const response = await this.mcpClient.executeRequest(clientId, method, params);
         res.json(response);
 
       } catch (error) {
         const errorText = error instanceof Error ? error.message : String(error);
+        if (error instanceof PoolSaturatedError) {
+          this.logger.warn(errorText);
+          res.status(503).json({ error: errorText });
+          return;
+        }
         this.logger.error('Error processing bridge request:', error);
         res.status(500).json({ error: `Failed to process request: ${errorText}` });
       }
     });
 
+    // Bridge pool occupancy and queue waits, list cache hit rates, stream session pools
+    this.app.get('/metrics', (req: Request, res: Response) => {
+      res.json({
+        bridge: {
+          pools: Array.from(this.clientPools.values()).map((clientPool) => clientPool.stats()),
+        },
+        listCache: this.listCache.stats(),
+        streamable: this.streamSessionManager.stats(),
+      });
+    });
+
     this.app.post('/mcp/:serverId', (req: Request, res: Response) => {
       this.logger.info(`MCP request received for serverId: ${req.params.serverId}`);
       void this.handleStreamablePost(req, res);
@@ -263,6 +283,83 @@ export class HttpServer {
     });
   }
 
+  /**
+   * Return the client pool for a /bridge cache key, creating it (and its `minClients` clients)
+   * on first use. Pools are sized by the BRIDGE_POOL_* settings only; request bodies cannot
+   * change them, so one request cannot make the bridge spawn arbitrarily many processes.
+   */
+  private getBridgePool(
+    cacheKey: string,
+    serverPath: string,
+    args?: string[],
+    env?: Record<string, string>
+  ): ClientPool {
+    const existing = this.clientPools.get(cacheKey);
+    if (existing) {
+      return existing;
+    }
+
+    // Label for logs and metrics: env values may carry secrets, so only their names are shown
+    const envNames = Object.keys(env || {});
+    const label = [serverPath, ...(args || []), ...(envNames.length > 0 ? [`(env: ${envNames.join(', ')})`] : [])].join(' ');
+    const clientPool = new ClientPool(
+      label,
+      this.mcpClient,
+      this.logger,
+      () => this.mcpClient.createClient(serverPath, args, env),
+      this.config.bridge.pool
+    );
+    this.clientPools.set(cacheKey, clientPool);
+    clientPool.ensureMin();
+    return clientPool;
+  }
+
+  /**
+   * Run a request on the least-loaded pooled client; when the client's transport dies under the
+   * request it is retried once on another client.
+   */
+  private async executeBridgeRequest(clientPool: ClientPool, method: string, params: any): Promise<any> {
+    for (let attempt = 0; ; attempt++) {
+      const clientId = await clientPool.acquire();
+      try {
+        return await this.mcpClient.executeRequest(clientId, method, params);
+      } catch (error) {
+        if (attempt > 0 || this.mcpClient.isAlive(clientId)) {
+          throw error;
+        }
+        this.logger.warn(`Bridge client ${clientId} died during ${method}; retrying on a new client`);
+      } finally {
+        clientPool.release(clientId);
+      }
+    }
+  }
+
+  private evictBridgeClient(clientId: string): void {
+    for (const clientPool of this.clientPools.values()) {
+      if (clientPool.remove(clientId)) {
+        this.logger.info(`Evicted bridge client ${clientId} from pool for ${clientPool.label}`);
+      }
+    }
+  }
+
+  private async sweepIdleBridgeClients(): Promise<void> {
+    const { healthCheckIntervalMs, healthCheckTimeoutMs } = this.config.bridge;
+    const idle = Array.from(this.clientPools.values()).flatMap(
+      (clientPool) => clientPool.idleClients(healthCheckIntervalMs)
+    );
+
+    await Promise.all(idle.map(async (id) => {
+      if (await this.mcpClient.checkHealth(id, healthCheckTimeoutMs)) {
+        return;
+      }
+      this.logger.warn(`Bridge client ${id} failed its health check; closing it`);
+      this.evictBridgeClient(id);
+      await this.mcpClient.closeClient(id).catch((error) => {
+        this.logger.error(`Error closing client ${id}:`, error);
+      });
+    }));
+  }
+
   public async start(): Promise<void> {
     const banner = `
     ███╗   ███╗ ██████╗██████╗      ██████╗ ██████╗ ███╗   ██╗███╗   ██╗███████╗ ██████╗████████╗
@@ -283,6 +380,7 @@ export class HttpServer {
             this.logger.info(`Local: ${localUrl}`);
             this.logger.info(`Health check URL: ${localUrl}/health`);
             this.logger.info(`MCP Bridge URL: ${localUrl}/bridge`);
+            this.streamSessionManager.warmPools(this.streamableServers);
 
             if (this.tunnelManager) {
               try {
@@ -326,17 +424,14 @@ export class HttpServer {
       this.bridgeCleanupTimer = null;
     }
 
-    // Close all cached clients
-    const closePromises = Array.from(this.clientCache.values()).map(async (client) => {
-      try {
-        await this.mcpClient.closeClient(client.id);
-      } catch (error) {
-        this.logger.error(`Error closing client ${client.id}:`, error);
-      }
-    });
+    if (this.bridgeHealthTimer) {
+      clearInterval(this.bridgeHealthTimer);
+      this.bridgeHealthTimer = null;
+    }
 
-    await Promise.all(closePromises);
-    this.clientCache.clear();
+    // Close all pooled clients
+    await Promise.all(Array.from(this.clientPools.values()).map((clientPool) => clientPool.close()));
+    this.clientPools.clear();
 
     if (this.streamSessionCleanupTimer) {
       clearInterval(this.streamSessionCleanupTimer);
@@ -463,8 +558,14 @@ export class HttpServer {
           return;
         }
 
-        session = await this.streamSessionManager.createSession(serverId, effectiveServerConfig);
+        // Pre-started sessions run with the configured env only, so header overrides bypass them
+        session = await this.streamSessionManager.createSession(
+          serverId,
+          effectiveServerConfig,
+          Object.keys(headerEnvOverrides).length === 0
+        );
         sessionId = session.id;
+        this.watchListChanges(session, `${serverId}\u0000${JSON.stringify(headerEnvOverrides)}`);
       } else {
         session = this.streamSessionManager.getSession(sessionHeader, serverId);
         if (!session) {
@@ -480,8 +581,9 @@ export class HttpServer {
     }
     res.setHeader('mcp-session-id', sessionId);
 
+    let outgoing = normalizedMessages;
     const forwardMessages = async () => {
-      for (const message of normalizedMessages) {
+      for (const message of outgoing) {
         await session!.send(message);
       }
     };
@@ -513,6 +615,26 @@ export class HttpServer {
       }
     }
 
+    // Answer cached list requests here; misses are stored when their responses come back
+    const cacheScope = this.sessionCacheScopes.get(session);
+    const cachedResponses: JSONRPCMessage[] = [];
+    const cacheMisses = new Map<string, { method: string; params: unknown }>();
+    const requestedAt = Date.now();
+    if (cacheScope) {
+      outgoing = normalizedMessages.filter((message) => {
+        if (!this.isJsonRpcRequest(message) || !this.listCache.isCacheable(message.method)) {
+          return true;
+        }
+        const cached = this.listCache.get(cacheScope, message.method, message.params);
+        if (cached === undefined) {
+          cacheMisses.set(String(message.id), { method: message.method, params: message.params });
+          return true;
+        }
+        cachedResponses.push({ jsonrpc: '2.0', id: message.id, result: cached } as JSONRPCMessage);
+        return false;
+      });
+    }
+
     let streamClosed = false;
     let eventCounter = 0;
 
@@ -552,6 +674,10 @@ export class HttpServer {
         }
         pendingIds.delete(key);
         shouldCloseAfterWrite = pendingIds.size === 0;
+        const miss = cacheMisses.get(key);
+        if (miss && cacheScope && Object.prototype.hasOwnProperty.call(message, 'result')) {
+          this.listCache.set(cacheScope, miss.method, miss.params, (message as { result: unknown }).result, requestedAt);
+        }
       }
 
       writeEvent(message);
@@ -600,6 +726,8 @@ export class HttpServer {
     session.on('close', onSessionClose);
     req.on('close', onClientClose);
 
+    cachedResponses.forEach((message) => deliverMessage(message));
+
     try {
       await forwardMessages();
     } catch (error) {
@@ -618,36 +746,56 @@ export class HttpServer {
     }
   }
 
+  /**
+   * Invalidate the list cache scope of a stream session whenever its server sends
+   * notifications/<kind>/list_changed.
+   */
+  private watchListChanges(session: StreamSession, cacheScope: string): void {
+    this.sessionCacheScopes.set(session, cacheScope);
+    session.on('message', (payload: JSONRPCMessage | JSONRPCMessage[]) => {
+      for (const message of Array.isArray(payload) ? payload : [payload]) {
+        const method = (message as { method?: unknown }).method;
+        if (typeof method === 'string' && !Object.prototype.hasOwnProperty.call(message, 'id')) {
+          this.listCache.invalidateForNotification(cacheScope, method);
+        }
+      }
+    });
+  }
+
   private async cleanupClientCache(): Promise<void> {
     const now = Date.now();
-    const expiredClients: Array<{ key: string; clientId: string; idleTime: number }> = [];
-
-    // First pass: identify expired clients
-    for (const [key, value] of this.clientCache.entries()) {
-      const idleTime = now - value.lastUsed;
-      if (idleTime > this.CLIENT_CACHE_TTL) {
-        expiredClients.push({ key, clientId: value.id, idleTime });
+    const expiredPools: Array<{ key: string; clientPool: ClientPool; idleTime: number }> = [];
+    const idleClients: string[] = [];
+
+    // First pass: identify expired pools, and idle clients above each live pool's minimum
+    for (const [key, clientPool] of this.clientPools.entries()) {
+      const idleTime = now - clientPool.lastUsed;
+      if (idleTime > this.CLIENT_CACHE_TTL && clientPool.inFlight === 0) {
+        expiredPools.push({ key, clientPool, idleTime });
+      } else {
+        idleClients.push(...clientPool.trimIdle(this.CLIENT_CACHE_TTL));
       }
     }
 
-    if (expiredClients.length === 0) {
+    if (expiredPools.length === 0 && idleClients.length === 0) {
       return;
     }
 
-    this.logger.info(`Cleaning up ${expiredClients.length} expired bridge client(s)`);
+    this.logger.info(`Cleaning up ${expiredPools.length} expired bridge pool(s) and ${idleClients.length} idle pooled client(s)`);
 
-    // Second pass: close expired clients
-    for (const { key, clientId, idleTime } of expiredClients) {
-      try {
-        this.logger.debug(`Closing bridge client ${clientId} (idle for ${Math.floor(idleTime / 1000)}s)`);
-        await this.mcpClient.closeClient(clientId).catch(err => {
-          this.logger.error(`Error closing client ${clientId}:`, err);
-        });
-        this.clientCache.delete(key);
-      } catch (error) {
-        this.logger.error(`Error during cleanup for client ${clientId}:`, error);
-        this.clientCache.delete(key);
-      }
+    // Second pass: close expired pools and trimmed clients
+    for (const { key, clientPool, idleTime } of expiredPools) {
+      this.logger.debug(`Closing bridge pool for ${clientPool.label} (idle for ${Math.floor(idleTime / 1000)}s)`);
+      this.clientPools.delete(key);
+      this.listCache.drop(key);
+      await clientPool.close().catch(err => {
+        this.logger.error(`Error closing bridge pool for ${clientPool.label}:`, err);
+      });
+    }
+    for (const clientId of idleClients) {
+      await this.mcpClient.closeClient(clientId).catch(err => {
+        this.logger.error(`Error closing client ${clientId}:`, err);
+      });
     }
   }
 }
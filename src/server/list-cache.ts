@@ -0,0 +1,166 @@
+// List methods whose results only change when the server says so (notifications/*/list_changed)
+const CACHEABLE_METHODS = ['tools/list', 'prompts/list', 'resources/list', 'resources/templates/list'];
+
+// Which cached methods each list_changed notification invalidates
+const INVALIDATED_BY: Record<string, string[]> = {
+  'notifications/tools/list_changed': ['tools/list'],
+  'notifications/prompts/list_changed': ['prompts/list'],
+  'notifications/resources/list_changed': ['resources/list', 'resources/templates/list'],
+};
+
+interface CacheEntry {
+  scope: string;
+  method: string;
+  value: unknown;
+  expiresAt: number;
+}
+
+interface MethodCounters {
+  hits: number;
+  misses: number;
+}
+
+/**
+ * TTL- and size-bounded cache for MCP list responses, shared by /bridge and /mcp/:serverId.
+ *
+ * Entries are keyed by scope (one upstream server configuration: a /bridge cache key or a
+ * streamable serverId plus its header env overrides), method and params. The least recently
+ * used entry is evicted once `maxEntries` is reached. A ttlMs of 0 disables the cache.
+ */
+export class ListCache {
+  private readonly ttlMs: number;
+  private readonly maxEntries: number;
+  private readonly entries = new Map<string, CacheEntry>();
+  private readonly perMethod = new Map<string, MethodCounters>();
+  // Last list_changed per scope, so responses requested before it are not stored
+  private readonly invalidatedAt = new Map<string, number>();
+  private evictions = 0;
+  private invalidations = 0;
+
+  constructor(ttlMs: number, maxEntries: number) {
+    this.ttlMs = ttlMs;
+    this.maxEntries = maxEntries;
+  }
+
+  public get enabled(): boolean {
+    return this.ttlMs > 0 && this.maxEntries > 0;
+  }
+
+  public isCacheable(method: string): boolean {
+    return this.enabled && CACHEABLE_METHODS.includes(method);
+  }
+
+  public get(scope: string, method: string, params: unknown): unknown | undefined {
+    const key = this.key(scope, method, params);
+    const entry = this.entries.get(key);
+    const counters = this.counters(method);
+    if (!entry || entry.expiresAt <= Date.now()) {
+      if (entry) {
+        this.entries.delete(key);
+      }
+      counters.misses++;
+      return undefined;
+    }
+    // Re-insert to mark as most recently used
+    this.entries.delete(key);
+    this.entries.set(key, entry);
+    counters.hits++;
+    return entry.value;
+  }
+
+  /**
+   * Store a response; `requestedAt` (when the upstream request was sent) skips responses that
+   * may predate a list_changed received while they were in flight.
+   */
+  public set(scope: string, method: string, params: unknown, value: unknown, requestedAt?: number): void {
+    if (requestedAt !== undefined && (this.invalidatedAt.get(scope) ?? -1) >= requestedAt) {
+      return;
+    }
+    const key = this.key(scope, method, params);
+    this.entries.delete(key);
+    this.entries.set(key, { scope, method, value, expiresAt: Date.now() + this.ttlMs });
+    while (this.entries.size > this.maxEntries) {
+      const oldest = this.entries.keys().next().value as string;
+      this.entries.delete(oldest);
+      this.evictions++;
+    }
+  }
+
+  /**
+   * Drop what a `notifications/<kind>/list_changed` from this scope invalidates; returns
+   * whether the notification was a list_changed one.
+   */
+  public invalidateForNotification(scope: string, notificationMethod: string): boolean {
+    const methods = INVALIDATED_BY[notificationMethod];
+    if (!methods) {
+      return false;
+    }
+    this.invalidatedAt.set(scope, Date.now());
+    this.invalidate(scope, methods);
+    return true;
+  }
+
+  /**
+   * Forget a scope whose upstream server is gone.
+   */
+  public drop(scope: string): void {
+    this.invalidatedAt.delete(scope);
+    this.invalidate(scope);
+  }
+
+  private invalidate(scope: string, methods?: string[]): void {
+    for (const [key, entry] of this.entries.entries()) {
+      if (entry.scope === scope && (!methods || methods.includes(entry.method))) {
+        this.entries.delete(key);
+        this.invalidations++;
+      }
+    }
+  }
+
+  public stats(): Record<string, unknown> {
+    let hits = 0;
+    let misses = 0;
+    const methods: Record<string, MethodCounters & { hitRate: number | null }> = {};
+    for (const [method, counters] of this.perMethod.entries()) {
+      hits += counters.hits;
+      misses += counters.misses;
+      methods[method] = { ...counters, hitRate: hitRate(counters.hits, counters.misses) };
+    }
+    return {
+      enabled: this.enabled,
+      ttlMs: this.ttlMs,
+      maxEntries: this.maxEntries,
+      entries: this.entries.size,
+      hits,
+      misses,
+      hitRate: hitRate(hits, misses),
+      evictions: this.evictions,
+      invalidations: this.invalidations,
+      methods,
+    };
+  }
+
+  private key(scope: string, method: string, params: unknown): string {
+    // _meta (e.g. a progressToken) is per request and does not change the result
+    let keyParams = params ?? {};
+    if (typeof keyParams === 'object' && '_meta' in (keyParams as Record<string, unknown>)) {
+      const { _meta, ...rest } = keyParams as Record<string, unknown>;
+      keyParams = rest;
+    }
+    return `${scope}\u0000${method}\u0000${JSON.stringify(keyParams)}`;
+  }
+
+  private counters(method: string): MethodCounters {
+    let counters = this.perMethod.get(method);
+    if (!counters) {
+      counters = { hits: 0, misses: 0 };
+      this.perMethod.set(method, counters);
+    }
+    return counters;
+  }
+}
+
+function hitRate(hits: number, misses: number): number | null {
+  const total = hits + misses;
+  return total > 0 ? Math.round((hits / total) * 1000) / 1000 : null;
+}
@@ -1,24 +1,97 @@
 import { StreamSession } from './stream-session.js';
 import type { StreamableServerConfig } from '../config/config.js';
 import type { Logger } from '../utils/logger.js';
+import { summarizeSamples } from '../utils/stats.js';
 
 interface SessionRecord {
   serverId: string;
   session: StreamSession;
 }
 
+// Pre-started sessions for one serverId (`poolSize` in mcp-servers.json)
+interface SessionPool {
+  config: StreamableServerConfig;
+  size: number;
+  idle: StreamSession[];
+  starting: number;
+  hits: number;
+  misses: number;
+  bypassed: number;
+  spawned: number;
+  spawnFailures: number;
+}
+
+// Spawn latencies kept per server for the metrics
+const SPAWN_SAMPLE_SIZE = 200;
+
 export class StreamSessionManager {
   private readonly sessions = new Map<string, SessionRecord>();
+  private readonly pools = new Map<string, SessionPool>();
+  private readonly spawnSamples = new Map<string, number[]>();
   private readonly logger: Logger;
   private readonly ttlMs: number;
+  private closing = false;
 
   constructor(logger: Logger, ttlMs: number) {
     this.logger = logger;
     this.ttlMs = ttlMs;
   }
 
-  public async createSession(serverId: string, config: StreamableServerConfig): Promise<StreamSession> {
-    const session = new StreamSession(this.logger, config);
+  /**
+   * Start `poolSize` idle sessions for every server that configures one. Servers that already
+   * have a pool are left alone, so calling this again (e.g. on a server restart) is safe.
+   */
+  public warmPools(servers: Record<string, StreamableServerConfig>): void {
+    for (const [serverId, config] of Object.entries(servers)) {
+      const size = config.poolSize ?? 0;
+      if (size <= 0 || this.pools.has(serverId)) {
+        continue;
+      }
+      this.pools.set(serverId, {
+        config,
+        size,
+        idle: [],
+        starting: 0,
+        hits: 0,
+        misses: 0,
+        bypassed: 0,
+        spawned: 0,
+        spawnFailures: 0,
+      });
+      this.logger.info(`Pre-starting ${size} stream session(s) for server ${serverId}`);
+      this.replenish(serverId);
+    }
+  }
+
+  /**
+   * Create a session for a client. A pre-started one is handed out when the server has a pool
+   * and `usePool` is set (callers clear it when the config carries per-request env overrides).
+   */
+  public async createSession(
+    serverId: string,
+    config: StreamableServerConfig,
+    usePool = true
+  ): Promise<StreamSession> {
+    const pool = this.pools.get(serverId);
+    let session: StreamSession | undefined;
+    if (pool && !usePool) {
+      pool.bypassed++;
+    } else if (pool) {
+      session = this.takeIdle(pool);
+      if (session) {
+        pool.hits++;
+        session.touch();
+      } else {
+        pool.misses++;
+      }
+      this.replenish(serverId);
+    }
+
+    const pooled = session !== undefined;
+    if (!session) {
+      session = new StreamSession(this.logger, config);
+    }
+
     const sessionId = session.id;
     this.sessions.set(sessionId, { serverId, session });
     session.on('close', () => {
@@ -31,8 +104,10 @@ export class StreamSessionManager {
       }
       // No immediate deletion; allow client to handle recovery.
     });
-    await session.ensureStarted();
-    this.logger.info(`Created stream session ${sessionId} for server ${serverId}`);
+    if (!pooled) {
+      await this.start(serverId, session);
+    }
+    this.logger.info(`Created stream session ${sessionId} for server ${serverId}${pooled ? ' (pre-started)' : ''}`);
     return session;
   }
 
@@ -72,7 +147,108 @@ export class StreamSessionManager {
   }
 
   public async closeAll(): Promise<void> {
+    this.closing = true;
+    const idle = Array.from(this.pools.values()).flatMap((pool) => pool.idle.splice(0));
     const ids = Array.from(this.sessions.keys());
-    await Promise.all(ids.map((id) => this.closeSession(id)));
+    await Promise.all([
+      ...ids.map((id) => this.closeSession(id)),
+      ...idle.map((session) => session.close()),
+    ]);
+  }
+
+  /**
+   * Session pool hits and misses and spawn latency per server.
+   */
+  public stats(): Record<string, unknown> {
+    const servers: Record<string, unknown> = {};
+    const serverIds = new Set([...this.pools.keys(), ...this.spawnSamples.keys()]);
+    for (const serverId of serverIds) {
+      const pool = this.pools.get(serverId);
+      const served = pool ? pool.hits + pool.misses : 0;
+      servers[serverId] = {
+        ...(pool
+          ? {
+              poolSize: pool.size,
+              idle: pool.idle.length,
+              starting: pool.starting,
+              hits: pool.hits,
+              misses: pool.misses,
+              hitRate: served > 0 ? Math.round((pool.hits / served) * 1000) / 1000 : null,
+              bypassed: pool.bypassed,
+              spawned: pool.spawned,
+              spawnFailures: pool.spawnFailures,
+            }
+          : { poolSize: 0 }),
+        spawnMs: summarizeSamples(this.spawnSamples.get(serverId) ?? []),
+      };
+    }
+    return { activeSessions: this.sessions.size, servers };
+  }
+
+  private takeIdle(pool: SessionPool): StreamSession | undefined {
+    while (pool.idle.length > 0) {
+      const session = pool.idle.shift()!;
+      if (!session.isClosed) {
+        return session;
+      }
+    }
+    return undefined;
+  }
+
+  /**
+   * Top the pool back up to its size in the background.
+   */
+  private replenish(serverId: string): void {
+    const pool = this.pools.get(serverId);
+    if (!pool || this.closing) {
+      return;
+    }
+    for (let missing = pool.size - pool.idle.length - pool.starting; missing > 0; missing--) {
+      pool.starting++;
+      const session = new StreamSession(this.logger, pool.config);
+      // Errors are logged by the session; without a listener they would be thrown
+      session.on('error', () => {});
+      this.start(serverId, session)
+        .then(() => {
+          pool.spawned++;
+          if (this.closing) {
+            void session.close().catch(() => {});
+            return;
+          }
+          pool.idle.push(session);
+          // A pre-started server that exits is dropped; the next session request refills the
+          // pool, so a server that keeps crashing is not respawned in a loop
+          session.once('close', () => {
+            const index = pool.idle.indexOf(session);
+            if (index >= 0) {
+              pool.idle.splice(index, 1);
+              this.logger.warn(`Pre-started session for server ${serverId} exited`);
+            }
+          });
+        })
+        .catch((error) => {
+          // Not retried here; the next session request for this server tries again
+          pool.spawnFailures++;
+          this.logger.error(`Failed to pre-start a session for server ${serverId}:`, error);
+          void session.close().catch(() => {});
+        })
+        .finally(() => {
+          pool.starting--;
+        });
+    }
+  }
+
+  private async start(serverId: string, session: StreamSession): Promise<void> {
+    const startedAt = Date.now();
+    await session.ensureStarted();
+    let samples = this.spawnSamples.get(serverId);
+    if (!samples) {
+      samples = [];
+      this.spawnSamples.set(serverId, samples);
+    }
+    samples.push(Date.now() - startedAt);
+    if (samples.length > SPAWN_SAMPLE_SIZE) {
+      samples.shift();
+    }
   }
 }
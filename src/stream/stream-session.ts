@@ -68,6 +68,17 @@ export class StreamSession extends EventEmitter {
     return this._lastUsed;
   }
 
+  public get isClosed(): boolean {
+    return this.closed;
+  }
+
+  /**
+   * Reset the idle clock, e.g. when a pre-started session is handed to a client.
+   */
+  public touch(): void {
+    this._lastUsed = Date.now();
+  }
+
   public async ensureStarted(): Promise<void> {
     if (this.started || this.closed) {
       return;
@@ -0,0 +1,25 @@
+/**
+ * Nearest-rank percentile of an ascending list (null when empty).
+ */
+export function percentile(sorted: number[], pct: number): number | null {
+  if (sorted.length === 0) {
+    return null;
+  }
+  const index = Math.min(sorted.length - 1, Math.max(0, Math.ceil((pct / 100) * sorted.length) - 1));
+  return sorted[index];
+}
+
+/**
+ * Count, average, p50, p95 and max of a list of millisecond samples.
+ */
+export function summarizeSamples(samples: number[]): Record<string, number | null> {
+  const sorted = [...samples].sort((a, b) => a - b);
+  const total = sorted.reduce((sum, value) => sum + value, 0);
+  return {
+    samples: sorted.length,
+    avg: sorted.length > 0 ? Math.round(total / sorted.length) : null,
+    p50: percentile(sorted, 50),
+    p95: percentile(sorted, 95),
+    max: sorted.length > 0 ? sorted[sorted.length - 1] : null,
+  };
+}